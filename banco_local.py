@@ -0,0 +1,386 @@
+# Arquivo: banco_local.py
+# Banco local (SQLite) com a API de conexão/cursor do python-oracledb, usado nos benchmarks no lugar do Oracle
+
+import itertools
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import oracledb
+
+from oracle import SQL_ATUALIZAR_RESUMO, SQL_RECONSTRUIR_RESUMO
+
+# Mesmas tabelas e índices de criar_banco_colheita_cana_de_acucar.sql, nos tipos do SQLite
+SQL_CRIAR_TABELAS = """
+    CREATE TABLE IF NOT EXISTS COLHEITA_CANA (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        TALHAO TEXT NOT NULL,
+        AREA REAL NOT NULL CHECK (AREA > 0),
+        TIPO_COLHEITA TEXT NOT NULL CHECK (TIPO_COLHEITA IN ('manual', 'mecanica')),
+        PRODUCAO REAL NOT NULL CHECK (PRODUCAO >= 0),
+        PERDA REAL NOT NULL CHECK (PERDA >= 0),
+        PRODUTIVIDADE REAL,
+        PREJUIZO REAL,
+        DATA_COLETA TIMESTAMP,
+        ID_ORIGEM TEXT CONSTRAINT UK_COLHEITA_ID_ORIGEM UNIQUE
+    );
+    CREATE INDEX IF NOT EXISTS IDX_COLHEITA_PROD_PREJ ON COLHEITA_CANA (PRODUTIVIDADE, PREJUIZO);
+    CREATE INDEX IF NOT EXISTS IDX_COLHEITA_TALHAO_DATA ON COLHEITA_CANA (TALHAO, DATA_COLETA);
+    CREATE INDEX IF NOT EXISTS IDX_COLHEITA_DATA_ID ON COLHEITA_CANA (DATA_COLETA, ID);
+    CREATE TABLE IF NOT EXISTS RESUMO_COLHEITA (
+        TIPO_COLHEITA TEXT NOT NULL,
+        TALHAO TEXT NOT NULL,
+        MES TEXT NOT NULL,
+        REGISTROS INTEGER NOT NULL,
+        QTD_PRODUTIVIDADE INTEGER NOT NULL,
+        SOMA_PRODUTIVIDADE REAL NOT NULL,
+        MIN_PRODUTIVIDADE REAL,
+        MAX_PRODUTIVIDADE REAL,
+        SOMA_PRODUCAO REAL NOT NULL,
+        MIN_PRODUCAO REAL,
+        MAX_PRODUCAO REAL,
+        SOMA_PERDA REAL NOT NULL,
+        MIN_PERDA REAL,
+        MAX_PERDA REAL,
+        SOMA_PREJUIZO REAL NOT NULL,
+        MIN_PREJUIZO REAL,
+        MAX_PREJUIZO REAL,
+        CONSTRAINT PK_RESUMO_COLHEITA PRIMARY KEY (TIPO_COLHEITA, TALHAO, MES)
+    );
+    CREATE TABLE IF NOT EXISTS ALERTA_COLHEITA (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ID_COLHEITA INTEGER NOT NULL REFERENCES COLHEITA_CANA (ID) ON DELETE CASCADE,
+        REGRA TEXT NOT NULL,
+        TALHAO TEXT NOT NULL,
+        TIPO_COLHEITA TEXT NOT NULL,
+        PRODUTIVIDADE REAL,
+        PREJUIZO REAL,
+        LIMITE_PRODUTIVIDADE REAL,
+        LIMITE_PREJUIZO REAL,
+        DATA_ALERTA TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+        SITUACAO TEXT NOT NULL DEFAULT 'ABERTO' CHECK (SITUACAO IN ('ABERTO', 'RESOLVIDO')),
+        DATA_RESOLUCAO TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS IDX_ALERTA_SITUACAO_DATA ON ALERTA_COLHEITA (SITUACAO, DATA_ALERTA);
+    CREATE INDEX IF NOT EXISTS IDX_ALERTA_COLHEITA ON ALERTA_COLHEITA (ID_COLHEITA);
+"""
+
+# O SQLite não tem MERGE: o resumo usa INSERT ... ON CONFLICT com os mesmos binds de SQL_ATUALIZAR_RESUMO
+_SQL_ATUALIZAR_RESUMO_LOCAL = """
+    INSERT INTO RESUMO_COLHEITA (
+        TIPO_COLHEITA, TALHAO, MES, REGISTROS,
+        QTD_PRODUTIVIDADE, SOMA_PRODUTIVIDADE, MIN_PRODUTIVIDADE, MAX_PRODUTIVIDADE,
+        SOMA_PRODUCAO, MIN_PRODUCAO, MAX_PRODUCAO,
+        SOMA_PERDA, MIN_PERDA, MAX_PERDA,
+        SOMA_PREJUIZO, MIN_PREJUIZO, MAX_PREJUIZO
+    ) VALUES (
+        :tipo_colheita, :talhao, strftime('%Y-%m', IFNULL(:data_coleta, datetime('now', 'localtime'))), :registros,
+        :qtd_produtividade, :soma_produtividade, :min_produtividade, :max_produtividade,
+        :soma_producao, :min_producao, :max_producao,
+        :soma_perda, :min_perda, :max_perda,
+        :soma_prejuizo, :min_prejuizo, :max_prejuizo
+    )
+    ON CONFLICT (TIPO_COLHEITA, TALHAO, MES) DO UPDATE SET
+        REGISTROS = REGISTROS + excluded.REGISTROS,
+        QTD_PRODUTIVIDADE = QTD_PRODUTIVIDADE + excluded.QTD_PRODUTIVIDADE,
+        SOMA_PRODUTIVIDADE = SOMA_PRODUTIVIDADE + excluded.SOMA_PRODUTIVIDADE,
+        MIN_PRODUTIVIDADE = MIN(IFNULL(MIN_PRODUTIVIDADE, excluded.MIN_PRODUTIVIDADE), IFNULL(excluded.MIN_PRODUTIVIDADE, MIN_PRODUTIVIDADE)),
+        MAX_PRODUTIVIDADE = MAX(IFNULL(MAX_PRODUTIVIDADE, excluded.MAX_PRODUTIVIDADE), IFNULL(excluded.MAX_PRODUTIVIDADE, MAX_PRODUTIVIDADE)),
+        SOMA_PRODUCAO = SOMA_PRODUCAO + excluded.SOMA_PRODUCAO,
+        MIN_PRODUCAO = MIN(MIN_PRODUCAO, excluded.MIN_PRODUCAO),
+        MAX_PRODUCAO = MAX(MAX_PRODUCAO, excluded.MAX_PRODUCAO),
+        SOMA_PERDA = SOMA_PERDA + excluded.SOMA_PERDA,
+        MIN_PERDA = MIN(MIN_PERDA, excluded.MIN_PERDA),
+        MAX_PERDA = MAX(MAX_PERDA, excluded.MAX_PERDA),
+        SOMA_PREJUIZO = SOMA_PREJUIZO + excluded.SOMA_PREJUIZO,
+        MIN_PREJUIZO = MIN(IFNULL(MIN_PREJUIZO, excluded.MIN_PREJUIZO), IFNULL(excluded.MIN_PREJUIZO, MIN_PREJUIZO)),
+        MAX_PREJUIZO = MAX(IFNULL(MAX_PREJUIZO, excluded.MAX_PREJUIZO), IFNULL(excluded.MAX_PREJUIZO, MAX_PREJUIZO))
+"""
+
+# Comandos Oracle sem tradução genérica: SQL equivalente no SQLite (None = ignorado)
+SUBSTITUICOES_SQL: Dict[str, Optional[str]] = {
+    SQL_ATUALIZAR_RESUMO: _SQL_ATUALIZAR_RESUMO_LOCAL,
+    "LOCK TABLE COLHEITA_CANA IN SHARE MODE": None, # O SQLite já serializa as escritas
+}
+
+# Formatos de TO_CHAR usados pela aplicação -> strftime
+_FORMATOS_DATA = {"YYYY-MM": "%Y-%m", "YYYY-MM-DD": "%Y-%m-%d"}
+
+SQL_INSERIR_COM_DATA = """
+    INSERT INTO COLHEITA_CANA (
+        TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA, ID_ORIGEM
+    ) VALUES (
+        :talhao, :area, :tipo_colheita, :producao, :perda, :produtividade, :prejuizo, :data_coleta, :id_origem
+    )
+"""
+
+# DATE do Oracle <-> texto ISO no SQLite (colunas declaradas como TIMESTAMP voltam como datetime)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_converter("TIMESTAMP", lambda valor: datetime.fromisoformat(valor.decode()))
+
+
+@lru_cache(maxsize=256)
+def traduzir_sql(sql: str) -> Optional[str]:
+    """Converte um comando no dialeto Oracle usado pela aplicação para o SQLite (None = ignorar o comando)."""
+    chave = sql.strip()
+    for original, substituto in SUBSTITUICOES_SQL.items():
+        if chave == original.strip():
+            return substituto
+    sql = re.sub(r"TO_CHAR\(([^,()]+), '([^']+)'\)",
+                 lambda m: f"strftime('{_FORMATOS_DATA[m.group(2)]}', {m.group(1)})", sql)
+    sql = re.sub(r"\bSYSDATE\b", "datetime('now', 'localtime')", sql)
+    sql = re.sub(r"\bNVL\(", "IFNULL(", sql)
+    sql = re.sub(r"\bLEAST\(", "MIN(", sql)
+    sql = re.sub(r"\bGREATEST\(", "MAX(", sql)
+    sql = re.sub(r"PERCENTILE_CONT\(([\d.]+)\)\s+WITHIN GROUP\s+\(ORDER BY (\w+)\)", r"PERCENTILE_CONT(\2, \1)", sql)
+    sql = re.sub(r"FETCH FIRST (:\w+|\d+) ROWS ONLY", r"LIMIT \1", sql)
+    sql = re.sub(r"\s+FROM DUAL\b", "", sql)
+    # RETURNING ID INTO :variavel: o ID vem de `lastrowid` (ver `_VariavelLocal`)
+    sql = re.sub(r"\s+RETURNING\s+ID\s+INTO\s+:\w+", "", sql)
+    return sql
+
+
+class _PercentilContinuo:
+    """Agregação PERCENTILE_CONT(valor, fração) com interpolação linear, como no Oracle."""
+
+    def __init__(self):
+        self.valores: List[float] = []
+        self.fracao = 0.5
+
+    def step(self, valor: Optional[float], fracao: float) -> None:
+        self.fracao = fracao
+        if valor is not None:
+            self.valores.append(valor)
+
+    def finalize(self) -> Optional[float]:
+        if not self.valores:
+            return None
+        self.valores.sort()
+        posicao = (len(self.valores) - 1) * self.fracao
+        inferior = int(posicao)
+        superior = min(inferior + 1, len(self.valores) - 1)
+        return self.valores[inferior] + (self.valores[superior] - self.valores[inferior]) * (posicao - inferior)
+
+
+def _mensagem_oracle(erro: sqlite3.Error) -> str:
+    """Prefixa a mensagem do SQLite com o código ORA equivalente (ex.: ORA-00001 para chave duplicada)."""
+    texto = str(erro)
+    for trecho, codigo in (("UNIQUE", "ORA-00001"), ("CHECK", "ORA-02290"), ("NOT NULL", "ORA-01400")):
+        if trecho in texto:
+            return f"{codigo}: {texto}"
+    return texto
+
+
+@contextmanager
+def _erros_oracle() -> Iterator[None]:
+    """Converte erros do SQLite em `oracledb.Error`, que é o que as funções de oracle.py tratam."""
+    try:
+        yield
+    except sqlite3.IntegrityError as erro:
+        raise oracledb.IntegrityError(_mensagem_oracle(erro)) from erro
+    except sqlite3.Error as erro:
+        raise oracledb.DatabaseError(_mensagem_oracle(erro)) from erro
+
+
+class _ErroLote:
+    """Linha recusada em `executemany(..., batcherrors=True)` (mesmos atributos do python-oracledb)."""
+
+    def __init__(self, offset: int, message: str):
+        self.offset = offset
+        self.message = message
+
+
+class _VariavelLocal:
+    """Variável de saída (`cursor.var`) de um RETURNING ID INTO: uma lista de valores por linha executada."""
+
+    def __init__(self, quantidade: int = 1):
+        self.valores: List[List[Any]] = [[] for _ in range(quantidade)]
+
+    def getvalue(self, posicao: int = 0) -> List[Any]:
+        return self.valores[posicao]
+
+
+class CursorLocal:
+    """Cursor com a interface usada pela aplicação do `oracledb.Cursor`, executando no SQLite."""
+
+    def __init__(self, conexao: sqlite3.Connection):
+        self._conexao = conexao
+        self._cursor = conexao.cursor()
+        self._erros_lote: List[_ErroLote] = []
+        self.arraysize = 100
+        self.prefetchrows = 2 # Aceito por compatibilidade; o SQLite não faz prefetch
+        self.rowfactory: Optional[Callable[..., Any]] = None
+        self._saidas: Dict[str, _VariavelLocal] = {}
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def var(self, tipo: Any, arraysize: int = 1) -> _VariavelLocal:
+        return _VariavelLocal(arraysize)
+
+    def setinputsizes(self, **variaveis: Any) -> None:
+        self._saidas = {nome: v for nome, v in variaveis.items() if isinstance(v, _VariavelLocal)}
+
+    def execute(self, sql: str, parametros: Optional[Dict[str, Any]] = None, **binds: Any) -> None:
+        self.rowfactory = None # Como no oracledb: cada execute volta a devolver tuplas
+        binds = dict(parametros or {}, **binds)
+        saidas = dict(self._saidas, **{nome: v for nome, v in binds.items() if isinstance(v, _VariavelLocal)})
+        self._saidas = {}
+        sql_local = traduzir_sql(sql)
+        if sql_local is None:
+            return
+        with _erros_oracle():
+            self._cursor.execute(sql_local, {nome: v for nome, v in binds.items() if nome not in saidas})
+        for variavel in saidas.values():
+            variavel.valores = [[self._cursor.lastrowid]]
+
+    def executemany(self, sql: str, linhas: Iterable[Dict[str, Any]], batcherrors: bool = False) -> None:
+        self._erros_lote = []
+        saidas, self._saidas = self._saidas, {}
+        sql_local = traduzir_sql(sql)
+        if sql_local is None:
+            return
+        linhas = list(linhas)
+        if saidas:
+            # RETURNING ... INTO: o executemany do SQLite não expõe o ID de cada linha; executa uma a uma
+            for variavel in saidas.values():
+                variavel.valores = [[] for _ in linhas]
+            with _erros_oracle():
+                for posicao, linha in enumerate(linhas):
+                    try:
+                        self._cursor.execute(sql_local, linha)
+                    except sqlite3.IntegrityError as erro:
+                        if not batcherrors:
+                            raise
+                        self._erros_lote.append(_ErroLote(posicao, _mensagem_oracle(erro)))
+                        continue
+                    for variavel in saidas.values():
+                        variavel.valores[posicao] = [self._cursor.lastrowid]
+            return
+        if not batcherrors:
+            with _erros_oracle():
+                self._cursor.executemany(sql_local, linhas)
+            return
+        # O Oracle grava as linhas válidas e reporta as recusadas; o SQLite para na primeira falha.
+        # Tenta o lote inteiro em um SAVEPOINT e, se alguma linha falhar, refaz linha a linha.
+        with _erros_oracle():
+            if not self._conexao.in_transaction:
+                self._cursor.execute("BEGIN")
+            self._cursor.execute("SAVEPOINT lote")
+            try:
+                self._cursor.executemany(sql_local, linhas)
+                self._cursor.execute("RELEASE SAVEPOINT lote")
+                return
+            except sqlite3.IntegrityError:
+                self._cursor.execute("ROLLBACK TO SAVEPOINT lote")
+                self._cursor.execute("RELEASE SAVEPOINT lote")
+            for posicao, linha in enumerate(linhas):
+                try:
+                    self._cursor.execute(sql_local, linha)
+                except sqlite3.IntegrityError as erro:
+                    self._erros_lote.append(_ErroLote(posicao, _mensagem_oracle(erro)))
+
+    def getbatcherrors(self) -> List[_ErroLote]:
+        return self._erros_lote
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        return self.rowfactory(*linha) if linha is not None and self.rowfactory else linha
+
+    def fetchmany(self, quantidade: Optional[int] = None):
+        return self._aplicar_rowfactory(self._cursor.fetchmany(quantidade or self.arraysize))
+
+    def fetchall(self):
+        return self._aplicar_rowfactory(self._cursor.fetchall())
+
+    def __iter__(self):
+        return itertools.starmap(self.rowfactory, self._cursor) if self.rowfactory else iter(self._cursor)
+
+    def _aplicar_rowfactory(self, linhas: List[tuple]) -> List[Any]:
+        return list(itertools.starmap(self.rowfactory, linhas)) if self.rowfactory else linhas
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __enter__(self) -> "CursorLocal":
+        return self
+
+    def __exit__(self, *excecao: Any) -> None:
+        self.close()
+
+
+class ConexaoLocal:
+    """Conexão "emprestada" do banco local; `close()` devolve a sessão, desfazendo o que não foi confirmado."""
+
+    def __init__(self, conexao: sqlite3.Connection):
+        self._conexao = conexao
+
+    def cursor(self) -> CursorLocal:
+        return CursorLocal(self._conexao)
+
+    def commit(self) -> None:
+        with _erros_oracle():
+            self._conexao.commit()
+
+    def rollback(self) -> None:
+        with _erros_oracle():
+            self._conexao.rollback()
+
+    def close(self) -> None:
+        if self._conexao.in_transaction:
+            self._conexao.rollback() # Como no pool Oracle: transação pendente não sobrevive à devolução
+
+
+class BancoLocal:
+    """Banco SQLite com as tabelas da aplicação, usado como substituto do Oracle nos benchmarks.
+
+    Use `oracle.definir_fabrica_conexoes(banco.conectar)` para que as funções de oracle.py usem este banco.
+    Todas as conexões compartilham uma única sessão SQLite: adequado para uso em uma thread só.
+    """
+
+    def __init__(self, caminho: str = ":memory:"):
+        self._conexao = sqlite3.connect(caminho, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conexao.create_aggregate("PERCENTILE_CONT", 2, _PercentilContinuo)
+        self._conexao.execute("PRAGMA foreign_keys = ON") # ON DELETE CASCADE de ALERTA_COLHEITA, como no Oracle
+        self._conexao.executescript(SQL_CRIAR_TABELAS)
+
+    def conectar(self) -> ConexaoLocal:
+        """Fábrica de conexões para `oracle.definir_fabrica_conexoes`."""
+        return ConexaoLocal(self._conexao)
+
+    def popular(self, colheitas: Iterable[Dict[str, Any]], tamanho_lote: int = 10_000) -> int:
+        """Insere colheitas com a `data_coleta` informada (mesmo nula, sem recorrer a SYSDATE) e reconstrói o resumo."""
+        total = 0
+        lote: List[Dict[str, Any]] = []
+        cursor = self.conectar().cursor()
+        for colheita in colheitas:
+            lote.append({
+                "talhao": colheita.get("talhao"), "area": colheita.get("area", colheita.get("area_plantada")),
+                "tipo_colheita": colheita.get("tipo_colheita"), "producao": colheita.get("producao"),
+                "perda": colheita.get("perda"), "produtividade": colheita.get("produtividade"),
+                "prejuizo": colheita.get("prejuizo"), "data_coleta": colheita.get("data_coleta"),
+                "id_origem": colheita.get("id_origem"),
+            })
+            if len(lote) >= tamanho_lote:
+                cursor.executemany(SQL_INSERIR_COM_DATA, lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            cursor.executemany(SQL_INSERIR_COM_DATA, lote)
+            total += len(lote)
+        cursor.execute("DELETE FROM RESUMO_COLHEITA")
+        cursor.execute(SQL_RECONSTRUIR_RESUMO)
+        self._conexao.commit()
+        return total
+
+    def fechar(self) -> None:
+        self._conexao.close()
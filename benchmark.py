@@ -0,0 +1,322 @@
+# Arquivo: benchmark.py
+# Mede vazão, latência e pico de memória das operações principais sobre colheitas sintéticas
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from funcoes import gerar_relatorio_txt, salvar_json, salvar_colunar, carregar_colunar, gerar_relatorio_estatistico, \
+    alertar_colheitas_ineficientes, LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO
+from oracle import (
+    listar_colheitas_oracle, iterar_colheitas_oracle, colheitas_colunares_oracle, estatisticas_colheitas_oracle,
+    estatisticas_resumo_oracle, listar_alertas_oracle, listar_alertas_abertos_oracle, reavaliar_alertas_oracle,
+    salvar_colheitas_lote_oracle,
+    definir_fabrica_conexoes, invalidar_cache, fechar_pool, get_connection, SQL_LISTAR_COLHEITAS,
+)
+from registro import Colheita
+from sintetico import gerar_colheitas
+
+# Variação (fração da latência mediana) acima da qual a comparação aponta regressão
+LIMIAR_REGRESSAO = 0.10
+
+
+def _operacoes(linhas: int, pasta: str, escrita: bool) -> List[Tuple[str, int, Callable[[], Any]]]:
+    """Operações medidas: (nome, linhas processadas por execução, função)."""
+    colheitas = listar_colheitas_oracle() # Mesma leitura única do cli.py, reaproveitada pelas etapas em memória
+    colunares = colheitas_colunares_oracle()
+    arquivo_colunar = os.path.join(pasta, "dados.colh")
+    salvar_colunar(colunares, arquivo_colunar) # Já existe antes da leitura, seja qual for a ordem das medições
+    operacoes = [
+        ("listar_colheitas_oracle", linhas, listar_colheitas_oracle),
+        ("iterar_colheitas_oracle", linhas, lambda: sum(1 for _ in iterar_colheitas_oracle())),
+        ("colheitas_colunares_oracle", linhas, colheitas_colunares_oracle),
+        ("estatisticas_oracle_tipo", linhas, lambda: estatisticas_colheitas_oracle("tipo_colheita")),
+        ("estatisticas_oracle_mes", linhas, lambda: estatisticas_colheitas_oracle("mes")),
+        ("estatisticas_resumo_talhao", linhas, lambda: estatisticas_resumo_oracle("talhao")),
+        ("estatistico_memoria_tipo", linhas, lambda: gerar_relatorio_estatistico(colheitas, "tipo_colheita")),
+        ("estatistico_memoria_talhao", linhas, lambda: gerar_relatorio_estatistico(colheitas, "talhao")),
+        ("estatistico_colunar_talhao", linhas, lambda: gerar_relatorio_estatistico(colunares, "talhao")),
+        ("alertas_memoria", linhas, lambda: alertar_colheitas_ineficientes(colheitas)),
+        ("alertas_colunar", linhas, lambda: alertar_colheitas_ineficientes(colunares)),
+        ("alertas_oracle", linhas, lambda: listar_alertas_oracle(LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO)),
+        ("alertas_abertos_oracle", linhas, listar_alertas_abertos_oracle),
+        ("relatorio_txt", linhas, lambda: gerar_relatorio_txt(colheitas, os.path.join(pasta, "relatorio.txt"))),
+        ("salvar_json", linhas, lambda: salvar_json(colheitas, os.path.join(pasta, "dados.json"))),
+        ("salvar_jsonl", linhas, lambda: salvar_json(colheitas, os.path.join(pasta, "dados.jsonl"), "jsonl")),
+        ("salvar_colunar", linhas, lambda: salvar_colunar(colheitas, arquivo_colunar)),
+        ("estatistico_colh_talhao", linhas,
+         lambda: gerar_relatorio_estatistico(carregar_colunar(arquivo_colunar), "talhao")),
+    ]
+    if escrita:
+        # Por último: cada execução acrescenta linhas à base
+        # Sem data_coleta, como no cadastro e na carga: o INSERT grava SYSDATE e o resumo fica num só mês
+        novas = [dict(c, data_coleta=None) for c in gerar_colheitas(min(linhas, 100_000), semente=linhas + 1)]
+        operacoes.append(("salvar_colheitas_lote_oracle", len(novas), lambda: salvar_colheitas_lote_oracle(novas)))
+    return operacoes
+
+
+def medir(nome: str, linhas: int, funcao: Callable[[], Any], repeticoes: int) -> Dict[str, Any]:
+    """Executa a operação `repeticoes` vezes (cache de consultas vazio a cada vez) e mais uma com tracemalloc.
+
+    A execução com tracemalloc fica fora das latências, pois o rastreamento deixa o código mais lento.
+    """
+    latencias = []
+    for _ in range(repeticoes):
+        invalidar_cache()
+        inicio = time.perf_counter()
+        funcao()
+        latencias.append(time.perf_counter() - inicio)
+
+    invalidar_cache()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mediana = statistics.median(latencias)
+    resultado = {
+        "linhas": linhas,
+        "repeticoes": repeticoes,
+        "latencia_s": {
+            "min": round(min(latencias), 6),
+            "mediana": round(mediana, 6),
+            "media": round(statistics.fmean(latencias), 6),
+            "max": round(max(latencias), 6),
+        },
+        "linhas_por_s": round(linhas / mediana, 1) if mediana > 0 else None,
+        "memoria_pico_mb": round(pico / 1024 / 1024, 3),
+    }
+    print(f"  {nome:<30} {mediana * 1000:>10.1f} ms {resultado['linhas_por_s'] or 0:>14,.0f} linhas/s "
+          f"{resultado['memoria_pico_mb']:>10.1f} MB")
+    return resultado
+
+
+def medir_registros(linhas: int, repeticoes: int) -> Dict[str, Any]:
+    """Compara a leitura da tabela inteira como dicionários (`dict(zip(colunas, row))`) e como registros `Colheita`.
+
+    Mede a vazão (mediana de `repeticoes` leituras) e a memória retida por linha com a lista pronta
+    (tracemalloc, em uma leitura à parte; inclui os valores das colunas, iguais nos dois formatos).
+    """
+    def dicionarios(cursor: Any) -> List[Dict[str, Any]]:
+        colunas = [col[0].lower() for col in cursor.description]
+        return [dict(zip(colunas, row)) for row in cursor]
+
+    def registros(cursor: Any) -> List[Colheita]:
+        cursor.rowfactory = Colheita
+        return cursor.fetchall()
+
+    def ler(montar: Callable[[Any], List[Any]]) -> List[Any]:
+        conexao = get_connection()
+        try:
+            with conexao.cursor() as cursor:
+                cursor.arraysize = 1000
+                cursor.execute(SQL_LISTAR_COLHEITAS)
+                return montar(cursor)
+        finally:
+            conexao.close()
+
+    resultado = {}
+    print(f"\n📦 Leitura de {linhas} colheitas por formato de linha (vazão | memória retida por linha):")
+    for nome, montar in (("dicionario", dicionarios), ("colheita", registros)):
+        latencias = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            ler(montar)
+            latencias.append(time.perf_counter() - inicio)
+        tracemalloc.start()
+        try:
+            lista = ler(montar)
+            retida, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        mediana = statistics.median(latencias)
+        resultado[nome] = {
+            "latencia_mediana_s": round(mediana, 6),
+            "linhas_por_s": round(len(lista) / mediana, 1) if mediana > 0 else None,
+            "bytes_por_linha": round(retida / len(lista), 1) if lista else None,
+        }
+        del lista
+        print(f"  {nome:<12} {resultado[nome]['linhas_por_s'] or 0:>14,.0f} linhas/s {resultado[nome]['bytes_por_linha'] or 0:>10.1f} B/linha")
+    return resultado
+
+
+def medir_inicializacao(repeticoes: int) -> Dict[str, Any]:
+    """Mede o tempo até o menu do main.py aparecer (um processo novo por repetição) e o perfil de importações.
+
+    O diário e o log do main.py ficam em uma pasta temporária; o aquecimento da conexão é desligado
+    para que o Oracle (ou a falta dele) não interfira na medição.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    tempos = []
+    with tempfile.TemporaryDirectory(prefix="benchmark_inicio_") as pasta:
+        ambiente = dict(os.environ, DB_AQUECER_CONEXAO="0", DIARIO_ARQUIVO=os.path.join(pasta, "diario.db"),
+                        METRICAS_ARQUIVO="")
+
+        def executar(*opcoes: str) -> Tuple[float, str]:
+            inicio = time.perf_counter()
+            processo = subprocess.Popen([sys.executable, "-u", *opcoes, script], cwd=pasta, env=ambiente, text=True,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            for linha in processo.stdout:
+                if "=== SISTEMA" in linha: # Cabeçalho do menu: programa pronto para o operador
+                    break
+            duracao = time.perf_counter() - inicio
+            _, erros = processo.communicate("0\n", timeout=60)
+            return duracao, erros
+
+        for _ in range(repeticoes):
+            tempos.append(executar()[0])
+        _, perfil = executar("-X", "importtime")
+
+    # Importações feitas diretamente pelo main.py (primeiro nível do perfil), da mais lenta para a mais rápida
+    importacoes = []
+    for linha in perfil.splitlines():
+        if linha.startswith("import time:") and "|" in linha:
+            _, acumulado, modulo = linha.split("|")
+            if acumulado.strip().isdigit() and not modulo.startswith("  "):
+                importacoes.append({"modulo": modulo.strip(), "acumulado_ms": round(int(acumulado) / 1000, 1)})
+    importacoes.sort(key=lambda item: item["acumulado_ms"], reverse=True)
+
+    resultado = {
+        "repeticoes": repeticoes,
+        "tempo_ate_menu_s": {
+            "min": round(min(tempos), 4),
+            "mediana": round(statistics.median(tempos), 4),
+            "max": round(max(tempos), 4),
+        },
+        "importacoes": importacoes[:15],
+    }
+    print(f"\n🚀 Tempo até o menu do main.py: {resultado['tempo_ate_menu_s']['mediana'] * 1000:.0f} ms "
+          f"(mediana de {repeticoes})")
+    for item in resultado["importacoes"][:8]:
+        print(f"   {item['modulo']:<30} {item['acumulado_ms']:>8.1f} ms")
+    return resultado
+
+
+def _commit_atual() -> Optional[str]:
+    """Commit do git em que o benchmark rodou (None fora de um repositório)."""
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente(backend: str, linhas: Optional[int], semente: Optional[int]) -> Dict[str, Any]:
+    """Identificação da execução: data, commit, versão do Python e plataforma."""
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "backend": backend,
+        "linhas": linhas,
+        "semente": semente,
+    }
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any], limiar: float = LIMIAR_REGRESSAO) -> List[str]:
+    """Compara as latências medianas com um resultado anterior; retorna as operações que pioraram além do limiar."""
+    regressoes = []
+    print(f"\n🔎 Comparação com o commit {anterior.get('ambiente', {}).get('commit') or 'anterior'}:")
+    for nome, dados in atual["operacoes"].items():
+        base = anterior.get("operacoes", {}).get(nome)
+        if not base or dados["linhas"] != base["linhas"]:
+            print(f"  {nome:<30} sem base comparável")
+            continue
+        antes, depois = base["latencia_s"]["mediana"], dados["latencia_s"]["mediana"]
+        variacao = (depois - antes) / antes if antes else 0.0
+        marcador = "⚠️" if variacao > limiar else "✅"
+        print(f"  {marcador} {nome:<28} {antes * 1000:>10.1f} ms -> {depois * 1000:>10.1f} ms ({variacao:+.1%})")
+        if variacao > limiar:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark das operações de colheita sobre dados sintéticos.")
+    parser.add_argument("--linhas", type=int, default=10_000, help="Colheitas sintéticas na base (padrão: 10000)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções medidas por operação (padrão: 3)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador sintético (padrão: 42)")
+    parser.add_argument("--backend", choices=["sqlite", "oracle"], default="sqlite",
+                        help="sqlite: banco local em memória com dados sintéticos; oracle: base configurada no .env "
+                             "(somente leitura)")
+    parser.add_argument("--arquivo-sqlite", default=":memory:", help="Arquivo do banco local (padrão: em memória)")
+    parser.add_argument("--saida", default="benchmark_resultado.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON) para apontar regressões")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_REGRESSAO,
+                        help="Piora da latência mediana considerada regressão (padrão: 0.10 = 10%%)")
+    parser.add_argument("--inicializacao", action="store_true",
+                        help="Mede apenas o tempo de inicialização do main.py (tempo até o menu e importações)")
+    parser.add_argument("--registros", action="store_true",
+                        help="Mede apenas a leitura da tabela como dicionários x registros Colheita (vazão e memória)")
+    args = parser.parse_args(argv)
+    if args.inicializacao:
+        resultado = {"ambiente": _ambiente(args.backend, None, None), "inicializacao": medir_inicializacao(args.repeticoes)}
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+        print(f"\n✅ Resultados salvos em {args.saida}.")
+        return 0
+    logging.getLogger().setLevel(logging.WARNING) # Os registros por consulta distorceriam as medições
+
+    banco = None
+    if args.backend == "sqlite":
+        from banco_local import BancoLocal # Importação local: o backend Oracle não precisa do SQLite
+        banco = BancoLocal(args.arquivo_sqlite)
+        definir_fabrica_conexoes(banco.conectar)
+        print(f"ℹ️ Gerando {args.linhas} colheitas sintéticas no banco local...")
+        inicio = time.perf_counter()
+        linhas = banco.popular(gerar_colheitas(args.linhas, semente=args.semente))
+        reavaliar_alertas_oracle() # A carga direta não passa pelas regras: registra os alertas da base
+        print(f"   Base pronta em {time.perf_counter() - inicio:.1f} s.")
+    else:
+        linhas = len(listar_colheitas_oracle())
+        if not linhas:
+            print("❌ Nenhuma colheita no Oracle para medir.")
+            return 1
+
+    resultado: Dict[str, Any] = {
+        "ambiente": _ambiente(args.backend, linhas, args.semente if banco else None),
+        "operacoes": {},
+    }
+    try:
+        if args.registros:
+            resultado = {"ambiente": resultado["ambiente"], "registros": medir_registros(linhas, args.repeticoes)}
+        else:
+            print(f"\n⏱️ {linhas} colheitas, {args.repeticoes} repetições (latência mediana | vazão | pico de memória):")
+            with tempfile.TemporaryDirectory(prefix="benchmark_colheita_") as pasta:
+                for nome, quantidade, funcao in _operacoes(linhas, pasta, escrita=banco is not None):
+                    resultado["operacoes"][nome] = medir(nome, quantidade, funcao, args.repeticoes)
+    finally:
+        definir_fabrica_conexoes(None)
+        if banco:
+            banco.fechar()
+        else:
+            fechar_pool()
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    print(f"\n✅ Resultados salvos em {args.saida}.")
+
+    if args.comparar and not args.registros:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultado, json.load(f), args.limiar)
+        if regressoes:
+            print(f"⚠️ {len(regressoes)} operações mais lentas que o limiar de {args.limiar:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
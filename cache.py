@@ -0,0 +1,84 @@
+# Arquivo: cache.py
+# Cache em memória dos resultados de consultas ao Oracle durante a sessão
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class CacheConsultas:
+    """Cache LRU com tempo de vida (TTL) para resultados de consultas.
+
+    Entradas expiradas podem ser revalidadas por uma função barata de "versão" dos dados
+    (ex.: MAX(ID) e COUNT(*) da tabela): se a versão não mudou, o resultado é reaproveitado.
+    A versão é lida só ao vencer uma entrada; a primeira carga de uma chave guarda versão None
+    e, ao vencer, é recarregada uma vez (já com a versão), passando então a ser revalidada.
+    """
+
+    def __init__(self, ttl_segundos: float, max_entradas: int,
+                 versao_dados: Optional[Callable[[], Any]] = None):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.versao_dados = versao_dados
+        # chave -> (momento em que foi carregado/revalidado, versão dos dados, resultado)
+        self._entradas: "OrderedDict[Hashable, Tuple[float, Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementada por `invalidar`: carga iniciada antes da invalidação não é guardada
+        self._geracao = 0
+        self._contadores = {"acertos": 0, "falhas": 0, "revalidacoes": 0, "descartes": 0, "invalidacoes": 0}
+
+    def obter(self, chave: Hashable, carregar: Callable[[], Any]) -> Any:
+        """Retorna o resultado em cache para `chave` ou executa `carregar` e guarda o resultado.
+
+        Resultados None (falha na consulta) não são guardados, nem os de uma carga durante a qual
+        o cache foi invalidado (podem ser anteriores ao commit que motivou a invalidação).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            geracao = self._geracao
+            entrada = self._entradas.get(chave)
+            if entrada and agora - entrada[0] <= self.ttl_segundos:
+                self._entradas.move_to_end(chave)
+                self._contadores["acertos"] += 1
+                return entrada[2]
+
+        # A versão só é lida para uma entrada vencida: serve para revalidá-la e acompanha a nova carga.
+        # Na primeira carga de uma chave não há o que revalidar, e a consulta extra dobraria as idas ao banco.
+        versao = self.versao_dados() if entrada and self.versao_dados else None
+        if entrada and versao is not None and versao == entrada[1]:
+            # TTL vencido, mas os dados não mudaram: renova a entrada sem refazer a consulta
+            with self._lock:
+                if chave in self._entradas and geracao == self._geracao:
+                    self._entradas[chave] = (agora, versao, entrada[2])
+                    self._entradas.move_to_end(chave)
+                self._contadores["revalidacoes"] += 1
+            return entrada[2]
+
+        resultado = carregar()
+        with self._lock:
+            self._contadores["falhas"] += 1
+            if resultado is not None and geracao == self._geracao:
+                self._entradas[chave] = (agora, versao, resultado)
+                self._entradas.move_to_end(chave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False) # Descarta a entrada usada há mais tempo
+                    self._contadores["descartes"] += 1
+        return resultado
+
+    def invalidar(self) -> None:
+        """Remove todas as entradas (chamado após qualquer escrita confirmada no banco)."""
+        with self._lock:
+            self._geracao += 1
+            if self._entradas:
+                self._entradas.clear()
+                self._contadores["invalidacoes"] += 1
+        logging.debug("Cache de consultas invalidado.")
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna os contadores de acertos, falhas, revalidações, descartes e invalidações."""
+        with self._lock:
+            estatisticas = dict(self._contadores)
+            estatisticas["entradas"] = len(self._entradas)
+        return estatisticas
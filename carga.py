@@ -0,0 +1,131 @@
+# Arquivo: carga.py
+# Carga em lote de arquivos de colheita (JSON, JSON Lines ou CSV) para o Oracle
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import time
+from typing import Iterator, Dict, Any, List, Tuple, TextIO
+
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+from funcoes import montar_colheita
+from oracle import salvar_colheitas_lote_oracle, fechar_pool
+
+# Tamanho padrão do lote de INSERTs (pode ser alterado no .env)
+TAMANHO_LOTE = int(os.getenv("CARGA_TAMANHO_LOTE", 1000))
+
+# Quantidade de caracteres lidos por vez ao percorrer um arquivo JSON
+_TAMANHO_BLOCO_JSON = 64 * 1024
+# Espaços e a vírgula entre dois objetos do array
+_SEPARADOR_JSON = re.compile(r"\s*,?\s*")
+
+
+def _ler_array_json(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Percorre um array JSON (`[{...}, {...}]`) objeto a objeto, sem carregar o arquivo inteiro."""
+    decodificador = json.JSONDecoder()
+    buffer = f.read(_TAMANHO_BLOCO_JSON).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Arquivo JSON deve conter uma lista de colheitas.")
+    indice = 1
+    fim_arquivo = False
+    while True:
+        indice = _SEPARADOR_JSON.match(buffer, indice).end()
+        if buffer.startswith("]", indice):
+            return
+        try:
+            objeto, fim_objeto = decodificador.raw_decode(buffer, indice)
+        except json.JSONDecodeError:
+            # Objeto incompleto no buffer: lê mais um bloco (ou falha se o arquivo acabou).
+            # Só aqui o trecho já lido é descartado, para não copiar o buffer a cada objeto.
+            if fim_arquivo:
+                raise
+            bloco = f.read(_TAMANHO_BLOCO_JSON)
+            fim_arquivo = not bloco
+            buffer = buffer[indice:] + bloco
+            indice = 0
+            continue
+        yield objeto
+        indice = fim_objeto
+
+
+def ler_registros(caminho: str) -> Iterator[Dict[str, Any]]:
+    """Lê os registros de um arquivo de colheitas como fluxo, de acordo com a extensão (.json, .jsonl ou .csv)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if extensao == ".csv":
+            yield from csv.DictReader(f)
+        elif extensao in (".jsonl", ".ndjson"):
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        elif extensao == ".json":
+            yield from _ler_array_json(f)
+        else:
+            raise ValueError(f"Formato de arquivo não suportado: {extensao or 'sem extensão'}")
+
+
+def _valor(registro: Dict[str, Any], chave: str) -> Any:
+    """Retorna o valor do campo, tratando células vazias do CSV como ausentes."""
+    valor = registro.get(chave)
+    return None if valor == "" else valor
+
+
+def preparar_registros(registros: Iterator[Dict[str, Any]],
+                       rejeitados: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+    """Valida cada registro e calcula os campos derivados; registros inválidos vão para `rejeitados`."""
+    for numero, registro in enumerate(registros, start=1):
+        try:
+            yield montar_colheita(
+                _valor(registro, "talhao"),
+                _valor(registro, "area"),
+                _valor(registro, "tipo_colheita"),
+                _valor(registro, "producao"),
+                _valor(registro, "perda"),
+                preco_tonelada=_valor(registro, "preco_tonelada"),
+                prejuizo=_valor(registro, "prejuizo"),
+            )
+        except (ValueError, TypeError) as erro:
+            rejeitados.append((numero, str(erro)))
+
+
+def carregar_arquivo(caminho: str, tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, Any]:
+    """Carrega um arquivo de colheitas no Oracle em lotes e retorna o resumo da carga."""
+    rejeitados: List[Tuple[int, str]] = []
+    inicio = time.perf_counter()
+    resumo = salvar_colheitas_lote_oracle(preparar_registros(ler_registros(caminho), rejeitados), tamanho_lote)
+    duracao = time.perf_counter() - inicio
+
+    resumo["rejeitados_validacao"] = rejeitados
+    resumo["duracao_s"] = duracao
+    resumo["registros_por_s"] = resumo["inseridos"] / duracao if duracao > 0 else 0.0
+    logging.info("Carga de %s concluída: %d inseridos, %d inválidos, %d recusados pelo Oracle em %.2fs (%.0f registros/s).",
+                 caminho, resumo["inseridos"], len(rejeitados), len(resumo["erros"]), duracao, resumo["registros_por_s"])
+    return resumo
+
+
+def exibir_resumo_carga(resumo: Dict[str, Any]) -> None:
+    """Exibe no console o resumo de uma carga em lote."""
+    print(f"\n✅ {resumo['inseridos']} colheitas inseridas em {resumo['lotes']} lote(s) "
+          f"({resumo['duracao_s']:.2f}s, {resumo['registros_por_s']:.0f} registros/s).")
+    if resumo["alertas"]:
+        print(f"🚨 {resumo['alertas']} colheitas da carga dispararam alertas (veja a opção 6 do menu).")
+    for numero, mensagem in resumo["rejeitados_validacao"]:
+        print(f"  ❌ Registro {numero} inválido: {mensagem}")
+    for _, colheita, mensagem in resumo["erros"]:
+        print(f"  ❌ Talhão {colheita.get('talhao')} recusado pelo Oracle: {mensagem}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler("gestao_colheita.log"), logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="Carga em lote de colheitas (JSON, JSON Lines ou CSV) no Oracle.")
+    parser.add_argument("arquivo", help="Arquivo de colheitas (.json, .jsonl ou .csv)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help=f"Registros por lote (padrão: {TAMANHO_LOTE})")
+    args = parser.parse_args()
+    try:
+        exibir_resumo_carga(carregar_arquivo(args.arquivo, args.lote))
+    finally:
+        fechar_pool()
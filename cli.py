@@ -0,0 +1,287 @@
+# Arquivo: cli.py
+# Linha de comando não interativa: gera os relatórios a partir de uma única leitura dos dados
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from funcoes import (
+    gerar_relatorio_txt,
+    salvar_json,
+    salvar_colunar,
+    carregar_colunar,
+    gerar_relatorio_estatistico,
+    alertar_colheitas_ineficientes,
+    LIMITE_PRODUTIVIDADE,
+    LIMITE_PREJUIZO
+)
+from metricas import instalar_sinal_snapshot
+
+if TYPE_CHECKING:
+    from colunar import ColheitasColunares
+
+# Códigos de saída (para uso em cron/scripts)
+SAIDA_OK = 0
+SAIDA_FALHA_ETAPA = 1   # Alguma etapa (arquivo, estatística, alerta) falhou
+SAIDA_USO = 2           # Argumentos inválidos (padrão do argparse)
+SAIDA_SEM_DADOS = 3     # Nenhuma colheita lida (tabela ou arquivo vazio)
+SAIDA_ALERTAS = 4       # Com --falhar-com-alertas: há colheitas em situação crítica
+SAIDA_SEM_CONEXAO = 5   # Oracle indisponível (falha de conexão ou de consulta)
+
+# Campos numéricos das colheitas (no CSV chegam como texto)
+_CAMPOS_NUMERICOS = ("area", "producao", "perda", "produtividade", "prejuizo")
+
+
+def _converter_registro(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro lido de JSON/JSONL/CSV com os tipos do Oracle: números em float, `id` em int e `data_coleta` em datetime."""
+    colheita = {chave: None if valor == "" else valor for chave, valor in registro.items()} # Célula vazia do CSV
+    for campo in _CAMPOS_NUMERICOS:
+        if isinstance(colheita.get(campo), str):
+            colheita[campo] = float(colheita[campo])
+    if isinstance(colheita.get("id"), str):
+        colheita["id"] = int(colheita["id"])
+    if isinstance(colheita.get("data_coleta"), str): # Texto ISO, como gravado por salvar_json
+        colheita["data_coleta"] = datetime.fromisoformat(colheita["data_coleta"])
+    return colheita
+
+
+def _carregar_dados(entrada: Optional[str]) -> Union[List[Dict[str, Any]], "ColheitasColunares", None]:
+    """Lê as colheitas uma única vez: do Oracle ou, com --entrada, de um arquivo JSON/JSONL/CSV ou colunar (.colh).
+
+    Retorna None se o Oracle estiver indisponível.
+    """
+    if entrada and entrada.endswith(".colh"):
+        # Mapeado em memória: estatísticas e alertas rodam vetorizados direto sobre o arquivo
+        colheitas = carregar_colunar(entrada)
+        return colheitas if colheitas is not None else []
+    if entrada:
+        from carga import ler_registros
+        return [_converter_registro(registro) for registro in ler_registros(entrada)]
+    from oracle import buscar_colheitas_oracle
+    return buscar_colheitas_oracle()
+
+
+def _etapas(args: argparse.Namespace, colheitas: Union[List[Dict[str, Any]], "ColheitasColunares"]) -> Dict[str, Tuple[Callable, tuple]]:
+    """Monta as etapas pedidas na linha de comando: nome -> (função, argumentos)."""
+    etapas: Dict[str, Tuple[Callable, tuple]] = {}
+    if args.txt:
+        etapas["txt"] = (gerar_relatorio_txt, (colheitas, args.arquivo_txt))
+    if args.json:
+        formato = "jsonl" if args.jsonl else "json"
+        etapas["json"] = (salvar_json, (colheitas, args.arquivo_json, formato, args.gzip))
+    if args.colunar:
+        etapas["colunar"] = (salvar_colunar, (colheitas, args.arquivo_colunar))
+    if args.stats:
+        etapas["estatisticas"] = (gerar_relatorio_estatistico, (colheitas, args.agrupar_por))
+    if args.alerts:
+        etapas["alertas"] = (alertar_colheitas_ineficientes, (colheitas,))
+    return etapas
+
+
+def _executar_etapa(funcao: Callable, argumentos: tuple) -> Tuple[Any, float]:
+    """Executa uma etapa e mede sua duração (roda na thread/processo do pool)."""
+    inicio = time.perf_counter()
+    resultado = funcao(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+
+def comando_relatorio(args: argparse.Namespace) -> int:
+    """Lê os dados uma vez e gera, em paralelo, os relatórios pedidos."""
+    if not (args.txt or args.json or args.colunar or args.stats or args.alerts):
+        args.txt = args.json = args.stats = args.alerts = True # Sem flags: gera tudo (menos o .colh, que é opcional)
+
+    tempos: List[Tuple[str, float, str]] = []
+    inicio_total = time.perf_counter()
+    try:
+        colheitas = _carregar_dados(args.entrada)
+    except (OSError, ValueError) as e: # Arquivo de entrada ausente ou com valores inválidos
+        logging.error("Falha ao ler %s: %s", args.entrada, e, exc_info=True)
+        print(f"❌ Não foi possível ler {args.entrada}: {e}", file=sys.stderr)
+        return SAIDA_FALHA_ETAPA
+    if colheitas is None:
+        print("❌ Oracle indisponível: nenhuma colheita lida (veja o log).", file=sys.stderr)
+        return SAIDA_SEM_CONEXAO
+    tempos.append(("leitura", time.perf_counter() - inicio_total, f"{len(colheitas)} colheitas"))
+    if not colheitas:
+        print("ℹ️ Nenhuma colheita encontrada para gerar relatórios.", file=sys.stderr)
+        _exibir_tempos(tempos, time.perf_counter() - inicio_total)
+        return SAIDA_SEM_DADOS
+
+    etapas = _etapas(args, colheitas)
+    codigo = SAIDA_OK
+    executor: Executor = ProcessPoolExecutor(args.trabalhadores) if args.processos else ThreadPoolExecutor(args.trabalhadores)
+    with executor:
+        futuros = {nome: executor.submit(_executar_etapa, funcao, argumentos) for nome, (funcao, argumentos) in etapas.items()}
+        for nome, futuro in futuros.items():
+            try:
+                resultado, duracao = futuro.result()
+            except Exception as e:
+                logging.error("Etapa '%s' falhou: %s", nome, e, exc_info=True)
+                tempos.append((nome, 0.0, f"erro: {e}"))
+                codigo = SAIDA_FALHA_ETAPA
+                continue
+
+            if nome in ("txt", "json", "colunar"):
+                detalhe = {"txt": args.arquivo_txt, "json": args.arquivo_json, "colunar": args.arquivo_colunar}[nome]
+                if not resultado:
+                    codigo = SAIDA_FALHA_ETAPA
+                    detalhe = f"falha ao gravar {detalhe}"
+            elif nome == "estatisticas":
+                _exibir_estatisticas(resultado, args.agrupar_por)
+                detalhe = f"{len(resultado or {})} grupos"
+            else:
+                _exibir_alertas(resultado)
+                detalhe = f"{len(resultado)} alertas"
+                if resultado and args.falhar_com_alertas and codigo == SAIDA_OK:
+                    codigo = SAIDA_ALERTAS
+            tempos.append((nome, duracao, detalhe))
+
+    _exibir_tempos(tempos, time.perf_counter() - inicio_total)
+    return codigo
+
+
+def _exibir_estatisticas(estatisticas: Optional[Dict[str, Dict[str, float]]], agrupar_por: str) -> None:
+    print(f"\n📊 Estatísticas de produtividade (t/ha) por {agrupar_por.replace('_', ' ')}:")
+    for grupo, dados in (estatisticas or {}).items():
+        if dados["registros"] > 0:
+            print(f"  - {grupo}: Média {dados['media_produtividade']:.2f} | Mediana {dados['mediana_produtividade']:.2f} | "
+                  f"P10 {dados['p10_produtividade']:.2f} | P90 {dados['p90_produtividade']:.2f} ({dados['registros']} registros)")
+        else:
+            print(f"  - {grupo}: Sem registros.")
+
+
+def _exibir_alertas(alertas: List[Dict[str, Any]]) -> None:
+    from regras import ARQUIVO_REGRAS
+    print(f"\n🚨 {len(alertas)} colheitas em alerta pelas regras de {ARQUIVO_REGRAS} "
+          f"(padrão: Produtividade < {LIMITE_PRODUTIVIDADE:.2f} t/ha e Prejuízo > R$ {LIMITE_PREJUIZO:.2f})")
+    for c in alertas:
+        print(f"  - ID {c.get('id', 'N/A')} | Talhão {c.get('talhao', '')} | "
+              f"Produt.: {c.get('produtividade', 0):.2f} t/ha | Prejuízo: R$ {c.get('prejuizo', 0):.2f}")
+
+
+def _exibir_tempos(tempos: List[Tuple[str, float, str]], total: float) -> None:
+    print("\n⏱️ Tempo por etapa:")
+    for nome, duracao, detalhe in tempos:
+        print(f"  {nome:<14} {duracao * 1000:>10.1f} ms  {detalhe}")
+    print(f"  {'total':<14} {total * 1000:>10.1f} ms")
+
+
+def comando_reconciliar_resumo(args: argparse.Namespace) -> int:
+    """Reconstrói a tabela de resumo RESUMO_COLHEITA a partir de COLHEITA_CANA."""
+    from oracle import reconciliar_resumo_oracle
+    inicio = time.perf_counter()
+    linhas = reconciliar_resumo_oracle()
+    if linhas is None:
+        return SAIDA_FALHA_ETAPA
+    print(f"✅ Resumo reconstruído: {linhas} linhas em {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+    return SAIDA_OK
+
+
+def comando_reavaliar_alertas(args: argparse.Namespace) -> int:
+    """Refaz os alertas abertos de ALERTA_COLHEITA com as regras atuais de regras_alerta.json."""
+    from oracle import reavaliar_alertas_oracle
+    inicio = time.perf_counter()
+    resumo = reavaliar_alertas_oracle()
+    if resumo is None:
+        return SAIDA_FALHA_ETAPA
+    print(f"✅ Alertas reavaliados: {resumo['removidos']} abertos descartados, {resumo['registrados']} registrados "
+          f"em {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+    return SAIDA_OK
+
+
+def comando_exportar_incremental(args: argparse.Namespace) -> int:
+    """Exporta só as colheitas novas desde a última execução (e, com --compactar, junta os deltas)."""
+    import exportacao
+    from oracle import oracledb # Driver importado só se for preciso avaliar o except abaixo
+    inicio = time.perf_counter()
+    try:
+        if args.compactar:
+            resumo = exportacao.compactar(args.pasta, txt=not args.sem_txt)
+            if resumo["deltas"]:
+                print(f"✅ {resumo['deltas']} deltas compactados ({resumo['linhas']} colheitas no retrato completo).")
+            else:
+                print("ℹ️ Nenhum delta pendente para compactar.")
+            return SAIDA_OK
+        resumo = exportacao.exportar_incremental(args.pasta, txt=not args.sem_txt, compactar_apos=args.compactar_apos)
+    except OSError as e:
+        logging.error("Exportação incremental falhou: %s", e, exc_info=True)
+        print(f"❌ Exportação incremental falhou: {e}", file=sys.stderr)
+        return SAIDA_FALHA_ETAPA
+    except oracledb.Error as e: # Falha no meio da leitura: o delta não é gravado nem a marca avança
+        logging.error("Exportação incremental interrompida pelo Oracle: %s", e, exc_info=True)
+        print(f"❌ Exportação incremental interrompida pelo Oracle: {e}", file=sys.stderr)
+        return SAIDA_FALHA_ETAPA
+    if resumo["linhas"]:
+        print(f"✅ {resumo['linhas']} colheitas novas no delta {resumo['sequencia']}: {', '.join(resumo['arquivos'])}")
+    else:
+        print("ℹ️ Nenhuma colheita nova desde a última exportação.")
+    if resumo["compactacao"]:
+        print(f"✅ {resumo['compactacao']['deltas']} deltas compactados no retrato completo.")
+    print(f"⏱️ {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return SAIDA_OK
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Sistema de Gestão de Colheita - execução não interativa.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    relatorio = subcomandos.add_parser("report", aliases=["relatorio"],
+                                       help="Gera relatórios a partir de uma única leitura dos dados")
+    relatorio.add_argument("--txt", action="store_true", help="Gera o relatório .txt")
+    relatorio.add_argument("--json", action="store_true", help="Exporta os dados em JSON")
+    relatorio.add_argument("--colunar", action="store_true", help="Exporta os dados no formato colunar binário (.colh)")
+    relatorio.add_argument("--stats", action="store_true", help="Exibe as estatísticas de produtividade")
+    relatorio.add_argument("--alerts", action="store_true", help="Exibe as colheitas ineficientes")
+    relatorio.add_argument("--agrupar-por", choices=["tipo_colheita", "talhao", "mes"], default="tipo_colheita")
+    relatorio.add_argument("--arquivo-txt", default="relatorio_colheita.txt")
+    relatorio.add_argument("--arquivo-json", default="dados_colheita.json")
+    relatorio.add_argument("--arquivo-colunar", default="dados_colheita.colh")
+    relatorio.add_argument("--jsonl", action="store_true", help="Exporta em JSON Lines")
+    relatorio.add_argument("--gzip", action="store_true", help="Compacta a exportação JSON")
+    relatorio.add_argument("--entrada", help="Lê as colheitas de um arquivo (.json/.jsonl/.csv/.colh) em vez do Oracle")
+    relatorio.add_argument("--processos", action="store_true", help="Usa processos em vez de threads")
+    relatorio.add_argument("--trabalhadores", type=int, default=4, help="Tamanho do pool de execução (padrão: 4)")
+    relatorio.add_argument("--falhar-com-alertas", action="store_true",
+                           help=f"Sai com código {SAIDA_ALERTAS} se houver colheitas em situação crítica")
+    relatorio.set_defaults(executar=comando_relatorio)
+
+    reconciliar = subcomandos.add_parser("reconciliar-resumo",
+                                         help="Reconstrói a tabela RESUMO_COLHEITA a partir de COLHEITA_CANA")
+    reconciliar.set_defaults(executar=comando_reconciliar_resumo)
+
+    reavaliar = subcomandos.add_parser("reavaliar-alertas",
+                                       help="Refaz os alertas abertos de ALERTA_COLHEITA com as regras atuais")
+    reavaliar.set_defaults(executar=comando_reavaliar_alertas)
+
+    from exportacao import PASTA_EXPORTACAO, COMPACTAR_APOS
+    incremental = subcomandos.add_parser("exportar-incremental",
+                                         help="Exporta (JSON Lines e TXT) só as colheitas novas desde a última execução")
+    incremental.add_argument("--pasta", default=PASTA_EXPORTACAO, help=f"Pasta da exportação (padrão: {PASTA_EXPORTACAO})")
+    incremental.add_argument("--sem-txt", action="store_true", help="Não gera o relatório .txt")
+    incremental.add_argument("--compactar", action="store_true",
+                             help="Só junta os deltas pendentes no retrato completo (não consulta o Oracle)")
+    incremental.add_argument("--compactar-apos", type=int, default=COMPACTAR_APOS,
+                             help=f"Compacta ao acumular N deltas (0 desativa; padrão: {COMPACTAR_APOS})")
+    incremental.set_defaults(executar=comando_exportar_incremental)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler("gestao_colheita.log")])
+    args = criar_parser().parse_args(argv)
+    instalar_sinal_snapshot() # `kill -USR1 <pid>` grava o retrato das métricas durante a execução
+    try:
+        return args.executar(args)
+    finally:
+        if not getattr(args, "entrada", None) and not getattr(args, "compactar", False):
+            from oracle import fechar_pool
+            fechar_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
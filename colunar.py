@@ -0,0 +1,349 @@
+# Arquivo: colunar.py
+# Conjunto de colheitas em formato colunar (arrays NumPy) para análises vetorizadas
+
+import json
+import logging
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+# Colunas numéricas guardadas como float64 (valores ausentes viram NaN)
+COLUNAS_NUMERICAS = ("area", "producao", "perda", "produtividade", "prejuizo")
+
+# Linhas convertidas por vez ao montar os arrays a partir de um cursor ou iterável
+TAMANHO_BLOCO = 50_000
+
+# Arquivo colunar (.colh), todos os inteiros em little-endian:
+#   bytes 0-7   assinatura b"COLHEITA"
+#   bytes 8-11  versão do formato (uint32)
+#   bytes 12-15 tamanho do cabeçalho JSON (uint32)
+#   bytes 16-   cabeçalho JSON (UTF-8): {"linhas", "talhoes", "tipos", "colunas": {nome: {"tipo", "inicio"}}}
+#   depois, alinhadas em 64 bytes, as colunas em sequência, cada uma como array contíguo do tipo indicado;
+#   "inicio" é a posição da coluna contada a partir do fim do cabeçalho (já alinhado).
+ASSINATURA_ARQUIVO = b"COLHEITA"
+VERSAO_ARQUIVO = 1
+_ALINHAMENTO = 64
+_TIPOS_ARQUIVO = {
+    "id": "<i8", "area": "<f8", "producao": "<f8", "perda": "<f8", "produtividade": "<f8", "prejuizo": "<f8",
+    "data_coleta": "<M8[s]", "talhao_codigos": "<i4", "tipo_codigos": "<i2",
+}
+
+
+class _Dicionario:
+    """Codifica valores repetidos (talhão, tipo) como inteiros, guardando cada texto uma única vez."""
+
+    def __init__(self, tipo_codigo: Any):
+        self.valores: List[Optional[str]] = []
+        self._codigos: Dict[Optional[str], int] = {}
+        self._maximo = np.iinfo(tipo_codigo).max # Códigos acima disso não cabem na coluna
+
+    def codificar(self, valor: Optional[str]) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            if len(self.valores) > self._maximo:
+                raise ValueError(f"Mais de {self._maximo + 1} valores distintos para codificar na coluna colunar.")
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+
+class ColheitasColunares:
+    """Colheitas armazenadas por coluna: arrays tipados em vez de uma lista de dicionários.
+
+    Talhão e tipo de colheita são codificados por dicionário (`talhao_codigos` indexa `talhoes`,
+    `tipo_codigos` indexa `tipos`). Datas ficam em `datetime64[s]` (NaT quando ausentes).
+    """
+
+    def __init__(self, colunas: Dict[str, np.ndarray], talhoes: List[Optional[str]], tipos: List[Optional[str]]):
+        self.id: np.ndarray = colunas["id"]
+        self.area: np.ndarray = colunas["area"]
+        self.producao: np.ndarray = colunas["producao"]
+        self.perda: np.ndarray = colunas["perda"]
+        self.produtividade: np.ndarray = colunas["produtividade"]
+        self.prejuizo: np.ndarray = colunas["prejuizo"]
+        self.data_coleta: np.ndarray = colunas["data_coleta"]
+        self.talhao_codigos: np.ndarray = colunas["talhao_codigos"]
+        self.tipo_codigos: np.ndarray = colunas["tipo_codigos"]
+        self.talhoes = talhoes
+        self.tipos = tipos
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Percorre as colheitas como dicionários (para os geradores de arquivo e relatórios)."""
+        for inicio in range(0, len(self), TAMANHO_BLOCO):
+            yield from self.registros(slice(inicio, inicio + TAMANHO_BLOCO))
+
+    @classmethod
+    def de_registros(cls, colheitas: Iterable[Dict[str, Any]], tamanho_bloco: int = TAMANHO_BLOCO) -> "ColheitasColunares":
+        """Monta o conjunto colunar a partir de dicionários de colheita (Oracle ou JSON), bloco a bloco."""
+        talhoes, tipos = _Dicionario(np.int32), _Dicionario(np.int16)
+        blocos: Dict[str, List[np.ndarray]] = {nome: [] for nome in _NOMES_COLUNAS}
+        bloco: List[Dict[str, Any]] = []
+        for colheita in colheitas:
+            bloco.append(colheita)
+            if len(bloco) >= tamanho_bloco:
+                _converter_bloco(bloco, blocos, talhoes, tipos)
+                bloco = []
+        if bloco:
+            _converter_bloco(bloco, blocos, talhoes, tipos)
+        return cls(_concatenar(blocos), talhoes.valores, tipos.valores)
+
+    @classmethod
+    def de_cursor(cls, cursor: Any, tamanho_bloco: int = TAMANHO_BLOCO) -> "ColheitasColunares":
+        """Monta o conjunto colunar a partir de um cursor já executado, lendo `fetchmany` em blocos."""
+        colunas = [col[0].lower() for col in cursor.description]
+
+        def linhas():
+            while True:
+                bloco = cursor.fetchmany(tamanho_bloco)
+                if not bloco:
+                    return
+                for row in bloco:
+                    yield dict(zip(colunas, row))
+
+        return cls.de_registros(linhas(), tamanho_bloco)
+
+    @classmethod
+    def de_json(cls, caminho: str, tamanho_bloco: int = TAMANHO_BLOCO) -> "ColheitasColunares":
+        """Monta o conjunto colunar lendo um arquivo de colheitas (.json, .jsonl ou .csv) como fluxo."""
+        from carga import ler_registros # Importação local: leitura em fluxo compartilhada com a carga em lote
+        return cls.de_registros(ler_registros(caminho), tamanho_bloco)
+
+    @classmethod
+    def de_arquivo(cls, caminho: str) -> "ColheitasColunares":
+        """Abre um arquivo colunar (.colh) com as colunas mapeadas em memória (`np.memmap`).
+
+        Nada é lido de imediato: o sistema operacional traz do disco só as partes das colunas usadas.
+        """
+        with open(caminho, "rb") as f:
+            inicio = f.read(16)
+            if len(inicio) < 16 or inicio[:8] != ASSINATURA_ARQUIVO:
+                raise ValueError(f"{caminho} não é um arquivo colunar de colheitas.")
+            _, versao, tamanho = struct.unpack("<8sII", inicio)
+            if versao != VERSAO_ARQUIVO:
+                raise ValueError(f"Versão {versao} do arquivo colunar não suportada (esperada {VERSAO_ARQUIVO}).")
+            cabecalho = json.loads(f.read(tamanho).decode("utf-8"))
+        inicio_dados = _alinhar(16 + tamanho)
+        linhas = cabecalho["linhas"]
+        colunas = {}
+        for nome, coluna in cabecalho["colunas"].items():
+            if linhas:
+                colunas[nome] = np.memmap(caminho, dtype=coluna["tipo"], mode="r",
+                                          offset=inicio_dados + coluna["inicio"], shape=(linhas,))
+            else:
+                colunas[nome] = np.array([], dtype=coluna["tipo"]) # memmap não aceita tamanho zero
+        return cls(colunas, cabecalho["talhoes"], cabecalho["tipos"])
+
+    def registro(self, indice: int) -> Dict[str, Any]:
+        """Reconstrói a colheita da posição `indice` como dicionário (mesmas chaves do Oracle)."""
+        return self.registros(slice(indice, indice + 1))[0]
+
+    def registros(self, indices: Union[slice, np.ndarray]) -> List[Dict[str, Any]]:
+        """Reconstrói as colheitas selecionadas (fatia ou array de posições) como dicionários.
+
+        Cada coluna é convertida de uma vez com `.tolist()`, sem indexar escalares NumPy linha a linha.
+        """
+        talhoes, tipos = self.talhoes, self.tipos
+        numericas = []
+        for nome in COLUNAS_NUMERICAS:
+            valores = getattr(self, nome)[indices]
+            lista = valores.tolist()
+            if np.isnan(valores).any(): # NaN vira None (só percorre a coluna se houver ausentes)
+                lista = [None if v != v else v for v in lista]
+            numericas.append(lista)
+        # Dicionário literal por linha, nas chaves e na ordem de registro.CAMPOS_COLHEITA (as do Oracle),
+        # para que exportações de um .colh saiam iguais às do banco: bem mais rápido que dict(zip(...))
+        return [{"id": None if i < 0 else i, "talhao": talhoes[t], "area": a, "tipo_colheita": tipos[tp],
+                 "producao": pc, "perda": pe, "produtividade": pd, "prejuizo": pj, "data_coleta": d}
+                for i, t, tp, d, a, pc, pe, pd, pj in zip(
+                    self.id[indices].tolist(), self.talhao_codigos[indices].tolist(), self.tipo_codigos[indices].tolist(),
+                    self.data_coleta[indices].astype(object).tolist(), *numericas)] # NaT vira None
+
+    def estatisticas(self, agrupar_por: str, tipos_validos: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """Versão vetorizada de `funcoes._estatisticas_em_memoria` (mesmos grupos, campos e arredondamento)."""
+        if agrupar_por == "mes":
+            meses = self.data_coleta.astype("datetime64[M]")
+            rotulos = np.where(np.isnat(meses), "N/A", meses.astype(str))
+            nomes, codigos = np.unique(rotulos, return_inverse=True)
+            nomes = [str(n) for n in nomes]
+        elif agrupar_por == "talhao":
+            nomes, codigos = self.talhoes, self.talhao_codigos
+        else:
+            nomes, codigos = self.tipos, self.tipo_codigos
+        codigos = np.asarray(codigos, dtype=np.int64).ravel()
+        quantidade_grupos = len(nomes)
+
+        # Totais por grupo em uma única passada (ausentes contam como zero, como no cálculo em memória)
+        totais = {nome: np.bincount(codigos, weights=np.nan_to_num(getattr(self, nome)), minlength=quantidade_grupos)
+                  for nome in ("producao", "perda", "prejuizo")}
+
+        # Ordena por (grupo, produtividade) para ler cada grupo como uma fatia já ordenada
+        validos = ~np.isnan(self.produtividade)
+        codigos_validos = codigos[validos]
+        produtividades = self.produtividade[validos]
+        ordem = np.lexsort((produtividades, codigos_validos))
+        produtividades = produtividades[ordem]
+        registros = np.bincount(codigos_validos, minlength=quantidade_grupos)
+        inicios = np.concatenate(([0], np.cumsum(registros)))
+
+        validos_tipo = set(tipos_validos)
+        resultado: Dict[str, Dict[str, float]] = {}
+        for codigo in sorted(range(quantidade_grupos), key=lambda c: str(nomes[c])):
+            grupo = nomes[codigo]
+            if grupo is None or (agrupar_por == "tipo_colheita" and grupo not in validos_tipo):
+                continue
+            fatia = produtividades[inicios[codigo]:inicios[codigo + 1]]
+            if len(fatia):
+                p10, mediana, p90 = np.percentile(fatia, [10, 50, 90]) # Interpolação linear = PERCENTILE_CONT
+                resultado[grupo] = {
+                    "registros": int(len(fatia)),
+                    "media_produtividade": round(float(fatia.mean()), 2),
+                    "min_produtividade": round(float(fatia[0]), 2),
+                    "max_produtividade": round(float(fatia[-1]), 2),
+                    "mediana_produtividade": round(float(mediana), 2),
+                    "p10_produtividade": round(float(p10), 2),
+                    "p90_produtividade": round(float(p90), 2),
+                }
+            else:
+                resultado[grupo] = {"media_produtividade": 0.0, "registros": 0}
+            resultado[grupo].update({
+                "total_producao": round(float(totais["producao"][codigo]), 2),
+                "total_perda": round(float(totais["perda"][codigo]), 2),
+                "total_prejuizo": round(float(totais["prejuizo"][codigo]), 2),
+            })
+        return resultado
+
+    def alertas(self, limite_produtividade: Union[float, np.ndarray],
+                limite_prejuizo: Union[float, np.ndarray]) -> List[Dict[str, Any]]:
+        """Versão vetorizada do filtro de alertas; só as colheitas selecionadas viram dicionários.
+
+        Os limites podem ser únicos ou um por colheita (arrays do tamanho do conjunto).
+        """
+        # Valores ausentes (NaN) nunca disparam, como em `regras.RegrasAlerta.avaliar` e no SQL
+        mascara = (self.produtividade < limite_produtividade) & (self.prejuizo > limite_prejuizo)
+        indices = np.flatnonzero(mascara)
+        logging.info("Filtro vetorizado de alertas selecionou %d de %d colheitas.", len(indices), len(self))
+        return self.registros(indices)
+
+    def alertas_por_regras(self, regras: Any) -> List[Dict[str, Any]]:
+        """Filtro de alertas com a regra de cada combinação de talhão e tipo (`regras.RegrasAlerta`)."""
+        # Uma consulta às regras por combinação do dicionário, expandida para as colheitas pelos códigos
+        tabela = np.array([[regras.limites(talhao, tipo)[1:] for tipo in self.tipos] for talhao in self.talhoes],
+                          dtype=np.float64).reshape(len(self.talhoes), len(self.tipos), 2)
+        limites = tabela[self.talhao_codigos, self.tipo_codigos]
+        return self.alertas(limites[:, 0], limites[:, 1])
+
+
+_NOMES_COLUNAS = ("id",) + COLUNAS_NUMERICAS + ("data_coleta", "talhao_codigos", "tipo_codigos")
+
+
+def _alinhar(posicao: int) -> int:
+    """Arredonda a posição para o próximo múltiplo de `_ALINHAMENTO`."""
+    return -(-posicao // _ALINHAMENTO) * _ALINHAMENTO
+
+
+def _blocos_colunares(colheitas: Union[Iterable[Dict[str, Any]], ColheitasColunares], tamanho_bloco: int,
+                      talhoes: _Dicionario, tipos: _Dicionario) -> Iterator[Dict[str, np.ndarray]]:
+    """Percorre as colheitas em blocos já convertidos em arrays (com talhão/tipo codificados em `talhoes`/`tipos`)."""
+    if isinstance(colheitas, ColheitasColunares):
+        # Recodifica pelos dicionários do arquivo (os códigos do conjunto de origem podem ter outra ordem)
+        mapa_talhoes = np.array([talhoes.codificar(t) for t in colheitas.talhoes], dtype=np.int32)
+        mapa_tipos = np.array([tipos.codificar(t) for t in colheitas.tipos], dtype=np.int16)
+        for inicio in range(0, len(colheitas), tamanho_bloco):
+            fatia = slice(inicio, inicio + tamanho_bloco)
+            bloco = {nome: getattr(colheitas, nome)[fatia] for nome in ("id",) + COLUNAS_NUMERICAS + ("data_coleta",)}
+            bloco["talhao_codigos"] = mapa_talhoes[colheitas.talhao_codigos[fatia]]
+            bloco["tipo_codigos"] = mapa_tipos[colheitas.tipo_codigos[fatia]]
+            yield bloco
+        return
+    pendentes: List[Dict[str, Any]] = []
+    for colheita in colheitas:
+        pendentes.append(colheita)
+        if len(pendentes) >= tamanho_bloco:
+            yield _bloco_em_arrays(pendentes, talhoes, tipos)
+            pendentes = []
+    if pendentes:
+        yield _bloco_em_arrays(pendentes, talhoes, tipos)
+
+
+def _bloco_em_arrays(bloco: List[Dict[str, Any]], talhoes: _Dicionario, tipos: _Dicionario) -> Dict[str, np.ndarray]:
+    """Converte um bloco de dicionários em um array por coluna."""
+    blocos: Dict[str, List[np.ndarray]] = {nome: [] for nome in _NOMES_COLUNAS}
+    _converter_bloco(bloco, blocos, talhoes, tipos)
+    return {nome: partes[0] for nome, partes in blocos.items()}
+
+
+def salvar_arquivo_colunar(colheitas: Union[Iterable[Dict[str, Any]], ColheitasColunares], caminho: str,
+                           tamanho_bloco: int = TAMANHO_BLOCO) -> int:
+    """Grava as colheitas no formato colunar (.colh) e retorna a quantidade de linhas gravadas.
+
+    Aceita qualquer iterável de dicionários (inclusive o gerador paginado do Oracle) ou um `ColheitasColunares`.
+    Cada coluna é acumulada em um arquivo temporário, bloco a bloco, e o arquivo final é montado e
+    renomeado no fim: a memória usada é a de um bloco, e um arquivo anterior só é substituído se tudo der certo.
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    talhoes, tipos = _Dicionario(np.int32), _Dicionario(np.int16)
+    linhas = 0
+    with tempfile.TemporaryDirectory(prefix=".tmp_colunar_", dir=diretorio) as pasta:
+        partes = {nome: open(os.path.join(pasta, nome), "wb") for nome in _NOMES_COLUNAS}
+        try:
+            for bloco in _blocos_colunares(colheitas, tamanho_bloco, talhoes, tipos):
+                for nome, valores in bloco.items():
+                    partes[nome].write(np.ascontiguousarray(valores, dtype=_TIPOS_ARQUIVO[nome]).tobytes())
+                linhas += len(bloco["id"])
+        finally:
+            for parte in partes.values():
+                parte.close()
+
+        colunas, posicao = {}, 0
+        for nome in _NOMES_COLUNAS:
+            colunas[nome] = {"tipo": _TIPOS_ARQUIVO[nome], "inicio": posicao}
+            posicao = _alinhar(posicao + os.path.getsize(os.path.join(pasta, nome)))
+        cabecalho = json.dumps({"linhas": linhas, "talhoes": talhoes.valores, "tipos": tipos.valores,
+                                "colunas": colunas}, ensure_ascii=False).encode("utf-8")
+
+        temporario = os.path.join(pasta, "arquivo.colh")
+        with open(temporario, "wb") as f:
+            f.write(struct.pack("<8sII", ASSINATURA_ARQUIVO, VERSAO_ARQUIVO, len(cabecalho)))
+            f.write(cabecalho)
+            inicio_dados = _alinhar(f.tell())
+            for nome in _NOMES_COLUNAS:
+                f.write(b"\0" * (inicio_dados + colunas[nome]["inicio"] - f.tell())) # Preenchimento do alinhamento
+                with open(os.path.join(pasta, nome), "rb") as parte:
+                    while True:
+                        dados = parte.read(1024 * 1024)
+                        if not dados:
+                            break
+                        f.write(dados)
+        os.replace(temporario, caminho) # Renomeação atômica: nunca deixa um arquivo pela metade
+    logging.info("Arquivo colunar %s gravado (%d linhas, %d talhões).", caminho, linhas, len(talhoes.valores))
+    return linhas
+
+
+def _numero(valor: Any) -> float:
+    """Converte o valor para float, usando NaN para ausentes."""
+    return np.nan if valor is None or valor == "" else float(valor)
+
+
+def _converter_bloco(bloco: List[Dict[str, Any]], blocos: Dict[str, List[np.ndarray]],
+                     talhoes: _Dicionario, tipos: _Dicionario) -> None:
+    """Converte um bloco de dicionários em arrays e os acrescenta às listas de blocos de cada coluna."""
+    blocos["id"].append(np.array([c.get("id") if c.get("id") is not None else -1 for c in bloco], dtype=np.int64))
+    for nome in COLUNAS_NUMERICAS:
+        blocos[nome].append(np.array([_numero(c.get(nome)) for c in bloco], dtype=np.float64))
+    # datetime do Oracle ou texto ISO do JSON; ausentes viram NaT
+    blocos["data_coleta"].append(np.array([c.get("data_coleta") or None for c in bloco], dtype="datetime64[s]"))
+    blocos["talhao_codigos"].append(np.array([talhoes.codificar(c.get("talhao")) for c in bloco], dtype=np.int32))
+    blocos["tipo_codigos"].append(np.array([tipos.codificar(c.get("tipo_colheita")) for c in bloco], dtype=np.int16))
+
+
+def _concatenar(blocos: Dict[str, List[np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Junta os blocos de cada coluna em um único array (arrays vazios quando não há linhas)."""
+    tipos_vazios = {"id": np.int64, "data_coleta": "datetime64[s]", "talhao_codigos": np.int32, "tipo_codigos": np.int16}
+    return {nome: np.concatenate(partes) if partes else np.array([], dtype=tipos_vazios.get(nome, np.float64))
+            for nome, partes in blocos.items()}
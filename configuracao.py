@@ -0,0 +1,22 @@
+# Arquivo: configuracao.py
+# Leitura do arquivo .env, feita uma única vez e antes de qualquer os.getenv dos demais módulos
+
+import os
+
+# .env procurado na pasta do projeto (mesmo lugar em que o load_dotenv o encontrava)
+ARQUIVO_ENV = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+
+def carregar_env(caminho: str = ARQUIVO_ENV) -> bool:
+    """Carrega as variáveis do .env em `os.environ` com o python-dotenv, sem sobrescrever as já definidas.
+
+    O python-dotenv só é importado se o arquivo existir. Retorna False se não houver .env.
+    """
+    if not os.path.isfile(caminho):
+        return False
+    from dotenv import load_dotenv # Importação local: sem .env, o início do programa não paga por ela
+    load_dotenv(caminho, override=False)
+    return True
+
+
+carregar_env()
@@ -7,5 +7,72 @@ CREATE TABLE COLHEITA_CANA (
     PERDA NUMBER NOT NULL CHECK (PERDA >= 0),
     PRODUTIVIDADE NUMBER, -- Calculado na aplicação antes de inserir
     PREJUIZO NUMBER,      -- Calculado na aplicação antes de inserir
-    DATA_COLETA DATE DEFAULT SYSDATE
+    DATA_COLETA DATE DEFAULT SYSDATE,
+    ID_ORIGEM VARCHAR2(36) CONSTRAINT UK_COLHEITA_ID_ORIGEM UNIQUE -- Identificador do diário local (evita duplicidade no reenvio)
 );
+
+-- MIGRAÇÃO OBRIGATÓRIA para bancos criados antes da coluna ID_ORIGEM (todo INSERT da aplicação grava
+-- ID_ORIGEM; sem a coluna, cadastros e cargas falham). Nesses bancos, execute apenas:
+-- ALTER TABLE COLHEITA_CANA ADD ID_ORIGEM VARCHAR2(36) CONSTRAINT UK_COLHEITA_ID_ORIGEM UNIQUE;
+
+-- Índice da consulta de alertas (PRODUTIVIDADE < limite AND PREJUIZO > limite)
+CREATE INDEX IDX_COLHEITA_PROD_PREJ ON COLHEITA_CANA (PRODUTIVIDADE, PREJUIZO);
+
+-- Índice das consultas filtradas por talhão e período
+CREATE INDEX IDX_COLHEITA_TALHAO_DATA ON COLHEITA_CANA (TALHAO, DATA_COLETA);
+
+-- Índice da paginação por chave (DATA_COLETA, ID): listagem paginada e exportação incremental
+CREATE INDEX IDX_COLHEITA_DATA_ID ON COLHEITA_CANA (DATA_COLETA, ID);
+
+-- Resumo mantido pela aplicação na mesma transação de cada INSERT em COLHEITA_CANA:
+-- uma linha por tipo de colheita, talhão e mês (AAAA-MM) com contagem, soma, mínimo e máximo.
+-- Pode ser reconstruído a qualquer momento com: python cli.py reconciliar-resumo
+-- MIGRAÇÃO OBRIGATÓRIA em bancos existentes: crie esta tabela e rode o comando acima. Todo INSERT
+-- da aplicação atualiza o resumo, então sem a tabela nenhuma colheita é gravada.
+CREATE TABLE RESUMO_COLHEITA (
+    TIPO_COLHEITA VARCHAR2(20) NOT NULL,
+    TALHAO VARCHAR2(10) NOT NULL,
+    MES VARCHAR2(7) NOT NULL,
+    REGISTROS NUMBER NOT NULL,
+    QTD_PRODUTIVIDADE NUMBER NOT NULL, -- Registros com produtividade preenchida (base da média)
+    SOMA_PRODUTIVIDADE NUMBER NOT NULL,
+    MIN_PRODUTIVIDADE NUMBER,
+    MAX_PRODUTIVIDADE NUMBER,
+    SOMA_PRODUCAO NUMBER NOT NULL,
+    MIN_PRODUCAO NUMBER,
+    MAX_PRODUCAO NUMBER,
+    SOMA_PERDA NUMBER NOT NULL,
+    MIN_PERDA NUMBER,
+    MAX_PERDA NUMBER,
+    SOMA_PREJUIZO NUMBER NOT NULL,
+    MIN_PREJUIZO NUMBER,
+    MAX_PREJUIZO NUMBER,
+    CONSTRAINT PK_RESUMO_COLHEITA PRIMARY KEY (TIPO_COLHEITA, TALHAO, MES)
+);
+
+-- Alertas gerados pela aplicação a cada INSERT em COLHEITA_CANA, na mesma transação, conforme as
+-- regras de regras_alerta.json (por tipo de colheita e por talhão). Os limites da regra que disparou
+-- ficam gravados junto. Após mudar as regras, refaça os alertas abertos com: python cli.py reavaliar-alertas
+-- MIGRAÇÃO OBRIGATÓRIA em bancos existentes: crie esta tabela e os dois índices abaixo. Sem ela, o
+-- INSERT falha apenas quando uma colheita dispara um alerta (a falta pode passar despercebida até lá).
+-- Em seguida rode python cli.py reavaliar-alertas, que gera os alertas do histórico já gravado.
+CREATE TABLE ALERTA_COLHEITA (
+    ID NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY PRIMARY KEY,
+    ID_COLHEITA NUMBER NOT NULL CONSTRAINT FK_ALERTA_COLHEITA REFERENCES COLHEITA_CANA (ID) ON DELETE CASCADE,
+    REGRA VARCHAR2(40) NOT NULL, -- padrao, tipo:<tipo> ou talhao:<talhão>
+    TALHAO VARCHAR2(10) NOT NULL,
+    TIPO_COLHEITA VARCHAR2(20) NOT NULL,
+    PRODUTIVIDADE NUMBER,
+    PREJUIZO NUMBER,
+    LIMITE_PRODUTIVIDADE NUMBER, -- NULL: a regra não limita a produtividade
+    LIMITE_PREJUIZO NUMBER,      -- NULL: a regra não limita o prejuízo
+    DATA_ALERTA DATE DEFAULT SYSDATE NOT NULL,
+    SITUACAO VARCHAR2(10) DEFAULT 'ABERTO' NOT NULL CHECK (SITUACAO IN ('ABERTO', 'RESOLVIDO')),
+    DATA_RESOLUCAO DATE
+);
+
+-- Índice da leitura dos alertas abertos (opção 6 do menu)
+CREATE INDEX IDX_ALERTA_SITUACAO_DATA ON ALERTA_COLHEITA (SITUACAO, DATA_ALERTA);
+
+-- Índice da chave estrangeira (exclusões em COLHEITA_CANA e reavaliação das regras)
+CREATE INDEX IDX_ALERTA_COLHEITA ON ALERTA_COLHEITA (ID_COLHEITA);
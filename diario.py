@@ -0,0 +1,319 @@
+# Arquivo: diario.py
+# Diário local (SQLite) de colheitas cadastradas, enviadas ao Oracle em segundo plano
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+from oracle import salvar_colheitas_lote_oracle, fechar_pool
+
+# Configurações do diário (valores padrão caso não definidos no .env)
+ARQUIVO_DIARIO = os.getenv("DIARIO_ARQUIVO", "diario_colheitas.db")
+TAMANHO_LOTE_DIARIO = int(os.getenv("DIARIO_TAMANHO_LOTE", 500))
+INTERVALO_ENVIO = float(os.getenv("DIARIO_INTERVALO", 5)) # Segundos entre verificações do descarregador
+ESPERA_INICIAL = 2.0 # Primeira espera (s) após uma falha de envio; dobra a cada nova falha
+ESPERA_MAXIMA = 300.0
+
+# Código Oracle de violação de chave única: o registro já foi enviado anteriormente
+_ORA_CHAVE_DUPLICADA = "ORA-00001"
+
+
+class Diario:
+    """Diário de colheitas em SQLite: cada cadastro é gravado aqui antes de ir para o Oracle.
+
+    Os registros ficam 'pendente' até o Oracle confirmar o INSERT; registros recusados pelo banco
+    (ex.: violação de CHECK) ficam 'rejeitado' para inspeção, sem bloquear os demais.
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_DIARIO):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        # Um envio por vez: o descarregador e forcar_envio() não podem ler e enviar o mesmo lote pendente
+        self._envio = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=FULL: o registro está em disco quando registrar() retorna
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=FULL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS COLHEITA_PENDENTE (
+                ID_ORIGEM TEXT PRIMARY KEY,
+                DADOS TEXT NOT NULL,
+                CRIADO_EM REAL NOT NULL,
+                STATUS TEXT NOT NULL DEFAULT 'pendente',
+                TENTATIVAS INTEGER NOT NULL DEFAULT 0,
+                PROXIMA_TENTATIVA REAL NOT NULL DEFAULT 0,
+                ULTIMO_ERRO TEXT
+            )
+        """)
+
+    def registrar(self, colheita: Dict[str, Any]) -> str:
+        """Grava a colheita no diário e retorna o identificador de origem (ID_ORIGEM) gerado."""
+        id_origem = str(uuid.uuid4())
+        criado_em = time.time()
+        # data_coleta = hora do cadastro, não a do envio: mesmo enviada horas depois, a colheita entra no dia certo
+        data_coleta = datetime.fromtimestamp(criado_em).isoformat(timespec="seconds")
+        dados = json.dumps(dict(colheita, id_origem=id_origem, data_coleta=data_coleta), ensure_ascii=False)
+        with self._lock:
+            self._conexao.execute("INSERT INTO COLHEITA_PENDENTE (ID_ORIGEM, DADOS, CRIADO_EM) VALUES (?, ?, ?)",
+                                  (id_origem, dados, criado_em))
+        return id_origem
+
+    def proximos(self, limite: int, ignorar_espera: bool = False) -> List[Dict[str, Any]]:
+        """Retorna até `limite` colheitas pendentes (na ordem de cadastro) prontas para envio."""
+        agora = float("inf") if ignorar_espera else time.time()
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT DADOS FROM COLHEITA_PENDENTE WHERE STATUS = 'pendente' AND PROXIMA_TENTATIVA <= ? "
+                "ORDER BY CRIADO_EM LIMIT ?", (agora, limite)).fetchall()
+        colheitas = [json.loads(dados) for (dados,) in linhas]
+        for colheita in colheitas:
+            if colheita.get("data_coleta"): # Registros antigos, de antes da data no diário, seguem com SYSDATE
+                colheita["data_coleta"] = datetime.fromisoformat(colheita["data_coleta"])
+        return colheitas
+
+    def concluir(self, ids_origem: List[str]) -> None:
+        """Remove do diário os registros confirmados no Oracle."""
+        with self._lock:
+            self._conexao.executemany("DELETE FROM COLHEITA_PENDENTE WHERE ID_ORIGEM = ?", [(i,) for i in ids_origem])
+
+    def rejeitar(self, id_origem: str, erro: str) -> None:
+        """Marca um registro recusado pelo Oracle; ele deixa de ser reenviado automaticamente."""
+        with self._lock:
+            self._conexao.execute("UPDATE COLHEITA_PENDENTE SET STATUS = 'rejeitado', ULTIMO_ERRO = ? WHERE ID_ORIGEM = ?",
+                                  (erro, id_origem))
+
+    def adiar(self, ids_origem: List[str], erro: str) -> float:
+        """Registra uma falha de envio e agenda nova tentativa com espera exponencial; retorna a espera (s)."""
+        with self._lock:
+            tentativas = self._conexao.execute(
+                "SELECT MAX(TENTATIVAS) FROM COLHEITA_PENDENTE WHERE ID_ORIGEM IN (%s)" % ",".join("?" * len(ids_origem)),
+                ids_origem).fetchone()[0] or 0
+            espera = min(ESPERA_INICIAL * 2 ** tentativas, ESPERA_MAXIMA)
+            self._conexao.executemany(
+                "UPDATE COLHEITA_PENDENTE SET TENTATIVAS = TENTATIVAS + 1, PROXIMA_TENTATIVA = ?, ULTIMO_ERRO = ? "
+                "WHERE ID_ORIGEM = ?", [(time.time() + espera, erro, i) for i in ids_origem])
+        return espera
+
+    def situacao(self) -> Dict[str, Any]:
+        """Resumo do diário: pendentes, rejeitados, registro mais antigo e último erro."""
+        with self._lock:
+            contagem = dict(self._conexao.execute(
+                "SELECT STATUS, COUNT(*) FROM COLHEITA_PENDENTE GROUP BY STATUS").fetchall())
+            (mais_antigo,) = self._conexao.execute(
+                "SELECT MIN(CRIADO_EM) FROM COLHEITA_PENDENTE WHERE STATUS = 'pendente'").fetchone()
+            ultimo_erro = self._conexao.execute(
+                "SELECT ULTIMO_ERRO FROM COLHEITA_PENDENTE WHERE STATUS = 'pendente' AND ULTIMO_ERRO IS NOT NULL "
+                "ORDER BY PROXIMA_TENTATIVA DESC LIMIT 1").fetchone()
+            rejeitados = self._conexao.execute(
+                "SELECT DADOS, ULTIMO_ERRO FROM COLHEITA_PENDENTE WHERE STATUS = 'rejeitado' ORDER BY CRIADO_EM").fetchall()
+        return {
+            "pendentes": contagem.get("pendente", 0),
+            "rejeitados": contagem.get("rejeitado", 0),
+            "mais_antigo": mais_antigo,
+            "ultimo_erro": ultimo_erro[0] if ultimo_erro else None,
+            "detalhes_rejeitados": [(json.loads(dados), erro) for dados, erro in rejeitados],
+        }
+
+    def descarregar(self, ignorar_espera: bool = False, silencioso: bool = False) -> Tuple[int, Optional[float]]:
+        """Envia ao Oracle, em lotes, todas as colheitas pendentes prontas para envio.
+
+        Retorna (quantidade enviada, espera até a próxima tentativa em caso de falha ou None).
+        Com `silencioso=True` (descarregador em segundo plano), as falhas vão só para o log e o diário.
+        Chamadas simultâneas são serializadas: a segunda espera a primeira e envia o que ainda restar.
+        """
+        with self._envio:
+            enviados = 0
+            while True:
+                lote = self.proximos(TAMANHO_LOTE_DIARIO, ignorar_espera)
+                if not lote:
+                    return enviados, None
+                resumo = salvar_colheitas_lote_oracle(lote, tamanho_lote=len(lote), silencioso=silencioso)
+                ids = [c["id_origem"] for c in lote]
+                if not resumo["concluido"]:
+                    espera = self.adiar(ids, resumo["falha"] or "Falha ao enviar lote ao Oracle (ver log).")
+                    logging.warning("Envio do diário falhou; %d colheitas continuam pendentes. Nova tentativa em %.0fs.",
+                                    len(ids), espera)
+                    return enviados, espera
+
+                recusados = set()
+                for posicao, _, mensagem in resumo["erros"]:
+                    if not mensagem.startswith(_ORA_CHAVE_DUPLICADA): # Duplicado = já estava no Oracle
+                        recusados.add(ids[posicao])
+                        self.rejeitar(ids[posicao], mensagem)
+                self.concluir([i for i in ids if i not in recusados])
+                enviados += resumo["inseridos"]
+                logging.info("Diário: %d colheitas enviadas ao Oracle, %d recusadas.", resumo["inseridos"], len(recusados))
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+class DescarregadorDiario(threading.Thread):
+    """Thread que esvazia o diário periodicamente ou assim que uma nova colheita é registrada.
+
+    Não escreve no console (o menu está em uso): falhas vão para o log, e o estado do envio
+    fica em `situacao()`, exibida pela opção 8.
+    """
+
+    def __init__(self, diario: Diario, intervalo: float = INTERVALO_ENVIO):
+        super().__init__(name="descarregador-diario", daemon=True)
+        self.diario = diario
+        self.intervalo = intervalo
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        # Estado do envio (lido pela thread do menu; atribuições simples). Sucesso = lote aceito pelo Oracle
+        self.ultima_tentativa: Optional[float] = None
+        self.ultimo_sucesso: Optional[float] = None
+        self.proxima_tentativa: Optional[float] = None
+        self.falhas_seguidas = 0
+        self.ultima_falha: Optional[str] = None
+
+    def acordar(self) -> None:
+        self._acordar.set()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        self._parar.set()
+        self._acordar.set()
+        self.join(timeout)
+
+    def situacao(self) -> Dict[str, Any]:
+        """Estado do envio em segundo plano: ativo, última verificação, último envio, próxima tentativa e falhas."""
+        return {
+            "ativo": self.is_alive(),
+            "ultima_tentativa": self.ultima_tentativa,
+            "ultimo_sucesso": self.ultimo_sucesso,
+            "proxima_tentativa": self.proxima_tentativa,
+            "falhas_seguidas": self.falhas_seguidas,
+            "ultima_falha": self.ultima_falha,
+        }
+
+    def run(self) -> None:
+        espera = self.intervalo
+        while not self._parar.is_set():
+            self._acordar.wait(espera)
+            self._acordar.clear()
+            if self._parar.is_set():
+                break
+            self.ultima_tentativa = time.time()
+            try:
+                enviados, proxima = self.diario.descarregar(silencioso=True)
+                if enviados and proxima is None:
+                    self.ultimo_sucesso, self.falhas_seguidas = self.ultima_tentativa, 0
+                elif proxima is not None:
+                    self.falhas_seguidas += 1
+                    self.ultima_falha = self.diario.situacao()["ultimo_erro"]
+                espera = proxima if proxima is not None else self.intervalo
+            except Exception as e: # Nunca deixa a thread morrer: tenta de novo no próximo ciclo
+                logging.error("Erro inesperado no descarregador do diário: %s", e, exc_info=True)
+                self.falhas_seguidas += 1
+                self.ultima_falha = str(e)
+                espera = self.intervalo
+            self.proxima_tentativa = time.time() + espera
+
+
+# Diário e descarregador compartilhados pelo processo (criados na primeira utilização)
+_diario: Optional[Diario] = None
+_descarregador: Optional[DescarregadorDiario] = None
+_diario_lock = threading.Lock()
+
+
+def obter_diario() -> Diario:
+    """Retorna o diário do processo, abrindo o arquivo SQLite na primeira chamada."""
+    global _diario
+    with _diario_lock:
+        if _diario is None:
+            _diario = Diario()
+        return _diario
+
+
+def iniciar_descarregador() -> None:
+    """Inicia (uma única vez) a thread que envia o diário ao Oracle em segundo plano."""
+    global _descarregador
+    diario = obter_diario()
+    with _diario_lock:
+        if _descarregador is None:
+            _descarregador = DescarregadorDiario(diario)
+            _descarregador.start()
+            logging.info("Descarregador do diário iniciado (%s).", diario.caminho)
+
+
+def registrar_colheita(colheita: Dict[str, Any]) -> str:
+    """Grava a colheita no diário local e retorna imediatamente; o envio ao Oracle ocorre em segundo plano."""
+    id_origem = obter_diario().registrar(colheita)
+    logging.info("Colheita do talhão %s registrada no diário (%s).", colheita.get("talhao"), id_origem)
+    if _descarregador:
+        _descarregador.acordar()
+    return id_origem
+
+
+def forcar_envio() -> int:
+    """Envia imediatamente todas as pendências, ignorando a espera entre tentativas; retorna o total enviado."""
+    enviados, _ = obter_diario().descarregar(ignorar_espera=True)
+    return enviados
+
+
+def parar_descarregador(timeout: float = 10.0) -> None:
+    """Interrompe o descarregador e faz uma última tentativa de envio antes de fechar o diário."""
+    global _descarregador, _diario
+    if _descarregador:
+        _descarregador.parar(timeout)
+        _descarregador = None
+    if _diario:
+        try:
+            forcar_envio()
+        except Exception as e:
+            logging.error("Falha no envio final do diário: %s", e, exc_info=True)
+        _diario.fechar()
+        _diario = None
+
+
+def _hora(momento: Optional[float]) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(momento)) if momento else "nunca"
+
+
+def exibir_situacao_diario() -> None:
+    """Exibe no console a situação do diário local e do envio em segundo plano."""
+    situacao = obter_diario().situacao()
+    print(f"\n📒 Diário local ({obter_diario().caminho}):")
+    descarregador = _descarregador
+    if descarregador is None:
+        print("  - Envio em segundo plano: desligado")
+    else:
+        envio = descarregador.situacao()
+        print(f"  - Envio em segundo plano: {'ativo' if envio['ativo'] else '⚠️ parado'} | "
+              f"última verificação: {_hora(envio['ultima_tentativa'])} | último envio: {_hora(envio['ultimo_sucesso'])}")
+        if envio["falhas_seguidas"]:
+            print(f"  - ⚠️ {envio['falhas_seguidas']} falha(s) seguida(s); próxima tentativa: {_hora(envio['proxima_tentativa'])}")
+            if envio["ultima_falha"] != situacao["ultimo_erro"]: # Erro inesperado da thread (não gravado no diário)
+                print(f"    Motivo: {envio['ultima_falha']}")
+    print(f"  - Pendentes de envio: {situacao['pendentes']}")
+    if situacao["mais_antigo"]:
+        print(f"  - Mais antigo: {_hora(situacao['mais_antigo'])}")
+    if situacao["ultimo_erro"]:
+        print(f"  - Último erro: {situacao['ultimo_erro']}")
+    print(f"  - Recusados pelo Oracle: {situacao['rejeitados']}")
+    for colheita, erro in situacao["detalhes_rejeitados"]:
+        print(f"      Talhão {colheita.get('talhao')} ({colheita.get('id_origem')}): {erro}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler("gestao_colheita.log"), logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="Inspeção e envio do diário local de colheitas.")
+    parser.add_argument("--enviar", action="store_true", help="Força o envio imediato das pendências ao Oracle")
+    args = parser.parse_args()
+    try:
+        if args.enviar:
+            print(f"✅ {forcar_envio()} colheitas enviadas ao Oracle.")
+        exibir_situacao_diario()
+    finally:
+        fechar_pool()
@@ -0,0 +1,176 @@
+# Arquivo: exportacao.py
+# Exportação incremental: grava só as colheitas novas desde a última execução e compacta os arquivos periodicamente
+
+import glob
+import itertools
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+
+from funcoes import gerar_relatorio_txt, salvar_json
+from metricas import medir
+
+# Pasta com a marca, o retrato completo e os arquivos de diferença (deltas)
+PASTA_EXPORTACAO = os.getenv("EXPORT_PASTA", "exportacao")
+# Só exporta colheitas gravadas há mais que esta margem (s): transações ainda abertas com SYSDATE
+# anterior à marca não ficam para trás
+MARGEM_SEGUNDOS = float(os.getenv("EXPORT_MARGEM_SEGUNDOS", 60))
+# Compacta automaticamente ao acumular esta quantidade de deltas (0 desativa)
+COMPACTAR_APOS = int(os.getenv("EXPORT_COMPACTAR_APOS", 48))
+
+ARQUIVO_MARCA = "marca_exportacao.json"
+ARQUIVO_COMPLETO_JSON = "dados_colheita.jsonl"
+ARQUIVO_COMPLETO_TXT = "relatorio_colheita.txt"
+PASTA_DELTAS = "deltas"
+
+
+def _caminho_delta(pasta: str, sequencia: int, extensao: str) -> str:
+    prefixo = "dados_colheita" if extensao == "jsonl" else "relatorio_colheita"
+    return os.path.join(pasta, PASTA_DELTAS, f"{prefixo}.{sequencia:06d}.{extensao}")
+
+
+def ler_marca(pasta: str = PASTA_EXPORTACAO) -> Dict[str, Any]:
+    """Lê a marca da última exportação; sem arquivo, a próxima exportação começa do início da tabela."""
+    try:
+        with open(os.path.join(pasta, ARQUIVO_MARCA), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"data_coleta": None, "id": None, "sequencia": 0, "exportadas": 0, "atualizada_em": None}
+
+
+def _gravar_marca(pasta: str, marca: Dict[str, Any]) -> None:
+    """Grava a marca via arquivo temporário + renomeação (nunca fica pela metade)."""
+    caminho = os.path.join(pasta, ARQUIVO_MARCA)
+    with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+        json.dump(marca, f, indent=4, ensure_ascii=False)
+    os.replace(f"{caminho}.tmp", caminho)
+
+
+def _chave(colheita: Dict[str, Any]) -> Tuple[datetime, int]:
+    return colheita["data_coleta"], colheita["id"]
+
+
+def ler_exportacao(caminho: str) -> Iterator[Dict[str, Any]]:
+    """Lê um arquivo JSON Lines da exportação, com `data_coleta` de volta em datetime."""
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                colheita = json.loads(linha)
+                if colheita.get("data_coleta"):
+                    colheita["data_coleta"] = datetime.fromisoformat(colheita["data_coleta"])
+                yield colheita
+
+
+def deltas_pendentes(pasta: str = PASTA_EXPORTACAO) -> List[Tuple[int, str]]:
+    """Deltas já registrados na marca e ainda não compactados: (sequência, caminho), em ordem."""
+    limite = ler_marca(pasta)["sequencia"]
+    deltas = []
+    for caminho in glob.glob(os.path.join(pasta, PASTA_DELTAS, "dados_colheita.*.jsonl")):
+        sequencia = int(os.path.basename(caminho).split(".")[1])
+        # Delta acima da marca: sobra de uma execução interrompida, será regravado pela próxima
+        if sequencia <= limite:
+            deltas.append((sequencia, caminho))
+    return sorted(deltas)
+
+
+def exportar_incremental(pasta: str = PASTA_EXPORTACAO, txt: bool = True,
+                         compactar_apos: int = COMPACTAR_APOS) -> Dict[str, Any]:
+    """Exporta as colheitas gravadas após a marca para um novo delta (.jsonl e, com `txt`, .txt) e avança a marca.
+
+    A consulta usa a chave (DATA_COLETA, ID) a partir da marca, sem reler a tabela. Se a execução for
+    interrompida antes de gravar a marca, a próxima regrava o mesmo delta (mesmo número de sequência).
+    """
+    from oracle import iterar_colheitas_novas_oracle # Importação local: compactar não precisa do Oracle
+
+    os.makedirs(os.path.join(pasta, PASTA_DELTAS), exist_ok=True)
+    marca = ler_marca(pasta)
+    desde = (datetime.fromisoformat(marca["data_coleta"]), marca["id"]) if marca["id"] is not None else None
+    corte = datetime.now() - timedelta(seconds=MARGEM_SEGUNDOS)
+    sequencia = marca["sequencia"] + 1
+    arquivo_json = _caminho_delta(pasta, sequencia, "jsonl")
+    resumo: Dict[str, Any] = {"linhas": 0, "sequencia": None, "arquivos": [], "compactacao": None}
+
+    ultima: List[Tuple[datetime, int]] = []
+
+    def acompanhar(colheitas: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for colheita in colheitas:
+            ultima[:] = [_chave(colheita)]
+            resumo["linhas"] += 1
+            yield colheita
+
+    with medir("exportacao.incremental") as medicao:
+        novas = iterar_colheitas_novas_oracle(desde, corte)
+        primeira = next(novas, None)
+        if primeira is None:
+            logging.info("Exportação incremental: nenhuma colheita nova desde %s.", marca["data_coleta"] or "o início")
+        else:
+            if not salvar_json(acompanhar(itertools.chain([primeira], novas)), arquivo_json, formato="jsonl"):
+                medicao.erro = True
+                raise IOError(f"Falha ao gravar o delta {arquivo_json} (veja o log).")
+            resumo["arquivos"].append(arquivo_json)
+            if txt:
+                arquivo_txt = _caminho_delta(pasta, sequencia, "txt")
+                if not gerar_relatorio_txt(ler_exportacao(arquivo_json), arquivo_txt):
+                    medicao.erro = True
+                    raise IOError(f"Falha ao gravar o delta {arquivo_txt} (veja o log).")
+                resumo["arquivos"].append(arquivo_txt)
+            data_coleta, id_colheita = ultima[0]
+            marca.update(data_coleta=data_coleta.isoformat(), id=id_colheita, sequencia=sequencia,
+                         exportadas=marca["exportadas"] + resumo["linhas"],
+                         atualizada_em=datetime.now().isoformat(timespec="seconds"))
+            _gravar_marca(pasta, marca)
+            resumo["sequencia"] = sequencia
+            logging.info("Exportação incremental: %d colheitas no delta %d.", resumo["linhas"], sequencia)
+        medicao.linhas = resumo["linhas"]
+
+    if compactar_apos and len(deltas_pendentes(pasta)) >= compactar_apos:
+        resumo["compactacao"] = compactar(pasta, txt)
+    return resumo
+
+
+def compactar(pasta: str = PASTA_EXPORTACAO, txt: bool = True) -> Dict[str, Any]:
+    """Junta o retrato completo e os deltas pendentes em um novo retrato completo e apaga os deltas.
+
+    Não consulta o Oracle. Linhas com chave (DATA_COLETA, ID) já presente no retrato são ignoradas,
+    então repetir a compactação após uma interrupção não duplica registros.
+    """
+    deltas = deltas_pendentes(pasta)
+    arquivo_json = os.path.join(pasta, ARQUIVO_COMPLETO_JSON)
+    resumo: Dict[str, Any] = {"deltas": len(deltas), "linhas": 0, "arquivos": []}
+    if not deltas:
+        return resumo
+
+    def juntar() -> Iterator[Dict[str, Any]]:
+        ultima_chave = None
+        fontes = ([arquivo_json] if os.path.exists(arquivo_json) else []) + [caminho for _, caminho in deltas]
+        for fonte in fontes:
+            for colheita in ler_exportacao(fonte):
+                if ultima_chave is None or _chave(colheita) > ultima_chave:
+                    ultima_chave = _chave(colheita)
+                    resumo["linhas"] += 1
+                    yield colheita
+
+    with medir("exportacao.compactar") as medicao:
+        if not salvar_json(juntar(), arquivo_json, formato="jsonl"):
+            medicao.erro = True
+            raise IOError(f"Falha ao gravar o retrato completo {arquivo_json} (veja o log).")
+        resumo["arquivos"].append(arquivo_json)
+        if txt:
+            arquivo_txt = os.path.join(pasta, ARQUIVO_COMPLETO_TXT)
+            if not gerar_relatorio_txt(ler_exportacao(arquivo_json), arquivo_txt):
+                medicao.erro = True
+                raise IOError(f"Falha ao gravar o relatório completo {arquivo_txt} (veja o log).")
+            resumo["arquivos"].append(arquivo_txt)
+        medicao.linhas = resumo["linhas"]
+
+    # Só depois do retrato gravado: uma interrupção aqui deixa deltas que a próxima compactação ignora
+    for sequencia, _ in deltas:
+        for extensao in ("jsonl", "txt"):
+            if os.path.exists(_caminho_delta(pasta, sequencia, extensao)):
+                os.remove(_caminho_delta(pasta, sequencia, extensao))
+    logging.info("Compactação: %d deltas juntados em %s (%d colheitas).", len(deltas), arquivo_json, resumo["linhas"])
+    return resumo
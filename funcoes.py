@@ -1,18 +1,82 @@
 # Arquivo: funcoes.py
 # Funções auxiliares para cadastro, cálculo e geração de arquivos/relatórios
 
+import gzip
 import json
 import logging
 import os
-from typing import List, Dict, Any, Tuple, Optional
+import secrets
+import sys
+import textwrap
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, TextIO, Union, TYPE_CHECKING
 
-# Configuração do logging (caso este arquivo seja executado separadamente)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+
+from metricas import cronometrar, medir
+from registro import Colheita
+
+if TYPE_CHECKING:
+    from colunar import ColheitasColunares # Análises vetorizadas (requer NumPy)
 
 # Carrega limites do .env com valores padrão caso não definidos
 LIMITE_PRODUTIVIDADE = float(os.getenv("LIM_PROD", 85.0))
 LIMITE_PREJUIZO = float(os.getenv("LIM_PREJU", 2000.0))
 
+TIPOS_COLHEITA = ("manual", "mecanica")
+
+
+def montar_colheita(talhao: Any, area: Any, tipo_colheita: Any, producao: Any, perda: Any,
+                    preco_tonelada: Any = None, prejuizo: Any = None) -> Dict[str, Any]:
+    """Valida os dados de uma colheita e calcula os campos derivados (produtividade e prejuízo).
+
+    Aplica as mesmas regras do cadastro interativo e lança ValueError se algum valor for inválido.
+    Sem `preco_tonelada`, usa o `prejuizo` já informado (formato de `dados.json`).
+    """
+    talhao = str(talhao or "").strip().upper()
+    if not talhao:
+        raise ValueError("Talhão não pode ser vazio.")
+
+    area = float(area)
+    if area <= 0:
+        raise ValueError("Área deve ser maior que zero.")
+
+    tipo_colheita = str(tipo_colheita or "").strip().lower()
+    if tipo_colheita not in TIPOS_COLHEITA:
+        raise ValueError("Tipo inválido. Use 'manual' ou 'mecanica'.")
+
+    producao = float(producao)
+    if producao < 0:
+        raise ValueError("Produção não pode ser negativa.")
+
+    perda = float(perda)
+    if perda < 0:
+        raise ValueError("Perda não pode ser negativa.")
+
+    if preco_tonelada is not None:
+        preco_tonelada = float(preco_tonelada)
+        if preco_tonelada < 0:
+            raise ValueError("Preço não pode ser negativo.")
+        prejuizo = perda * preco_tonelada
+    elif prejuizo is not None:
+        prejuizo = float(prejuizo)
+    else:
+        raise ValueError("Informe o preço da tonelada ou o prejuízo calculado.")
+
+    # Cálculos
+    produtividade = producao / area # Área já validada como maior que zero
+
+    return {
+        "talhao": talhao,
+        "area": area,
+        "tipo_colheita": tipo_colheita,
+        "producao": producao,
+        "perda": perda,
+        "produtividade": round(produtividade, 2),
+        "prejuizo": round(prejuizo, 2)
+    }
+
+
 def cadastrar_colheita() -> Optional[Dict[str, Any]]:
     """Coleta os dados de uma nova colheita do usuário e calcula campos derivados."""
     print("\n--- Cadastro de nova colheita ---")
@@ -28,9 +92,9 @@ def cadastrar_colheita() -> Optional[Dict[str, Any]]:
             return None
 
         tipo_colheita = ""
-        while tipo_colheita not in ["manual", "mecanica"]:
+        while tipo_colheita not in TIPOS_COLHEITA:
             tipo_colheita = input("Tipo de colheita (manual/mecanica): ").strip().lower()
-            if tipo_colheita not in ["manual", "mecanica"]:
+            if tipo_colheita not in TIPOS_COLHEITA:
                 print("❌ Tipo inválido. Digite 'manual' ou 'mecanica'.")
 
         producao = float(input("Produção em toneladas (ex: 100.0): "))
@@ -51,20 +115,8 @@ def cadastrar_colheita() -> Optional[Dict[str, Any]]:
              print("❌ Preço não pode ser negativo.")
              return None
 
-        # Cálculos
-        prejuizo = perda * preco_tonelada
-        produtividade = producao / area if area > 0 else 0 # Evita divisão por zero
-
-        colheita = {
-            "talhao": talhao,
-            "area": area,
-            "tipo_colheita": tipo_colheita,
-            "producao": producao,
-            "perda": perda,
-            "produtividade": round(produtividade, 2),
-            "prejuizo": round(prejuizo, 2)
-        }
-        return colheita
+        # Validação final e cálculos (produtividade e prejuízo) compartilhados com a carga em lote
+        return montar_colheita(talhao, area, tipo_colheita, producao, perda, preco_tonelada)
 
     except ValueError:
         print("❌ Erro: Entrada inválida. Certifique-se de digitar números onde esperado.")
@@ -75,115 +127,358 @@ def cadastrar_colheita() -> Optional[Dict[str, Any]]:
          return None
 
 
-def formatar_exibicao_colheitas(colheitas: List[Dict[str, Any]]):
-    """Formata e exibe os dados de uma lista de colheitas no console."""
-    if not colheitas:
-        print("\nNenhum registro para exibir.")
-        return
+def formatar_exibicao_colheitas(colheitas: Iterable[Dict[str, Any]], linhas_por_pagina: Optional[int] = None):
+    """Formata e exibe os dados das colheitas no console.
 
-    print("\n--- Registros de Colheita ---")
+    Aceita qualquer iterável (inclusive o gerador paginado do Oracle), exibindo cada linha assim que chega.
+    Com `linhas_por_pagina`, pausa a cada página e permite interromper a listagem.
+    """
     # Cabeçalho (ajuste as larguras conforme necessário)
-    print(f"{'ID':<5} {'Talhão':<8} {'Área(ha)':<10} {'Tipo':<10} {'Produção(t)':<12} {'Perda(t)':<10} {'Produt.(t/ha)':<15} {'Prejuízo(R$)':<12} {'Data':<12}")
+    cabecalho = f"{'ID':<5} {'Talhão':<8} {'Área(ha)':<10} {'Tipo':<10} {'Produção(t)':<12} {'Perda(t)':<10} {'Produt.(t/ha)':<15} {'Prejuízo(R$)':<12} {'Data':<12}"
+    exibidos = 0
+    try:
+        for c in colheitas:
+            if exibidos == 0:
+                print("\n--- Registros de Colheita ---")
+                print(cabecalho)
+                print("-" * 104)
+            elif linhas_por_pagina and exibidos % linhas_por_pagina == 0:
+                if input(f"-- {exibidos} registros exibidos. Enter para continuar ou 'q' para parar: ").strip().lower() == "q":
+                    break
+
+            # Formata a data se existir e for do tipo datetime, senão usa string vazia
+            data_colheita_str = c.get('data_coleta').strftime('%Y-%m-%d') if c.get('data_coleta') else 'N/A'
+
+            print(f"{str(c.get('id', 'N/A')):<5} "
+                  f"{c.get('talhao', ''):<8} "
+                  f"{c.get('area', 0):<10.2f} "
+                  f"{c.get('tipo_colheita', ''):<10} "
+                  f"{c.get('producao', 0):<12.2f} "
+                  f"{c.get('perda', 0):<10.2f} "
+                  f"{c.get('produtividade', 0):<15.2f} "
+                  f"{c.get('prejuizo', 0):<12.2f} "
+                  f"{data_colheita_str:<12}")
+            exibidos += 1
+    finally:
+        # Interrompe o gerador (se houver) para liberar cursor e conexão imediatamente
+        if hasattr(colheitas, "close"):
+            colheitas.close()
+
+    if exibidos == 0:
+        print("\nNenhum registro para exibir.")
+        return
     print("-" * 104)
 
-    for c in colheitas:
-        # Formata a data se existir e for do tipo datetime, senão usa string vazia
-        data_colheita_str = c.get('data_coleta').strftime('%Y-%m-%d') if c.get('data_coleta') else 'N/A'
-
-        print(f"{str(c.get('id', 'N/A')):<5} "
-              f"{c.get('talhao', ''):<8} "
-              f"{c.get('area', 0):<10.2f} "
-              f"{c.get('tipo_colheita', ''):<10} "
-              f"{c.get('producao', 0):<12.2f} "
-              f"{c.get('perda', 0):<10.2f} "
-              f"{c.get('produtividade', 0):<15.2f} "
-              f"{c.get('prejuizo', 0):<12.2f} "
-              f"{data_colheita_str:<12}")
-    print("-" * 104)
 
+# Tamanho do buffer de escrita dos arquivos gerados (bytes)
+TAMANHO_BUFFER_ESCRITA = 1024 * 1024
 
-def gerar_relatorio_txt(colheitas: List[Dict[str, Any]], nome_arquivo: str = "relatorio_colheita.txt") -> bool:
-    """Gera um arquivo de texto (.txt) com os dados das colheitas."""
-    if not colheitas:
-        logging.warning("Nenhuma colheita fornecida para gerar relatório TXT.")
-        return False
-    try:
-        with open(nome_arquivo, "w", encoding="utf-8") as f:
-            f.write("=== Relatório de Colheitas ===\n\n")
-            for c in colheitas:
-                 data_str = c.get('data_coleta').strftime('%Y-%m-%d') if c.get('data_coleta') else 'N/A'
-                 f.write(f"TALHÃO {c.get('talhao', 'N/A')} (ID: {c.get('id', 'N/A')}) - Data: {data_str}\n")
-                 f.write(f"  Área: {c.get('area', 0):.2f} ha | Tipo: {c.get('tipo_colheita', 'N/A')}\n")
-                 f.write(f"  Produção: {c.get('producao', 0):.2f} t | Perda: {c.get('perda', 0):.2f} t\n")
-                 f.write(f"  Produtividade: {c.get('produtividade', 0):.2f} t/ha\n")
-                 f.write(f"  Prejuízo Estimado: R$ {c.get('prejuizo', 0):.2f}\n")
-                 f.write("-" * 40 + "\n")
-            logging.info("Relatório TXT salvo com sucesso em %s", nome_arquivo)
-            return True
-    except IOError as e:
-        logging.error("Erro ao escrever relatório TXT '%s': %s", nome_arquivo, e, exc_info=True)
-        return False
 
-def salvar_json(colheitas: List[Dict[str, Any]], nome_arquivo: str = "dados_colheita.json") -> bool:
-    """Salva os dados das colheitas em um arquivo JSON."""
-    if not colheitas:
-        logging.warning("Nenhuma colheita fornecida para salvar em JSON.")
-        return False
+def _criar_temporario(diretorio: str) -> str:
+    """Cria um arquivo temporário vazio em `diretorio` e devolve seu caminho.
+
+    Usa o modo 0o666 em vez do 0o600 do mkstemp: o kernel aplica a umask do processo, e o arquivo final
+    fica com as mesmas permissões que um open() comum daria.
+    """
+    while True:
+        temporario = os.path.join(diretorio, f".tmp_{secrets.token_hex(8)}")
+        try:
+            os.close(os.open(temporario, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            return temporario
+        except FileExistsError: # Colisão de nome (improvável): sorteia outro
+            continue
 
-    # Converter objetos datetime para string ISO format para serialização JSON
-    def converter_datas(obj):
-        if hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        raise TypeError(f"Objeto do tipo {type(obj)} não é serializável em JSON")
 
+@contextmanager
+def _escrita_atomica(nome_arquivo: str, comprimir: bool = False) -> Iterator[TextIO]:
+    """Abre um arquivo temporário (com buffer) no mesmo diretório e o renomeia para `nome_arquivo` ao final.
+
+    Se ocorrer qualquer erro (inclusive do iterável de colheitas, como uma falha do Oracle no meio da
+    leitura), o temporário é removido e o arquivo anterior permanece intacto.
+    """
+    diretorio = os.path.dirname(os.path.abspath(nome_arquivo))
+    temporario = _criar_temporario(diretorio)
     try:
-        with open(nome_arquivo, "w", encoding="utf-8") as f:
-            json.dump(colheitas, f, indent=4, ensure_ascii=False, default=converter_datas)
-        logging.info("Dados JSON salvos com sucesso em %s", nome_arquivo)
-        return True
-    except (IOError, TypeError) as e:
-        logging.error("Erro ao salvar arquivo JSON '%s': %s", nome_arquivo, e, exc_info=True)
-        return False
+        if comprimir:
+            f = gzip.open(temporario, "wt", encoding="utf-8")
+        else:
+            f = open(temporario, "w", encoding="utf-8", buffering=TAMANHO_BUFFER_ESCRITA)
+        with f:
+            yield f
+        os.replace(temporario, nome_arquivo) # Renomeação atômica: nunca deixa um arquivo pela metade
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class _SemDados(Exception):
+    """Sinaliza que o iterável de colheitas estava vazio (nada é gravado)."""
+
+
+def gerar_relatorio_txt(colheitas: Iterable[Dict[str, Any]], nome_arquivo: str = "relatorio_colheita.txt",
+                        comprimir: bool = False) -> bool:
+    """Gera um arquivo de texto (.txt) com os dados das colheitas.
+
+    Aceita qualquer iterável (inclusive o gerador paginado do Oracle) e escreve linha a linha,
+    sem montar o relatório em memória. Com `comprimir=True`, grava em gzip.
+    """
+    with medir("funcoes.gerar_relatorio_txt") as medicao:
+        try:
+            with _escrita_atomica(nome_arquivo, comprimir) as f:
+                f.write("=== Relatório de Colheitas ===\n\n")
+                escritos = 0
+                for c in colheitas:
+                     data_str = c.get('data_coleta').strftime('%Y-%m-%d') if c.get('data_coleta') else 'N/A'
+                     f.write(f"TALHÃO {c.get('talhao', 'N/A')} (ID: {c.get('id', 'N/A')}) - Data: {data_str}\n"
+                             f"  Área: {c.get('area', 0):.2f} ha | Tipo: {c.get('tipo_colheita', 'N/A')}\n"
+                             f"  Produção: {c.get('producao', 0):.2f} t | Perda: {c.get('perda', 0):.2f} t\n"
+                             f"  Produtividade: {c.get('produtividade', 0):.2f} t/ha\n"
+                             f"  Prejuízo Estimado: R$ {c.get('prejuizo', 0):.2f}\n"
+                             + "-" * 40 + "\n")
+                     escritos += 1
+                if not escritos:
+                    raise _SemDados()
+            medicao.linhas, medicao.bytes = escritos, os.path.getsize(nome_arquivo)
+            logging.info("Relatório TXT salvo com sucesso em %s (%d colheitas)", nome_arquivo, escritos)
+            return True
+        except _SemDados:
+            logging.warning("Nenhuma colheita fornecida para gerar relatório TXT.")
+            return False
+        except IOError as e:
+            medicao.erro = True
+            logging.error("Erro ao escrever relatório TXT '%s': %s", nome_arquivo, e, exc_info=True)
+            return False
+
+
+# Converter objetos datetime para string ISO format para serialização JSON
+def _converter_datas(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Objeto do tipo {type(obj)} não é serializável em JSON")
+
+
+def salvar_json(colheitas: Iterable[Dict[str, Any]], nome_arquivo: str = "dados_colheita.json",
+                formato: str = "json", comprimir: bool = False) -> bool:
+    """Salva os dados das colheitas em um arquivo JSON.
+
+    Aceita qualquer iterável e grava registro a registro. `formato="json"` gera a mesma lista
+    indentada de antes; `formato="jsonl"` gera JSON Lines (um objeto por linha). Com `comprimir=True`, grava em gzip.
+    """
+    if formato not in ("json", "jsonl"):
+        raise ValueError(f"Formato de saída inválido: {formato}")
+    with medir(f"funcoes.salvar_{formato}") as medicao:
+        try:
+            with _escrita_atomica(nome_arquivo, comprimir) as f:
+                escritos = 0
+                for c in colheitas:
+                    if type(c) is Colheita:
+                        c = c.para_dict() # O json só serializa dicionários de verdade
+                    if formato == "jsonl":
+                        f.write(json.dumps(c, ensure_ascii=False, default=_converter_datas) + "\n")
+                    else:
+                        # Mesma saída de json.dump(lista, indent=4), escrita um objeto por vez
+                        objeto = json.dumps(c, indent=4, ensure_ascii=False, default=_converter_datas)
+                        f.write(("[\n" if escritos == 0 else ",\n") + textwrap.indent(objeto, " " * 4))
+                    escritos += 1
+                if not escritos:
+                    raise _SemDados()
+                if formato == "json":
+                    f.write("\n]")
+            medicao.linhas, medicao.bytes = escritos, os.path.getsize(nome_arquivo)
+            logging.info("Dados JSON salvos com sucesso em %s (%d colheitas)", nome_arquivo, escritos)
+            return True
+        except _SemDados:
+            logging.warning("Nenhuma colheita fornecida para salvar em JSON.")
+            return False
+        except (IOError, TypeError) as e:
+            medicao.erro = True
+            logging.error("Erro ao salvar arquivo JSON '%s': %s", nome_arquivo, e, exc_info=True)
+            return False
+
+
+def salvar_colunar(colheitas: Union[Iterable[Dict[str, Any]], "ColheitasColunares"],
+                   nome_arquivo: str = "dados_colheita.colh") -> bool:
+    """Salva as colheitas no formato colunar binário (.colh), compacto e lido sem conversão por `carregar_colunar`.
+
+    Aceita qualquer iterável de dicionários ou um `ColheitasColunares`; o formato está descrito em `colunar.py`.
+    """
+    with medir("funcoes.salvar_colunar") as medicao:
+        try:
+            from colunar import salvar_arquivo_colunar # Importação local: só este formato exige o NumPy
+            escritos = salvar_arquivo_colunar(colheitas, nome_arquivo)
+            if not escritos:
+                os.remove(nome_arquivo)
+                logging.warning("Nenhuma colheita fornecida para salvar no formato colunar.")
+                return False
+            medicao.linhas, medicao.bytes = escritos, os.path.getsize(nome_arquivo)
+            logging.info("Dados colunares salvos com sucesso em %s (%d colheitas)", nome_arquivo, escritos)
+            return True
+        except (ImportError, OSError, TypeError, ValueError) as e:
+            medicao.erro = True
+            logging.error("Erro ao salvar arquivo colunar '%s': %s", nome_arquivo, e, exc_info=True)
+            return False
+
+
+def carregar_colunar(nome_arquivo: str = "dados_colheita.colh") -> Optional["ColheitasColunares"]:
+    """Abre um arquivo .colh mapeado em memória, pronto para `gerar_relatorio_estatistico` e `alertar_colheitas_ineficientes`.
+
+    Retorna None se o arquivo não existir ou for inválido.
+    """
+    with medir("funcoes.carregar_colunar") as medicao:
+        try:
+            from colunar import ColheitasColunares
+            colheitas = ColheitasColunares.de_arquivo(nome_arquivo)
+            medicao.linhas = len(colheitas)
+            return colheitas
+        except FileNotFoundError:
+            logging.warning("Arquivo colunar '%s' não encontrado.", nome_arquivo)
+            return None
+        except (ImportError, OSError, ValueError, KeyError) as e:
+            medicao.erro = True
+            logging.error("Erro ao carregar arquivo colunar '%s': %s", nome_arquivo, e, exc_info=True)
+            return None
 
 
-def gerar_relatorio_estatistico(colheitas: List[Dict[str, Any]]) -> Optional[Dict[str, Dict[str, float]]]:
-    """Calcula estatísticas de produtividade (média) por tipo de colheita."""
-    if not colheitas:
-        logging.warning("Nenhuma colheita para gerar estatísticas.")
-        return None
+def _percentil(valores_ordenados: List[float], fracao: float) -> float:
+    """Percentil com interpolação linear (mesmo critério do PERCENTILE_CONT do Oracle)."""
+    posicao = fracao * (len(valores_ordenados) - 1)
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * (posicao - inferior)
+
+
+def _chave_agrupamento(c: Union[Dict[str, Any], Colheita], agrupar_por: str) -> Optional[str]:
+    """Retorna o grupo da colheita para o agrupamento pedido ('tipo_colheita', 'talhao' ou 'mes')."""
+    if type(c) is Colheita: # Registro do Oracle: leitura por atributo, sem o custo de .get()
+        if agrupar_por == "mes":
+            return c.data_coleta.strftime("%Y-%m") if c.data_coleta else "N/A"
+        return getattr(c, agrupar_por)
+    if agrupar_por == "mes":
+        data = c.get("data_coleta")
+        if not data:
+            return "N/A"
+        # Dados do Oracle trazem datetime; dados exportados em JSON trazem a data em texto ISO
+        return data.strftime("%Y-%m") if hasattr(data, "strftime") else str(data)[:7]
+    return c.get(agrupar_por)
+
+
+def _e_colunar(colheitas: Any) -> bool:
+    """Indica se os dados estão no formato colunar (`colunar.ColheitasColunares`)."""
+    # Sem importar o NumPy: se o módulo colunar nunca foi carregado, não há dados colunares
+    # (getattr: outra thread pode estar no meio da primeira importação, com o módulo ainda incompleto)
+    classe = getattr(sys.modules.get("colunar"), "ColheitasColunares", None)
+    return classe is not None and isinstance(colheitas, classe)
+
+
+@cronometrar("funcoes.gerar_relatorio_estatistico")
+def gerar_relatorio_estatistico(colheitas: Optional[Union[List[Dict[str, Any]], "ColheitasColunares"]] = None,
+                                agrupar_por: str = "tipo_colheita",
+                                detalhado: bool = False) -> Optional[Dict[str, Dict[str, float]]]:
+    """Calcula estatísticas de produtividade (média, mín/máx, mediana, p10/p90) e totais por grupo.
+
+    Sem `colheitas`, lê do Oracle: por padrão da tabela de resumo RESUMO_COLHEITA (média, mín/máx e totais,
+    sem percorrer o histórico); com `detalhado=True`, agrega COLHEITA_CANA inteira (inclui mediana e percentis).
+    Com uma lista (ex.: dados JSON offline), o cálculo é feito em memória com os mesmos critérios,
+    e com `ColheitasColunares` de forma vetorizada.
+    """
+    if colheitas is None:
+        # Importação local: funções offline não dependem do Oracle
+        from oracle import estatisticas_colheitas_oracle, estatisticas_resumo_oracle
+        resultado = estatisticas_colheitas_oracle(agrupar_por) if detalhado else estatisticas_resumo_oracle(agrupar_por)
+        if not resultado:
+            logging.warning("Nenhuma colheita no Oracle para gerar estatísticas.")
+            return None
+    else:
+        if not colheitas:
+            logging.warning("Nenhuma colheita para gerar estatísticas.")
+            return None
+        if _e_colunar(colheitas):
+            resultado = colheitas.estatisticas(agrupar_por, TIPOS_COLHEITA) # Cálculo vetorizado (NumPy)
+        else:
+            resultado = _estatisticas_em_memoria(colheitas, agrupar_por)
+
+    if agrupar_por == "tipo_colheita":
+        # Mantém os dois tipos no relatório, mesmo sem registros (sem alterar o resultado em cache)
+        resultado = {tipo: resultado.get(tipo, {"media_produtividade": 0.0, "registros": 0}) for tipo in TIPOS_COLHEITA}
+    return resultado
+
 
-    estatisticas_por_tipo: Dict[str, List[float]] = {"manual": [], "mecanica": []}
+def _estatisticas_em_memoria(colheitas: List[Dict[str, Any]], agrupar_por: str) -> Dict[str, Dict[str, float]]:
+    """Calcula em Python as mesmas estatísticas da agregação feita no Oracle."""
+    produtividades_por_grupo: Dict[str, List[float]] = {}
+    totais_por_grupo: Dict[str, List[float]] = {}
     for c in colheitas:
-        tipo = c.get("tipo_colheita")
-        produtividade = c.get("produtividade")
-        if tipo in estatisticas_por_tipo and produtividade is not None:
-            estatisticas_por_tipo[tipo].append(produtividade)
+        grupo = _chave_agrupamento(c, agrupar_por)
+        if grupo is None or (agrupar_por == "tipo_colheita" and grupo not in TIPOS_COLHEITA):
+            continue
+        lista = produtividades_por_grupo.setdefault(grupo, [])
+        totais = totais_por_grupo.setdefault(grupo, [0.0, 0.0, 0.0])
+        if type(c) is Colheita:
+            produtividade, producao, perda, prejuizo = c.produtividade, c.producao, c.perda, c.prejuizo
+        else:
+            produtividade, producao, perda, prejuizo = (c.get("produtividade"), c.get("producao"),
+                                                        c.get("perda"), c.get("prejuizo"))
+        if produtividade is not None:
+            lista.append(produtividade)
+        totais[0] += producao or 0
+        totais[1] += perda or 0
+        totais[2] += prejuizo or 0
 
     resultado: Dict[str, Dict[str, float]] = {}
-    for tipo, lista_produtividades in estatisticas_por_tipo.items():
+    for grupo in sorted(produtividades_por_grupo):
+        lista_produtividades = sorted(produtividades_por_grupo[grupo])
+        total_producao, total_perda, total_prejuizo = totais_por_grupo[grupo]
         if lista_produtividades:
             media = sum(lista_produtividades) / len(lista_produtividades)
-            resultado[tipo] = {"media_produtividade": round(media, 2), "registros": len(lista_produtividades)}
+            resultado[grupo] = {
+                "registros": len(lista_produtividades),
+                "media_produtividade": round(media, 2),
+                "min_produtividade": round(lista_produtividades[0], 2),
+                "max_produtividade": round(lista_produtividades[-1], 2),
+                "mediana_produtividade": round(_percentil(lista_produtividades, 0.5), 2),
+                "p10_produtividade": round(_percentil(lista_produtividades, 0.1), 2),
+                "p90_produtividade": round(_percentil(lista_produtividades, 0.9), 2),
+            }
         else:
-            resultado[tipo] = {"media_produtividade": 0.0, "registros": 0}
-
+            resultado[grupo] = {"media_produtividade": 0.0, "registros": 0}
+        resultado[grupo].update({
+            "total_producao": round(total_producao, 2),
+            "total_perda": round(total_perda, 2),
+            "total_prejuizo": round(total_prejuizo, 2),
+        })
     return resultado
 
 
-def alertar_colheitas_ineficientes(colheitas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Identifica colheitas com baixa produtividade e alto prejuízo."""
-    alertas: List[Dict[str, Any]] = []
+@cronometrar("funcoes.alertar_colheitas_ineficientes")
+def alertar_colheitas_ineficientes(colheitas: Union[List[Dict[str, Any]], "ColheitasColunares"]) -> List[Dict[str, Any]]:
+    """Identifica colheitas com baixa produtividade e alto prejuízo pelas regras de alerta (vetorizado para `ColheitasColunares`)."""
+    from regras import ARQUIVO_REGRAS, obter_regras # Importação local: regras.py importa este módulo
     if not colheitas:
         logging.warning("Nenhuma colheita para verificar alertas.")
-        return alertas
+        return []
 
-    logging.info("Verificando alertas com Limite Produtividade < %.2f t/ha e Limite Prejuízo > R$ %.2f",
-                 LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO)
+    regras = obter_regras()
+    logging.info("Verificando alertas pelas regras de %s (padrão: Produtividade < %.2f t/ha e Prejuízo > R$ %.2f)",
+                 ARQUIVO_REGRAS, LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO)
 
+    if _e_colunar(colheitas):
+        return colheitas.alertas_por_regras(regras)
+
+    limites = regras.limites
+    por_combinacao: Dict[Tuple[Any, Any], Tuple[str, float, float]] = {} # Regra de cada (talhão, tipo) já vista
+    alertas: List[Dict[str, Any]] = []
     for c in colheitas:
-        produtividade = c.get("produtividade", 0)
-        prejuizo = c.get("prejuizo", 0)
-        if produtividade < LIMITE_PRODUTIVIDADE and prejuizo > LIMITE_PREJUIZO:
+        if type(c) is Colheita:
+            chave, produtividade, prejuizo = (c.talhao, c.tipo_colheita), c.produtividade, c.prejuizo
+        else:
+            chave, produtividade, prejuizo = (c.get("talhao"), c.get("tipo_colheita")), c.get("produtividade"), c.get("prejuizo")
+        if produtividade is None or prejuizo is None: # Sem os valores, a colheita não dispara (como no SQL)
+            continue
+        regra = por_combinacao.get(chave)
+        if regra is None:
+            regra = por_combinacao[chave] = limites(*chave)
+        if produtividade < regra[1] and prejuizo > regra[2]:
             alertas.append(c)
 
     return alertas
\ No newline at end of file
@@ -1,38 +1,58 @@
 # Arquivo principal do sistema - main.py
 
 import logging
+from datetime import datetime
 from funcoes import (
     cadastrar_colheita,
     formatar_exibicao_colheitas,
     gerar_relatorio_txt,
     salvar_json,
+    salvar_colunar,
     gerar_relatorio_estatistico,
-    alertar_colheitas_ineficientes,
-    LIMITE_PRODUTIVIDADE,
-    LIMITE_PREJUIZO
+    alertar_colheitas_ineficientes
 )
 from oracle import (
-    salvar_colheita_oracle,
-    listar_colheitas_oracle # Agora retorna dados
+    iterar_colheitas_oracle,
+    listar_alertas_abertos_oracle,
+    resolver_alertas_oracle,
+    TAMANHO_PAGINA,
+    fechar_pool,
+    estatisticas_cache,
+    iniciar_aquecimento
 )
+from carga import carregar_arquivo, exibir_resumo_carga, TAMANHO_LOTE
+from diario import (
+    iniciar_descarregador,
+    parar_descarregador,
+    registrar_colheita,
+    forcar_envio,
+    exibir_situacao_diario
+)
+from metricas import exibir_metricas, salvar_snapshot, instalar_sinal_snapshot
 
 # Configuração básica do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.FileHandler("gestao_colheita.log"), logging.StreamHandler()])
 
 logging.info("Iniciando o Sistema de Gestão de Colheita...")
+instalar_sinal_snapshot() # `kill -USR1 <pid>` grava o retrato das métricas sem interromper o programa
+iniciar_descarregador() # Envia ao Oracle, em segundo plano, as colheitas registradas no diário local
+iniciar_aquecimento() # Abre a sessão Oracle enquanto o operador lê o menu (o driver é importado nessa thread)
 
 # Loop principal
 while True:
     print("\n=== SISTEMA DE GESTÃO DE COLHEITA DE CANA-DE-AÇÚCAR ===")
     # --- Textos do Menu Ajustados ---
-    print("1. Cadastrar nova colheita (e salvar no Oracle)") # Ajustado
+    print("1. Cadastrar nova colheita (envio ao Oracle em segundo plano)")
     print("2. Listar todas as colheitas (do Oracle)")      # Ajustado
     # --- Fim dos Ajustes no Menu ---
     print("3. Gerar relatório (.txt)")
-    print("4. Salvar dados (.json)")
-    print("5. Relatório estatístico por tipo de colheita")
+    print("4. Salvar dados (.json / .colh)")
+    print("5. Relatório estatístico (por tipo, talhão ou mês)")
     print("6. Alerta de colheitas ineficientes")
+    print("7. Carga em lote de arquivo (.json/.jsonl/.csv)")
+    print("8. Diário local: pendências de envio ao Oracle")
+    print("9. Métricas de desempenho da sessão")
     print("0. Sair")
 
     opcao = input("Escolha uma opção: ")
@@ -55,9 +75,9 @@ while True:
                     # DATA_COLETA é DEFAULT SYSDATE no Oracle
                 }
 
-                # Tenta salvar no Oracle
-                salvar_colheita_oracle(colheita_para_db) # Não retorna status aqui, apenas imprime
-                # A mensagem de sucesso/erro é impressa dentro de salvar_colheita_oracle
+                # Grava no diário local e retorna na hora; o envio ao Oracle é feito em segundo plano
+                registrar_colheita(colheita_para_db)
+                print("✅ Colheita registrada. O envio ao Oracle é feito em segundo plano (opção 8 mostra as pendências).")
 
         except Exception as e:
             logging.error("Erro inesperado na opção 1: %s", e, exc_info=True)
@@ -65,51 +85,75 @@ while True:
 
     elif opcao == "2": # Listar colheitas
         try:
-            colheitas_db = listar_colheitas_oracle()
-            formatar_exibicao_colheitas(colheitas_db)
+            # Filtros opcionais, aplicados diretamente na consulta ao Oracle
+            print("Filtros opcionais (Enter para ignorar):")
+            talhao = input("  Talhão: ").strip() or None
+            tipo = input("  Tipo de colheita (manual/mecanica): ").strip() or None
+            data_inicio_str = input("  Data inicial (AAAA-MM-DD): ").strip()
+            data_fim_str = input("  Data final (AAAA-MM-DD): ").strip()
+            data_inicio = datetime.strptime(data_inicio_str, "%Y-%m-%d").date() if data_inicio_str else None
+            data_fim = datetime.strptime(data_fim_str, "%Y-%m-%d").date() if data_fim_str else None
+
+            colheitas_db = iterar_colheitas_oracle(talhao, tipo, data_inicio, data_fim)
+            formatar_exibicao_colheitas(colheitas_db, linhas_por_pagina=TAMANHO_PAGINA)
+        except ValueError:
+            print("❌ Data inválida. Use o formato AAAA-MM-DD.")
         except Exception as e:
             logging.error("Erro inesperado na opção 2: %s", e, exc_info=True)
             print("❌ Ocorreu um erro inesperado ao listar colheitas.")
 
     elif opcao == "3": # Gerar TXT
         try:
-            colheitas_db = listar_colheitas_oracle()
-            if colheitas_db:
-                if gerar_relatorio_txt(colheitas_db): # Passa os dados lidos do Oracle
-                    print(f"✅ Relatório salvo em relatorio_colheita.txt")
-                else:
-                    print("❌ Falha ao gerar relatório TXT.")
+            # Linhas do Oracle são gravadas à medida que chegam (sem carregar a tabela inteira)
+            if gerar_relatorio_txt(iterar_colheitas_oracle()):
+                print(f"✅ Relatório salvo em relatorio_colheita.txt")
             else:
-                 print("ℹ️ Não há dados no Oracle para gerar o relatório.")
+                print("ℹ️ Relatório não gerado: não há dados no Oracle ou houve falha na escrita (veja o log).")
         except Exception as e:
             logging.error("Erro inesperado na opção 3: %s", e, exc_info=True)
             print("❌ Ocorreu um erro inesperado ao gerar relatório TXT.")
 
-    elif opcao == "4": # Salvar JSON
+    elif opcao == "4": # Salvar JSON ou colunar
         try:
-            colheitas_db = listar_colheitas_oracle()
-            if colheitas_db:
-                if salvar_json(colheitas_db): # Passa os dados lidos do Oracle
-                    print(f"✅ Dados salvos em dados_colheita.json")
-                else:
-                    print("❌ Falha ao salvar arquivo JSON.")
+            if input("Formato colunar binário (.colh, para análise offline)? (s/N): ").strip().lower() == "s":
+                nome_arquivo = "dados_colheita.colh"
+                salvo = salvar_colunar(iterar_colheitas_oracle(), nome_arquivo)
+            else:
+                formato = "jsonl" if input("Formato JSON Lines? (s/N): ").strip().lower() == "s" else "json"
+                comprimir = input("Compactar com gzip? (s/N): ").strip().lower() == "s"
+                nome_arquivo = "dados_colheita." + formato + (".gz" if comprimir else "")
+                salvo = salvar_json(iterar_colheitas_oracle(), nome_arquivo, formato=formato, comprimir=comprimir)
+            if salvo:
+                print(f"✅ Dados salvos em {nome_arquivo}")
             else:
-                 print("ℹ️ Não há dados no Oracle para salvar em JSON.")
+                print("ℹ️ Arquivo não gerado: não há dados no Oracle ou houve falha na escrita (veja o log).")
         except Exception as e:
             logging.error("Erro inesperado na opção 4: %s", e, exc_info=True)
-            print("❌ Ocorreu um erro inesperado ao salvar JSON.")
+            print("❌ Ocorreu um erro inesperado ao salvar os dados.")
 
     elif opcao == "5": # Relatório Estatístico
         try:
-            colheitas_db = listar_colheitas_oracle()
-            estatisticas = gerar_relatorio_estatistico(colheitas_db) # Passa os dados lidos do Oracle
+            agrupamentos = {"1": "tipo_colheita", "2": "talhao", "3": "mes"}
+            escolha = input("Agrupar por: 1) Tipo de colheita  2) Talhão  3) Mês (Enter = 1): ").strip() or "1"
+            agrupar_por = agrupamentos.get(escolha, "tipo_colheita")
+            # Sem detalhes, lê a tabela de resumo (instantâneo); com detalhes, agrega o histórico completo
+            detalhado = input("Incluir mediana e percentis (consulta completa)? (s/N): ").strip().lower() == "s"
+            estatisticas = gerar_relatorio_estatistico(agrupar_por=agrupar_por, detalhado=detalhado)
             if estatisticas:
-                print("\n📊 Relatório Estatístico de Produtividade (t/ha):")
-                for tipo, dados in estatisticas.items():
+                print(f"\n📊 Relatório Estatístico de Produtividade (t/ha) por {agrupar_por.replace('_', ' ')}:")
+                for grupo, dados in estatisticas.items():
                     if dados['registros'] > 0:
-                        print(f"  - {tipo.capitalize()}: Média {dados['media_produtividade']:.2f} (baseado em {dados['registros']} registros)")
+                        print(f"  - {grupo.capitalize()}: Média {dados['media_produtividade']:.2f} (baseado em {dados['registros']} registros)")
+                        if 'mediana_produtividade' in dados:
+                            print(f"      Mín {dados['min_produtividade']:.2f} | P10 {dados['p10_produtividade']:.2f} | "
+                                  f"Mediana {dados['mediana_produtividade']:.2f} | P90 {dados['p90_produtividade']:.2f} | "
+                                  f"Máx {dados['max_produtividade']:.2f}")
+                        else:
+                            print(f"      Mín {dados['min_produtividade']:.2f} | Máx {dados['max_produtividade']:.2f}")
+                        print(f"      Produção total {dados['total_producao']:.2f} t | Perda total {dados['total_perda']:.2f} t | "
+                              f"Prejuízo total R$ {dados['total_prejuizo']:.2f}")
                     else:
-                        print(f"  - {tipo.capitalize()}: Sem registros.")
+                        print(f"  - {grupo.capitalize()}: Sem registros.")
             else:
                 print("ℹ️ Não há dados suficientes no Oracle para gerar estatísticas.")
         except Exception as e:
@@ -118,25 +162,68 @@ while True:
 
     elif opcao == "6": # Alerta de Ineficiência
         try:
-            colheitas_db = listar_colheitas_oracle()
-            colheitas_alerta = alertar_colheitas_ineficientes(colheitas_db) # Passa os dados lidos do Oracle
-            if colheitas_alerta:
-                print("\n🚨 Alerta de Colheitas Ineficientes:")
-                print(f"   (Produtividade < {LIMITE_PRODUTIVIDADE:.2f} t/ha E Prejuízo > R$ {LIMITE_PREJUIZO:.2f})")
-                for c in colheitas_alerta:
-                     # Usa .get com default para evitar KeyError se a coluna não existir
-                     data_str = c.get('data_coleta').strftime('%Y-%m-%d') if c.get('data_coleta') else 'N/A'
-                     print(f"  - ID {c.get('id', 'N/A')} | Talhão {c.get('talhao', '')} ({data_str}) | Produt.: {c.get('produtividade', 0):.2f} t/ha | Prejuízo: R$ {c.get('prejuizo', 0):.2f}")
-            elif colheitas_db: # Só diz que não há alerta se houve dados para analisar
-                print("\n✅ Nenhuma colheita em situação crítica encontrada nos dados do Oracle.")
+            # Alertas gravados a cada INSERT pelas regras de regras_alerta.json: só os abertos são lidos
+            alertas_abertos = listar_alertas_abertos_oracle()
+            if alertas_abertos:
+                print(f"\n🚨 Alerta de Colheitas Ineficientes ({len(alertas_abertos)} abertos):")
+                for a in alertas_abertos:
+                    data_str = a['data_alerta'].strftime('%Y-%m-%d %H:%M') if a['data_alerta'] else 'N/A'
+                    limites = " E ".join(filter(None, [
+                        f"Produt. < {a['limite_produtividade']:.2f}" if a['limite_produtividade'] is not None else "",
+                        f"Prejuízo > R$ {a['limite_prejuizo']:.2f}" if a['limite_prejuizo'] is not None else "",
+                    ]))
+                    print(f"  - Alerta {a['id']} | Colheita {a['id_colheita']} | Talhão {a['talhao']} ({a['tipo_colheita']}, {data_str}) | "
+                          f"Produt.: {a['produtividade']:.2f} t/ha | Prejuízo: R$ {a['prejuizo']:.2f} | Regra {a['regra']}: {limites}")
+                resposta = input("IDs dos alertas a marcar como resolvidos (separados por vírgula, 't' para todos, Enter para nenhum): ").strip().lower()
+                if resposta:
+                    ids = None if resposta == "t" else [int(i) for i in resposta.replace(" ", "").split(",") if i]
+                    resolvidos = resolver_alertas_oracle(ids)
+                    if resolvidos is not None:
+                        print(f"✅ {resolvidos} alertas marcados como resolvidos.")
+            elif alertas_abertos is not None: # Só diz que não há alerta se a consulta foi feita
+                print("\n✅ Nenhum alerta aberto de colheita em situação crítica no Oracle.")
             else:
-                print("ℹ️ Não há dados no Oracle para verificar alertas.")
+                print("ℹ️ Não foi possível consultar o Oracle para verificar alertas.")
+        except ValueError:
+            print("❌ IDs inválidos: informe números separados por vírgula.")
         except Exception as e:
             logging.error("Erro inesperado na opção 6: %s", e, exc_info=True)
             print("❌ Ocorreu um erro inesperado ao verificar alertas.")
 
+    elif opcao == "7": # Carga em lote
+        try:
+            caminho = input("Caminho do arquivo de colheitas: ").strip()
+            lote_str = input(f"Registros por lote (Enter para {TAMANHO_LOTE}): ").strip()
+            tamanho_lote = int(lote_str) if lote_str else TAMANHO_LOTE
+            exibir_resumo_carga(carregar_arquivo(caminho, tamanho_lote))
+        except (OSError, ValueError) as e:
+            logging.error("Falha na carga em lote: %s", e)
+            print(f"❌ Não foi possível carregar o arquivo: {e}")
+        except Exception as e:
+            logging.error("Erro inesperado na opção 7: %s", e, exc_info=True)
+            print("❌ Ocorreu um erro inesperado durante a carga em lote.")
+
+    elif opcao == "8": # Diário local
+        try:
+            exibir_situacao_diario()
+            if input("Forçar envio agora? (s/N): ").strip().lower() == "s":
+                print(f"✅ {forcar_envio()} colheitas enviadas ao Oracle.")
+                exibir_situacao_diario()
+        except Exception as e:
+            logging.error("Erro inesperado na opção 8: %s", e, exc_info=True)
+            print("❌ Ocorreu um erro inesperado ao consultar o diário local.")
+
+    elif opcao == "9": # Métricas de desempenho
+        exibir_metricas()
+        arquivo = salvar_snapshot()
+        if arquivo:
+            print(f"✅ Métricas salvas em {arquivo}.")
+
     elif opcao == "0":
         print("Encerrando o programa...")
+        parar_descarregador() # Última tentativa de envio das pendências antes de sair
+        logging.info("Estatísticas do cache de consultas: %s", estatisticas_cache())
+        fechar_pool() # Encerra as conexões mantidas pelo pool Oracle
         logging.info("Sistema de Gestão de Colheita encerrado.")
         break
 
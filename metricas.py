@@ -0,0 +1,245 @@
+# Arquivo: metricas.py
+# Métricas de desempenho em memória (latência, linhas e bytes) e registro de consultas lentas
+
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+
+# Consultas acima deste tempo (ms) vão para o registro de consultas lentas
+LIMITE_CONSULTA_LENTA_MS = float(os.getenv("METRICAS_CONSULTA_LENTA_MS", 500))
+# Arquivo do registro de consultas lentas e do retrato das métricas gravado ao sair (vazio desativa)
+ARQUIVO_CONSULTAS_LENTAS = os.getenv("METRICAS_ARQUIVO_LENTAS", "consultas_lentas.log")
+ARQUIVO_METRICAS = os.getenv("METRICAS_ARQUIVO", "metricas_colheita.json")
+
+# Limites superiores (ms) das faixas do histograma de latência; a última faixa é "acima de 10 s"
+FAIXAS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_logger_lentas = logging.getLogger("colheita.consultas_lentas")
+
+
+class _Serie:
+    """Acumula as medições de uma operação: contagem, tempos, histograma, linhas e bytes."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.total_s = 0.0
+        self.min_s: Optional[float] = None
+        self.max_s = 0.0
+        self.faixas = [0] * (len(FAIXAS_MS) + 1)
+        self.linhas = 0
+        self.bytes = 0
+
+    def registrar(self, duracao: float, linhas: int, bytes_: int, erro: bool) -> None:
+        self.chamadas += 1
+        self.erros += erro
+        self.total_s += duracao
+        self.min_s = duracao if self.min_s is None else min(self.min_s, duracao)
+        self.max_s = max(self.max_s, duracao)
+        self.faixas[bisect.bisect_left(FAIXAS_MS, duracao * 1000)] += 1
+        self.linhas += linhas
+        self.bytes += bytes_
+
+    def percentil_ms(self, fracao: float) -> Optional[float]:
+        """Estimativa pelo histograma: limite superior da faixa que contém o percentil (no máximo o maior tempo)."""
+        alvo = fracao * self.chamadas
+        acumulado = 0
+        for posicao, quantidade in enumerate(self.faixas):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                maximo = round(self.max_s * 1000, 3)
+                return min(float(FAIXAS_MS[posicao]), maximo) if posicao < len(FAIXAS_MS) else maximo
+        return None
+
+    def resumo(self) -> Dict[str, Any]:
+        rotulos = [f"<={limite}ms" for limite in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}ms"]
+        return {
+            "chamadas": self.chamadas,
+            "erros": self.erros,
+            "total_s": round(self.total_s, 6),
+            "media_ms": round(self.total_s / self.chamadas * 1000, 3) if self.chamadas else None,
+            "min_ms": round(self.min_s * 1000, 3) if self.min_s is not None else None,
+            "max_ms": round(self.max_s * 1000, 3),
+            "p50_ms": self.percentil_ms(0.50),
+            "p95_ms": self.percentil_ms(0.95),
+            "p99_ms": self.percentil_ms(0.99),
+            "linhas": self.linhas,
+            "bytes": self.bytes,
+            "histograma": {rotulo: quantidade for rotulo, quantidade in zip(rotulos, self.faixas) if quantidade},
+        }
+
+
+_series: Dict[str, _Serie] = {}
+_lock = threading.Lock()
+_inicio = time.time()
+
+
+class Medicao:
+    """Medição em andamento: quem mede preenche `linhas`, `bytes` e, se a falha foi tratada, `erro`."""
+
+    __slots__ = ("nome", "linhas", "bytes", "erro")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.linhas = 0
+        self.bytes = 0
+        self.erro = False
+
+
+def registrar(nome: str, duracao: float, linhas: int = 0, bytes_: int = 0, erro: bool = False) -> None:
+    """Registra uma medição já feita (duração em segundos) na série `nome`."""
+    with _lock:
+        serie = _series.get(nome)
+        if serie is None:
+            serie = _series[nome] = _Serie()
+        serie.registrar(duracao, linhas, bytes_, erro)
+
+
+@contextmanager
+def medir(nome: str) -> Iterator[Medicao]:
+    """Mede o bloco na série `nome`; exceções contam como erro e são propagadas."""
+    medicao = Medicao(nome)
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield medicao
+    except BaseException:
+        erro = True
+        raise
+    finally:
+        registrar(nome, time.perf_counter() - inicio, medicao.linhas, medicao.bytes, erro or medicao.erro)
+
+
+@contextmanager
+def medir_sql(nome: str, sql: str) -> Iterator[Medicao]:
+    """Mede a execução de um comando SQL (e a leitura das linhas, se feita no bloco) na série `sql.<nome>`.
+
+    Acima de `LIMITE_CONSULTA_LENTA_MS`, o comando vai para o registro de consultas lentas.
+    """
+    inicio = time.perf_counter()
+    with medir(f"sql.{nome}") as medicao:
+        try:
+            yield medicao
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            if duracao_ms > LIMITE_CONSULTA_LENTA_MS:
+                _registrar_consulta_lenta(nome, sql, duracao_ms, medicao.linhas)
+
+
+def cronometrar(nome: Optional[str] = None) -> Callable:
+    """Decorador: mede cada chamada da função (série `nome` ou `modulo.funcao`)."""
+    def decorador(funcao: Callable) -> Callable:
+        serie = nome or f"{funcao.__module__}.{funcao.__name__}"
+
+        @functools.wraps(funcao)
+        def envolvida(*args: Any, **kwargs: Any) -> Any:
+            with medir(serie):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def _registrar_consulta_lenta(nome: str, sql: str, duracao_ms: float, linhas: int) -> None:
+    """Grava o comando lento (em uma linha) no arquivo de consultas lentas e no log da aplicação."""
+    if ARQUIVO_CONSULTAS_LENTAS and not _logger_lentas.handlers:
+        with _lock:
+            if not _logger_lentas.handlers: # Arquivo aberto só na primeira consulta lenta
+                handler = logging.FileHandler(ARQUIVO_CONSULTAS_LENTAS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+                _logger_lentas.addHandler(handler)
+    _logger_lentas.warning("Consulta lenta '%s': %.1f ms, %d linhas | %s", nome, duracao_ms, linhas, " ".join(sql.split()))
+
+
+def snapshot() -> Dict[str, Any]:
+    """Retrato das métricas acumuladas desde o início do processo (ou desde `zerar`)."""
+    with _lock:
+        operacoes = {nome: serie.resumo() for nome, serie in sorted(_series.items())}
+    return {
+        "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_inicio)),
+        "momento": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "limite_consulta_lenta_ms": LIMITE_CONSULTA_LENTA_MS,
+        "operacoes": operacoes,
+    }
+
+
+def salvar_snapshot(nome_arquivo: Optional[str] = None) -> Optional[str]:
+    """Grava o retrato das métricas em JSON (padrão: METRICAS_ARQUIVO); retorna o caminho ou None se falhar."""
+    nome_arquivo = nome_arquivo or ARQUIVO_METRICAS
+    if not nome_arquivo:
+        return None
+    temporario = f"{nome_arquivo}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(snapshot(), f, indent=4, ensure_ascii=False)
+        os.replace(temporario, nome_arquivo)
+        return nome_arquivo
+    except OSError as e:
+        logging.error("Erro ao salvar métricas em '%s': %s", nome_arquivo, e, exc_info=True)
+        return None
+
+
+def zerar() -> None:
+    """Descarta todas as medições acumuladas."""
+    global _inicio
+    with _lock:
+        _series.clear()
+        _inicio = time.time()
+
+
+def exibir_metricas(prefixos: Optional[List[str]] = None) -> None:
+    """Imprime uma tabela com as operações medidas (opcionalmente só as que começam com `prefixos`)."""
+    operacoes = snapshot()["operacoes"]
+    if prefixos:
+        operacoes = {nome: dados for nome, dados in operacoes.items() if nome.startswith(tuple(prefixos))}
+    if not operacoes:
+        print("ℹ️ Nenhuma operação medida ainda.")
+        return
+    print(f"\n⏱️ {'Operação':<44} {'Chamadas':>8} {'Média':>10} {'P95':>10} {'Máx':>10} {'Linhas':>10} {'Bytes':>12}")
+    for nome, dados in operacoes.items():
+        print(f"   {nome:<44} {dados['chamadas']:>8} {dados['media_ms']:>8.1f}ms {dados['p95_ms'] or 0:>8.1f}ms "
+              f"{dados['max_ms']:>8.1f}ms {dados['linhas']:>10} {dados['bytes']:>12}")
+
+
+# Pedido de retrato feito pelo sinal: o handler roda na thread principal, possivelmente no meio de um
+# `registrar()` com `_lock` tomado, então ele só avisa a thread abaixo, que grava o arquivo
+_pedido_snapshot = threading.Event()
+_thread_snapshot: Optional[threading.Thread] = None
+
+
+def _atender_pedidos_snapshot() -> None:
+    """Grava o retrato das métricas a cada pedido do sinal SIGUSR1 (thread em segundo plano)."""
+    while True:
+        _pedido_snapshot.wait()
+        _pedido_snapshot.clear()
+        salvar_snapshot()
+
+
+def instalar_sinal_snapshot() -> bool:
+    """Faz o sinal SIGUSR1 gravar o retrato das métricas (só no Unix e na thread principal)."""
+    global _thread_snapshot
+    if not hasattr(signal, "SIGUSR1") or threading.current_thread() is not threading.main_thread():
+        return False
+    if _thread_snapshot is None:
+        _thread_snapshot = threading.Thread(target=_atender_pedidos_snapshot, name="snapshot-metricas", daemon=True)
+        _thread_snapshot.start()
+    signal.signal(signal.SIGUSR1, lambda *_: _pedido_snapshot.set())
+    return True
+
+
+def _salvar_ao_sair() -> None:
+    """Grava o retrato das métricas no encerramento do processo, se algo foi medido."""
+    if _series:
+        salvar_snapshot()
+
+
+atexit.register(_salvar_ao_sair)
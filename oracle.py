@@ -1,10 +1,36 @@
-from typing import Optional, List, Dict, Any
-import oracledb
+from __future__ import annotations # Anotações com tipos do oracledb não forçam a importação do driver
+
+from typing import Optional, List, Dict, Any, Callable, Generator, Iterable, Iterator, Tuple, TYPE_CHECKING
+from datetime import date, datetime, timedelta
+import importlib
 import os
-from dotenv import load_dotenv
+import threading
 import logging
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+from cache import CacheConsultas
+from metricas import Medicao, cronometrar, medir, medir_sql
+from registro import Colheita
+from regras import limite_gravavel, obter_regras
+
+
+
+class _ImportacaoTardia:
+    """Adia a importação de um módulo pesado até o primeiro acesso a um de seus atributos."""
+
+    def __init__(self, nome: str):
+        self._nome = nome
 
-load_dotenv()
+    def __getattr__(self, atributo: str) -> Any:
+        modulo = importlib.import_module(self._nome) # Thread-safe: o import tem lock por módulo
+        return getattr(modulo, atributo)
+
+
+if TYPE_CHECKING:
+    import oracledb
+    from colunar import ColheitasColunares
+else:
+    # O driver (e a pilha de criptografia que ele carrega) só é importado na primeira operação de banco
+    oracledb = _ImportacaoTardia("oracledb")
 
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -14,50 +40,244 @@ DB_SID = os.getenv("DB_SID")
 # Verifica se todas as variáveis foram carregadas antes de montar o DSN
 DSN = f"{DB_HOST}:{DB_PORT}/{DB_SID}" if all([DB_HOST, DB_PORT, DB_SID]) else None
 
-def get_connection() -> Optional[oracledb.Connection]:
-    """Tenta estabelecer uma conexão com o banco de dados Oracle."""
+# Configurações do pool de conexões (valores padrão caso não definidos no .env)
+POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", 4))
+POOL_INCREMENT = int(os.getenv("DB_POOL_INCREMENT", 1))
+# Segundos de ociosidade após os quais a conexão é testada (ping) ao ser emprestada; 0 testa sempre
+POOL_PING_INTERVAL = int(os.getenv("DB_POOL_PING_INTERVAL", 60))
+# Tempo máximo (ms) de espera por uma conexão livre quando o pool está no limite
+POOL_WAIT_TIMEOUT = int(os.getenv("DB_POOL_WAIT_TIMEOUT", 5000))
+
+# Abre a sessão Oracle em segundo plano ao iniciar o menu (0 desativa)
+AQUECER_CONEXAO = os.getenv("DB_AQUECER_CONEXAO", "1") == "1"
+
+# Registros buscados por página na listagem paginada
+TAMANHO_PAGINA = int(os.getenv("DB_TAMANHO_PAGINA", 500))
+
+# Pool compartilhado por todo o processo (criado na primeira utilização)
+_pool: Optional[oracledb.ConnectionPool] = None
+_pool_lock = threading.Lock()
+_pool_contadores = {"emprestimos": 0, "esperas": 0, "tempos_esgotados": 0, "falhas": 0}
+
+# Fábrica alternativa de conexões (ex.: banco local dos benchmarks); quando definida, substitui o pool
+_fabrica_conexoes: Optional[Callable[[], Any]] = None
+
+
+def mostrar_falha_conexao(erro: Exception) -> None:
+    """Registra e exibe uma falha de conexão com o Oracle."""
+    logging.error("Falha ao conectar ao Oracle. DSN: %s, User: %s. Erro: %s", DSN, DB_USER, erro, exc_info=True)
+    print(f"❌ Falha ao conectar ao Oracle (Host: {DB_HOST}, Porta: {DB_PORT}, SID: {DB_SID}).")
+    print("   Verifique se o banco está em execução, se as credenciais no .env estão corretas e se a rede está ok.")
+    print(f"   Detalhe do erro Oracle: {erro}") # Mostra o detalhe do erro Oracle
+
+
+def get_pool(silencioso: bool = False) -> Optional[oracledb.ConnectionPool]:
+    """Retorna o pool de conexões do processo, criando-o na primeira chamada (`silencioso`: erros só no log)."""
+    global _pool
+    if _pool is not None:
+        return _pool
     if not DSN:
         logging.error("Credenciais do banco de dados não configuradas corretamente no .env (HOST, PORT ou SID faltando).")
-        print("❌ Credenciais do banco de dados não configuradas corretamente no .env")
+        if not silencioso:
+            print("❌ Credenciais do banco de dados não configuradas corretamente no .env")
         return None
+    with _pool_lock:
+        if _pool is None: # Outra thread pode ter criado o pool enquanto esperávamos o lock
+            _pool = oracledb.create_pool(
+                user=DB_USER, password=DB_PASSWORD, dsn=DSN,
+                min=POOL_MIN, max=POOL_MAX, increment=POOL_INCREMENT,
+                ping_interval=POOL_PING_INTERVAL,
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=POOL_WAIT_TIMEOUT
+            )
+            logging.info("Pool de conexões Oracle criado (min=%d, max=%d, incremento=%d).",
+                         POOL_MIN, POOL_MAX, POOL_INCREMENT)
+    return _pool
+
+
+@cronometrar("oracle.get_connection")
+def get_connection(silencioso: bool = False) -> Optional[oracledb.Connection]:
+    """Empresta uma conexão do pool Oracle (devolvida ao pool com `close()`).
+
+    Com `silencioso=True` (tarefas em segundo plano), as falhas vão só para o log, sem escrever no console.
+    """
+    if _fabrica_conexoes is not None:
+        return _fabrica_conexoes()
     try:
-        # Tenta conectar usando as credenciais carregadas
-        conexao = oracledb.connect(user=DB_USER, password=DB_PASSWORD, dsn=DSN)
-        logging.info("Conexão com Oracle estabelecida.")
+        pool = get_pool(silencioso)
+        if not pool:
+            return None
+        with _pool_lock:
+            _pool_contadores["emprestimos"] += 1
+            if pool.busy >= pool.max: # Todas as conexões em uso: o pedido vai esperar
+                _pool_contadores["esperas"] += 1
+        # O pool verifica a saúde da sessão (ping) antes de entregá-la, conforme POOL_PING_INTERVAL
+        conexao = pool.acquire()
         # Não imprime sucesso aqui para não poluir a saída das funções principais
         return conexao
     except oracledb.Error as erro: # Captura erros específicos do oracledb
-        # Loga o erro detalhado
-        logging.error("Falha ao conectar ao Oracle. DSN: %s, User: %s. Erro: %s", DSN, DB_USER, erro, exc_info=True)
-        # Imprime mensagem mais amigável para o usuário
-        print(f"❌ Falha ao conectar ao Oracle (Host: {DB_HOST}, Porta: {DB_PORT}, SID: {DB_SID}).")
-        print("   Verifique se o banco está em execução, se as credenciais no .env estão corretas e se a rede está ok.")
-        print(f"   Detalhe do erro Oracle: {erro}") # Mostra o detalhe do erro Oracle
+        with _pool_lock:
+            # DPY-4005: tempo de espera por uma conexão livre esgotado
+            if "DPY-4005" in str(erro):
+                _pool_contadores["tempos_esgotados"] += 1
+            else:
+                _pool_contadores["falhas"] += 1
+        if silencioso:
+            logging.error("Falha ao conectar ao Oracle. DSN: %s, User: %s. Erro: %s", DSN, DB_USER, erro)
+        else:
+            mostrar_falha_conexao(erro)
         return None
     except Exception as e: # Captura outros erros inesperados
         logging.error("Erro inesperado ao tentar conectar ao Oracle: %s", e, exc_info=True)
-        print(f"❌ Ocorreu um erro inesperado durante a conexão: {e}")
+        if not silencioso:
+            print(f"❌ Ocorreu um erro inesperado durante a conexão: {e}")
+        return None
+
+
+def estatisticas_pool() -> Dict[str, int]:
+    """Retorna o estado atual do pool (conexões abertas/em uso) e os contadores acumulados."""
+    with _pool_lock:
+        estatisticas = dict(_pool_contadores)
+    estatisticas["abertas"] = _pool.opened if _pool else 0
+    estatisticas["em_uso"] = _pool.busy if _pool else 0
+    return estatisticas
+
+
+def fechar_pool() -> None:
+    """Fecha o pool de conexões do processo (chamado no encerramento do programa)."""
+    global _pool
+    if _pool is None:
+        return
+    logging.info("Estatísticas do pool Oracle: %s", estatisticas_pool())
+    with _pool_lock:
+        pool, _pool = _pool, None
+    try:
+        pool.close(force=True) # Encerra também conexões que ainda estejam emprestadas
+        logging.info("Pool de conexões Oracle fechado.")
+    except oracledb.Error as erro:
+        logging.error("Erro ao fechar o pool de conexões Oracle: %s", erro, exc_info=True)
+
+
+def aquecer_conexao() -> None:
+    """Importa o driver, cria o pool e abre uma sessão, deixando-a pronta para a primeira operação.
+
+    Não exibe nada: falhas vão só para o log, e a primeira operação de banco tenta de novo (mostrando o erro).
+    """
+    try:
+        with medir("oracle.aquecimento"):
+            conexao = get_pool().acquire()
+            conexao.ping()
+            conexao.close() # Devolve a sessão, já aberta, ao pool
+        logging.info("Conexão Oracle aquecida em segundo plano.")
+    except Exception as erro:
+        logging.warning("Não foi possível aquecer a conexão Oracle em segundo plano: %s", erro)
+
+
+def iniciar_aquecimento() -> Optional[threading.Thread]:
+    """Executa `aquecer_conexao` em uma thread (se DB_AQUECER_CONEXAO=1 e o .env tiver o DSN)."""
+    if not AQUECER_CONEXAO or not DSN or _fabrica_conexoes is not None:
+        return None
+    thread = threading.Thread(target=aquecer_conexao, name="aquecimento-oracle", daemon=True)
+    thread.start()
+    return thread
+
+
+def definir_fabrica_conexoes(fabrica: Optional[Callable[[], Any]]) -> None:
+    """Faz `get_connection` usar `fabrica` no lugar do pool Oracle (None volta a usar o pool).
+
+    A conexão criada deve seguir a API do python-oracledb (cursor, commit, rollback, close) e
+    lançar `oracledb.Error` nas falhas, como a de `banco_local.py`. O cache de consultas é descartado.
+    """
+    global _fabrica_conexoes
+    _fabrica_conexoes = fabrica
+    invalidar_cache()
+
+
+def _versao_colheitas() -> Optional[Tuple[Any, Any]]:
+    """Retorna (MAX(ID), COUNT(*)) de COLHEITA_CANA, usado para revalidar o cache de forma barata."""
+    conexao = get_connection()
+    if not conexao:
         return None
+    try:
+        sql = "SELECT MAX(ID), COUNT(*) FROM COLHEITA_CANA"
+        with conexao.cursor() as cursor, medir_sql("versao_colheitas", sql):
+            cursor.execute(sql)
+            return tuple(cursor.fetchone())
+    except oracledb.Error as erro_db:
+        logging.warning("Não foi possível verificar a versão dos dados para o cache: %s", erro_db)
+        return None
+    finally:
+        conexao.close()
+
+
+# Cache das leituras feitas pelas opções do menu, compartilhado durante a sessão
+_cache = CacheConsultas(
+    ttl_segundos=float(os.getenv("CACHE_TTL", 300)),
+    max_entradas=int(os.getenv("CACHE_MAX_ENTRADAS", 32)),
+    versao_dados=_versao_colheitas if os.getenv("CACHE_REVALIDAR", "1") == "1" else None,
+)
+
+
+def estatisticas_cache() -> Dict[str, int]:
+    """Retorna os contadores do cache de consultas (acertos, falhas, revalidações...)."""
+    return _cache.estatisticas()
+
+
+def invalidar_cache() -> None:
+    """Descarta os resultados em cache (usado após gravações feitas fora de `confirmar_transacao`)."""
+    _cache.invalidar()
+
+
+def confirmar_transacao(conexao: oracledb.Connection) -> None:
+    """Confirma (commit) a transação e invalida o cache de consultas.
+
+    Toda função que grava no banco deve confirmar por aqui para que leituras seguintes vejam os dados novos.
+    """
+    with medir("oracle.commit"):
+        conexao.commit()
+    invalidar_cache()
+
+
+def _materializar(cursor: oracledb.Cursor, consulta: Medicao) -> List[Colheita]:
+    """Lê as linhas do cursor como registros `Colheita`, medindo a leitura em `linhas.<nome>`.
+
+    O SELECT precisa trazer as colunas na ordem de `registro.CAMPOS_COLHEITA` (ID, TALHAO, ..., DATA_COLETA).
+    """
+    with medir(consulta.nome.replace("sql.", "linhas.", 1)) as leitura:
+        # O driver monta cada registro direto da tupla da linha (sem dicionário intermediário)
+        cursor.rowfactory = Colheita
+        resultados = cursor.fetchall()
+        leitura.linhas = consulta.linhas = len(resultados)
+    return resultados
+
+
+SQL_LISTAR_COLHEITAS = "SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA FROM COLHEITA_CANA ORDER BY DATA_COLETA DESC, TALHAO ASC"
 
 
-def listar_colheitas_oracle() -> List[Dict[str, Any]]:
-    """Busca todos os registros de colheita do banco de dados Oracle."""
-    sql = "SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA FROM COLHEITA_CANA ORDER BY DATA_COLETA DESC, TALHAO ASC"
+def listar_colheitas_oracle() -> List[Colheita]:
+    """Busca todos os registros de colheita do banco de dados Oracle (resultado em cache na sessão)."""
+    return _cache.obter("colheitas", buscar_colheitas_oracle) or []
+
+
+def buscar_colheitas_oracle() -> Optional[List[Colheita]]:
+    """Consulta todos os registros de colheita no Oracle, sem cache; retorna None se a consulta falhar.
+
+    Diferente de `listar_colheitas_oracle`, distingue tabela vazia ([]) de Oracle indisponível (None).
+    """
+    sql = SQL_LISTAR_COLHEITAS
     conexao = None # Inicializa como None
     cursor = None # Inicializa como None
-    resultados = []
+    resultados = None
     try:
         conexao = get_connection()
         if not conexao:
             # Mensagem de erro já foi impressa por get_connection
-            return []  # Retorna lista vazia se não conectar
+            return None
 
         cursor = conexao.cursor()
-        cursor.execute(sql)
-        # Pega os nomes das colunas do cursor para usar como chaves do dicionário
-        colunas = [col[0].lower() for col in cursor.description]
-        # Cria uma lista de dicionários, mapeando colunas para valores de cada linha
-        resultados = [dict(zip(colunas, row)) for row in cursor]
+        with medir_sql("listar_colheitas", sql) as consulta:
+            cursor.execute(sql)
+            resultados = _materializar(cursor, consulta)
         logging.info("Consulta ao Oracle retornou %d registros.", len(resultados))
 
     except oracledb.Error as erro_db:
@@ -71,11 +291,541 @@ def listar_colheitas_oracle() -> List[Dict[str, Any]]:
         if cursor:
             cursor.close()
         if conexao:
-            conexao.close()
-            logging.info("Conexão com Oracle fechada após consulta.")
+            conexao.close() # Em conexões do pool, close() devolve a sessão ao pool
+            logging.info("Conexão devolvida ao pool após consulta.")
     return resultados
 
 
+def colheitas_colunares_oracle() -> Optional[ColheitasColunares]:
+    """Carrega COLHEITA_CANA direto do cursor para o formato colunar (`colunar.ColheitasColunares`).
+
+    Retorna None se não for possível consultar o banco.
+    """
+    from colunar import ColheitasColunares, TAMANHO_BLOCO # Importação local: NumPy só é exigido aqui
+    sql = "SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA FROM COLHEITA_CANA"
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        cursor.arraysize = 5000 # Leituras grandes: menos idas ao banco por bloco
+        with medir_sql("colheitas_colunares", sql) as consulta:
+            cursor.execute(sql)
+            with medir("linhas.colheitas_colunares") as leitura:
+                dados = ColheitasColunares.de_cursor(cursor, TAMANHO_BLOCO)
+                leitura.linhas = consulta.linhas = len(dados)
+        logging.info("Carga colunar do Oracle retornou %d registros.", len(dados))
+        return dados
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar dados no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+def iterar_colheitas_oracle(talhao: Optional[str] = None, tipo_colheita: Optional[str] = None,
+                            data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                            tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[Colheita]:
+    """Percorre as colheitas do Oracle página a página (gerador), aplicando os filtros no WHERE.
+
+    Usa paginação por chave (keyset) em (DATA_COLETA, ID), do mais recente para o mais antigo, pelo
+    índice IDX_COLHEITA_DATA_ID: cada página continua a partir da última linha lida, sem OFFSET e sem
+    manter a tabela em memória. Colheitas sem DATA_COLETA vêm por último. As datas são inclusivas;
+    `data_fim` considera o dia inteiro. Sem conexão, não gera nada; uma falha do Oracle no meio da
+    leitura é propagada (`oracledb.Error`), para que uma exportação não seja gravada pela metade.
+    """
+    filtros = []
+    parametros: Dict[str, Any] = {"tamanho_pagina": tamanho_pagina}
+    if talhao:
+        filtros.append("TALHAO = :talhao")
+        parametros["talhao"] = talhao.strip().upper()
+    if tipo_colheita:
+        filtros.append("TIPO_COLHEITA = :tipo_colheita")
+        parametros["tipo_colheita"] = tipo_colheita.strip().lower()
+    if data_inicio:
+        filtros.append("DATA_COLETA >= :data_inicio")
+        parametros["data_inicio"] = data_inicio
+    if data_fim:
+        filtros.append("DATA_COLETA < :data_fim")
+        # Limite exclusivo no dia seguinte, para incluir todo o dia final
+        parametros["data_fim"] = datetime.combine(data_fim, datetime.min.time()) + timedelta(days=1)
+
+    def montar_sql(continuacao: bool) -> str:
+        condicoes = list(filtros)
+        if continuacao and "ultima_data" in parametros:
+            condicoes.append("(DATA_COLETA < :ultima_data OR (DATA_COLETA = :ultima_data AND ID < :ultimo_id) "
+                             "OR DATA_COLETA IS NULL)")
+        elif continuacao:
+            # Já nas linhas sem data (as últimas da ordenação): segue só pelo ID
+            condicoes.append("DATA_COLETA IS NULL AND ID < :ultimo_id")
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return (f"SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA "
+                f"FROM COLHEITA_CANA {where} ORDER BY DATA_COLETA DESC NULLS LAST, ID DESC "
+                f"FETCH FIRST :tamanho_pagina ROWS ONLY")
+
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return
+
+        cursor = conexao.cursor()
+        # Uma página inteira por ida ao banco: +1 no prefetch evita uma ida extra para detectar o fim
+        cursor.arraysize = tamanho_pagina
+        cursor.prefetchrows = tamanho_pagina + 1
+        sql = montar_sql(continuacao=False)
+        total = 0
+        while True:
+            with medir_sql("iterar_colheitas_pagina", sql) as consulta:
+                cursor.execute(sql, parametros)
+                cursor.rowfactory = Colheita
+                linhas = cursor.fetchall()
+                consulta.linhas = len(linhas)
+            yield from linhas
+            total += len(linhas)
+            if len(linhas) < tamanho_pagina:
+                break
+            # Próxima página começa após a última linha desta (chave DATA_COLETA, ID)
+            parametros["ultimo_id"] = linhas[-1].id
+            if linhas[-1].data_coleta is None:
+                parametros.pop("ultima_data", None)
+            else:
+                parametros["ultima_data"] = linhas[-1].data_coleta
+            sql = montar_sql(continuacao=True)
+        logging.info("Listagem paginada do Oracle percorreu %d registros.", total)
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar dados no Oracle: {erro_db}")
+        raise # Quem grava um arquivo com estas linhas não pode dá-lo por completo
+    finally:
+        # Executado também quando o consumidor interrompe o gerador (close)
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+# Colheitas posteriores a uma marca (DATA_COLETA, ID), em ordem crescente, para a exportação incremental.
+# A continuação repete a condição de início em DATA_COLETA para que o Oracle percorra só a faixa
+# nova do índice IDX_COLHEITA_DATA_ID (o OR sozinho costuma virar varredura completa).
+SQL_COLHEITAS_NOVAS = """
+    SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA
+    FROM COLHEITA_CANA
+    WHERE DATA_COLETA < :corte {continuacao}
+    ORDER BY DATA_COLETA, ID
+    FETCH FIRST :tamanho_pagina ROWS ONLY
+"""
+_CONTINUACAO_COLHEITAS_NOVAS = "AND DATA_COLETA >= :ultima_data AND (DATA_COLETA > :ultima_data OR ID > :ultimo_id)"
+
+
+def iterar_colheitas_novas_oracle(desde: Optional[Tuple[datetime, int]], corte: datetime,
+                                  tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[Colheita]:
+    """Percorre, em ordem crescente de (DATA_COLETA, ID), as colheitas após a marca `desde` e antes de `corte`.
+
+    Sem `desde`, começa pela mais antiga. Linhas sem DATA_COLETA não entram (a aplicação sempre grava uma data).
+    Uma falha do Oracle no meio da leitura é propagada (`oracledb.Error`), sem avançar a marca da exportação.
+    """
+    parametros: Dict[str, Any] = {"corte": corte, "tamanho_pagina": tamanho_pagina}
+    if desde:
+        parametros["ultima_data"], parametros["ultimo_id"] = desde
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return
+
+        cursor = conexao.cursor()
+        cursor.arraysize = tamanho_pagina
+        cursor.prefetchrows = tamanho_pagina + 1
+        total = 0
+        while True:
+            sql = SQL_COLHEITAS_NOVAS.format(continuacao=_CONTINUACAO_COLHEITAS_NOVAS if "ultimo_id" in parametros else "")
+            with medir_sql("colheitas_novas_pagina", sql) as consulta:
+                cursor.execute(sql, parametros)
+                cursor.rowfactory = Colheita
+                linhas = cursor.fetchall()
+                consulta.linhas = len(linhas)
+            yield from linhas
+            total += len(linhas)
+            if len(linhas) < tamanho_pagina:
+                break
+            parametros["ultima_data"], parametros["ultimo_id"] = linhas[-1].data_coleta, linhas[-1].id
+        logging.info("Exportação incremental leu %d colheitas novas do Oracle.", total)
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar dados no Oracle: {erro_db}")
+        raise # Quem grava um arquivo com estas linhas não pode dá-lo por completo
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+# Expressões SQL usadas em cada agrupamento das estatísticas
+AGRUPAMENTOS_SQL = {
+    "tipo_colheita": "TIPO_COLHEITA",
+    "talhao": "TALHAO",
+    "mes": "NVL(TO_CHAR(DATA_COLETA, 'YYYY-MM'), 'N/A')",
+}
+
+
+def estatisticas_colheitas_oracle(agrupar_por: str = "tipo_colheita") -> Optional[Dict[str, Dict[str, float]]]:
+    """Calcula no próprio Oracle (GROUP BY) as estatísticas de produtividade e os totais por grupo.
+
+    `agrupar_por` aceita 'tipo_colheita', 'talhao' ou 'mes' (mês de DATA_COLETA).
+    Retorna None se não for possível consultar o banco. O resultado fica em cache na sessão.
+    """
+    return _cache.obter(("estatisticas", agrupar_por), lambda: _estatisticas_colheitas_oracle(agrupar_por))
+
+
+def sql_estatisticas(agrupar_por: str) -> str:
+    """Monta a consulta de agregação por grupo usada pelas estatísticas (síncronas e assíncronas)."""
+    expressao = AGRUPAMENTOS_SQL[agrupar_por]
+    return f"""
+        SELECT {expressao} AS GRUPO,
+               COUNT(PRODUTIVIDADE),
+               AVG(PRODUTIVIDADE),
+               MIN(PRODUTIVIDADE),
+               MAX(PRODUTIVIDADE),
+               PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY PRODUTIVIDADE),
+               PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY PRODUTIVIDADE),
+               PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY PRODUTIVIDADE),
+               SUM(PRODUCAO),
+               SUM(PERDA),
+               SUM(PREJUIZO)
+          FROM COLHEITA_CANA
+         GROUP BY {expressao}
+         ORDER BY 1
+    """
+
+
+def montar_estatisticas(linhas: Iterable[Tuple[Any, ...]]) -> Dict[str, Dict[str, float]]:
+    """Converte as linhas de `sql_estatisticas` no dicionário {grupo: {campo: valor}}."""
+    resultado: Dict[str, Dict[str, float]] = {}
+    for grupo, registros, *valores in linhas:
+        resultado[grupo] = dict(zip(CAMPOS_ESTATISTICA, [registros] + [round(v or 0.0, 2) for v in valores]))
+    return resultado
+
+
+def _estatisticas_colheitas_oracle(agrupar_por: str) -> Optional[Dict[str, Dict[str, float]]]:
+    """Executa a agregação por grupo no Oracle (ver `estatisticas_colheitas_oracle`)."""
+    sql = sql_estatisticas(agrupar_por)
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        with medir_sql(f"estatisticas_{agrupar_por}", sql) as consulta:
+            cursor.execute(sql)
+            resultado = montar_estatisticas(cursor)
+            consulta.linhas = len(resultado)
+        logging.info("Estatísticas por %s calculadas no Oracle (%d grupos).", agrupar_por, len(resultado))
+        return resultado
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao calcular estatísticas no Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao calcular estatísticas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+# Ordem dos campos retornados para cada grupo nas estatísticas
+CAMPOS_ESTATISTICA = (
+    "registros", "media_produtividade", "min_produtividade", "max_produtividade",
+    "mediana_produtividade", "p10_produtividade", "p90_produtividade",
+    "total_producao", "total_perda", "total_prejuizo",
+)
+
+
+# Consulta de alertas: os limites vão como variáveis de ligação (bind) e o filtro
+# é atendido pelo índice IDX_COLHEITA_PROD_PREJ (PRODUTIVIDADE, PREJUIZO)
+SQL_ALERTAS = """
+    SELECT ID, TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA, PRODUTIVIDADE, PREJUIZO, DATA_COLETA
+      FROM COLHEITA_CANA
+     WHERE PRODUTIVIDADE < :limite_produtividade
+       AND PREJUIZO > :limite_prejuizo
+     ORDER BY PRODUTIVIDADE ASC, PREJUIZO DESC
+"""
+INDICE_ALERTAS = "IDX_COLHEITA_PROD_PREJ"
+
+
+def listar_alertas_oracle(limite_produtividade: float, limite_prejuizo: float) -> Optional[List[Colheita]]:
+    """Busca no Oracle apenas as colheitas com produtividade abaixo e prejuízo acima dos limites.
+
+    Retorna None se não for possível consultar o banco. O resultado fica em cache na sessão.
+    """
+    return _cache.obter(("alertas", limite_produtividade, limite_prejuizo),
+                        lambda: _buscar_alertas_oracle(limite_produtividade, limite_prejuizo))
+
+
+def _buscar_alertas_oracle(limite_produtividade: float, limite_prejuizo: float) -> Optional[List[Colheita]]:
+    """Executa a consulta indexada de alertas (ver `listar_alertas_oracle`)."""
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        with medir_sql("alertas", SQL_ALERTAS) as consulta:
+            cursor.execute(SQL_ALERTAS, limite_produtividade=limite_produtividade, limite_prejuizo=limite_prejuizo)
+            alertas = _materializar(cursor, consulta)
+        logging.info("Consulta de alertas (Produtividade < %.2f e Prejuízo > %.2f) retornou %d registros.",
+                     limite_produtividade, limite_prejuizo, len(alertas))
+        return alertas
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar alertas no Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar alertas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+def plano_execucao_alertas(conexao: oracledb.Connection) -> List[str]:
+    """Retorna o plano de execução (EXPLAIN PLAN) da consulta de alertas, linha a linha."""
+    cursor = conexao.cursor()
+    try:
+        # EXPLAIN PLAN não aceita valores de bind: os marcadores (:limite_...) são analisados sem eles
+        cursor.execute("EXPLAIN PLAN FOR " + SQL_ALERTAS)
+        cursor.execute("SELECT PLAN_TABLE_OUTPUT FROM TABLE(DBMS_XPLAN.DISPLAY())")
+        return [linha for (linha,) in cursor]
+    finally:
+        cursor.close()
+
+
+# Ajustado para usar a coluna AREA e remover PRECO_TONELADA
+# ID_ORIGEM identifica o registro na origem (diário local) e evita duplicidade quando um envio é repetido;
+# DATA_COLETA é a hora do registro no diário (enviado depois) ou, sem ela, a hora do INSERT
+SQL_INSERIR_COLHEITA = """
+    INSERT INTO COLHEITA_CANA (
+        TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA,
+        PRODUTIVIDADE, PREJUIZO, DATA_COLETA, ID_ORIGEM
+    ) VALUES (
+        :talhao, :area_plantada, :tipo_colheita, :producao, :perda,
+        :produtividade, :prejuizo, NVL(:data_coleta, SYSDATE), :id_origem
+    )
+"""
+
+
+# Mesmo INSERT devolvendo o ID gerado, que liga os alertas à colheita na mesma transação
+SQL_INSERIR_COLHEITA_ID = SQL_INSERIR_COLHEITA.rstrip() + "\n    RETURNING ID INTO :id_novo\n"
+
+
+def parametros_insert(colheita: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrai do dicionário de colheita apenas os parâmetros usados no INSERT."""
+    return {
+        "talhao": colheita.get("talhao"),
+        # Aceita tanto a chave do cadastro ('area') quanto a do banco ('area_plantada')
+        "area_plantada": colheita.get("area_plantada", colheita.get("area")),
+        "tipo_colheita": colheita.get("tipo_colheita"),
+        "producao": colheita.get("producao"),
+        "perda": colheita.get("perda"),
+        "produtividade": colheita.get("produtividade"),
+        "prejuizo": colheita.get("prejuizo"),
+        "data_coleta": colheita.get("data_coleta"), # None (cadastro direto e carga): SYSDATE
+        "id_origem": colheita.get("id_origem"),
+    }
+
+
+# Resumo mantido a cada INSERT (mesma transação): uma linha por tipo de colheita, talhão e mês,
+# com contagem, soma, mínimo e máximo. Recebe os valores já agregados por `agregar_resumo`.
+SQL_ATUALIZAR_RESUMO = """
+    MERGE INTO RESUMO_COLHEITA r
+    USING (SELECT :tipo_colheita AS TIPO_COLHEITA, :talhao AS TALHAO, TO_CHAR(NVL(:data_coleta, SYSDATE), 'YYYY-MM') AS MES FROM DUAL) n
+       ON (r.TIPO_COLHEITA = n.TIPO_COLHEITA AND r.TALHAO = n.TALHAO AND r.MES = n.MES)
+     WHEN MATCHED THEN UPDATE SET
+          r.REGISTROS = r.REGISTROS + :registros,
+          r.QTD_PRODUTIVIDADE = r.QTD_PRODUTIVIDADE + :qtd_produtividade,
+          r.SOMA_PRODUTIVIDADE = r.SOMA_PRODUTIVIDADE + :soma_produtividade,
+          r.MIN_PRODUTIVIDADE = LEAST(NVL(r.MIN_PRODUTIVIDADE, :min_produtividade), NVL(:min_produtividade, r.MIN_PRODUTIVIDADE)),
+          r.MAX_PRODUTIVIDADE = GREATEST(NVL(r.MAX_PRODUTIVIDADE, :max_produtividade), NVL(:max_produtividade, r.MAX_PRODUTIVIDADE)),
+          r.SOMA_PRODUCAO = r.SOMA_PRODUCAO + :soma_producao,
+          r.MIN_PRODUCAO = LEAST(r.MIN_PRODUCAO, :min_producao),
+          r.MAX_PRODUCAO = GREATEST(r.MAX_PRODUCAO, :max_producao),
+          r.SOMA_PERDA = r.SOMA_PERDA + :soma_perda,
+          r.MIN_PERDA = LEAST(r.MIN_PERDA, :min_perda),
+          r.MAX_PERDA = GREATEST(r.MAX_PERDA, :max_perda),
+          r.SOMA_PREJUIZO = r.SOMA_PREJUIZO + :soma_prejuizo,
+          r.MIN_PREJUIZO = LEAST(NVL(r.MIN_PREJUIZO, :min_prejuizo), NVL(:min_prejuizo, r.MIN_PREJUIZO)),
+          r.MAX_PREJUIZO = GREATEST(NVL(r.MAX_PREJUIZO, :max_prejuizo), NVL(:max_prejuizo, r.MAX_PREJUIZO))
+     WHEN NOT MATCHED THEN INSERT (
+          TIPO_COLHEITA, TALHAO, MES, REGISTROS,
+          QTD_PRODUTIVIDADE, SOMA_PRODUTIVIDADE, MIN_PRODUTIVIDADE, MAX_PRODUTIVIDADE,
+          SOMA_PRODUCAO, MIN_PRODUCAO, MAX_PRODUCAO,
+          SOMA_PERDA, MIN_PERDA, MAX_PERDA,
+          SOMA_PREJUIZO, MIN_PREJUIZO, MAX_PREJUIZO
+     ) VALUES (
+          n.TIPO_COLHEITA, n.TALHAO, n.MES, :registros,
+          :qtd_produtividade, :soma_produtividade, :min_produtividade, :max_produtividade,
+          :soma_producao, :min_producao, :max_producao,
+          :soma_perda, :min_perda, :max_perda,
+          :soma_prejuizo, :min_prejuizo, :max_prejuizo
+     )
+"""
+
+# Reconstrução completa do resumo a partir de COLHEITA_CANA
+SQL_RECONSTRUIR_RESUMO = """
+    INSERT INTO RESUMO_COLHEITA (
+        TIPO_COLHEITA, TALHAO, MES, REGISTROS,
+        QTD_PRODUTIVIDADE, SOMA_PRODUTIVIDADE, MIN_PRODUTIVIDADE, MAX_PRODUTIVIDADE,
+        SOMA_PRODUCAO, MIN_PRODUCAO, MAX_PRODUCAO,
+        SOMA_PERDA, MIN_PERDA, MAX_PERDA,
+        SOMA_PREJUIZO, MIN_PREJUIZO, MAX_PREJUIZO
+    )
+    SELECT TIPO_COLHEITA, TALHAO, NVL(TO_CHAR(DATA_COLETA, 'YYYY-MM'), 'N/A'), COUNT(*),
+           COUNT(PRODUTIVIDADE), NVL(SUM(PRODUTIVIDADE), 0), MIN(PRODUTIVIDADE), MAX(PRODUTIVIDADE),
+           SUM(PRODUCAO), MIN(PRODUCAO), MAX(PRODUCAO),
+           SUM(PERDA), MIN(PERDA), MAX(PERDA),
+           NVL(SUM(PREJUIZO), 0), MIN(PREJUIZO), MAX(PREJUIZO)
+      FROM COLHEITA_CANA
+     GROUP BY TIPO_COLHEITA, TALHAO, NVL(TO_CHAR(DATA_COLETA, 'YYYY-MM'), 'N/A')
+"""
+
+
+def agregar_resumo(linhas: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Agrega as linhas inseridas por (tipo, talhão, mês) nos parâmetros de `SQL_ATUALIZAR_RESUMO`.
+
+    Um lote com milhares de linhas vira um MERGE por combinação de tipo, talhão e mês de `data_coleta`
+    (linhas sem data, gravadas com SYSDATE, formam um grupo à parte com `data_coleta` None).
+    """
+    grupos: Dict[Tuple[Any, Any, Optional[str]], Dict[str, Any]] = {}
+    for linha in linhas:
+        data_coleta = linha.get("data_coleta")
+        chave = (linha["tipo_colheita"], linha["talhao"], data_coleta.strftime("%Y-%m") if data_coleta else None)
+        g = grupos.get(chave)
+        if g is None:
+            # Qualquer data do grupo serve: o MERGE só usa o mês
+            g = grupos[chave] = {"tipo_colheita": chave[0], "talhao": chave[1], "data_coleta": data_coleta,
+                                 "registros": 0, "qtd_produtividade": 0}
+            for campo in ("produtividade", "producao", "perda", "prejuizo"):
+                g["soma_" + campo], g["min_" + campo], g["max_" + campo] = 0.0, None, None
+        g["registros"] += 1
+        for campo in ("produtividade", "producao", "perda", "prejuizo"):
+            valor = linha.get(campo)
+            if valor is None:
+                continue
+            if campo == "produtividade":
+                g["qtd_produtividade"] += 1
+            g["soma_" + campo] += valor
+            g["min_" + campo] = valor if g["min_" + campo] is None else min(g["min_" + campo], valor)
+            g["max_" + campo] = valor if g["max_" + campo] is None else max(g["max_" + campo], valor)
+    return list(grupos.values())
+
+
+SQL_INSERIR_ALERTA = """
+    INSERT INTO ALERTA_COLHEITA (
+        ID_COLHEITA, REGRA, TALHAO, TIPO_COLHEITA, PRODUTIVIDADE, PREJUIZO,
+        LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO
+    ) VALUES (
+        :id_colheita, :regra, :talhao, :tipo_colheita, :produtividade, :prejuizo,
+        :limite_produtividade, :limite_prejuizo
+    )
+"""
+
+
+def alertas_disparados(colheitas: Iterable[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Avalia as regras de alerta (`regras.obter_regras`) em pares (ID, colheita) e monta os parâmetros de `SQL_INSERIR_ALERTA`."""
+    avaliar = obter_regras().avaliar
+    alertas = []
+    for id_colheita, colheita in colheitas:
+        regra = avaliar(colheita)
+        if regra is not None:
+            alertas.append({
+                "id_colheita": id_colheita, "regra": regra[0],
+                "talhao": colheita.get("talhao"), "tipo_colheita": colheita.get("tipo_colheita"),
+                "produtividade": colheita.get("produtividade"), "prejuizo": colheita.get("prejuizo"),
+                "limite_produtividade": limite_gravavel(regra[1]), "limite_prejuizo": limite_gravavel(regra[2]),
+            })
+    return alertas
+
+
+def _registrar_alertas(cursor: oracledb.Cursor, alertas: List[Dict[str, Any]]) -> None:
+    """Grava em ALERTA_COLHEITA os alertas disparados (antes do commit, na mesma transação do INSERT)."""
+    if alertas:
+        with medir_sql("registrar_alertas", SQL_INSERIR_ALERTA) as consulta:
+            cursor.executemany(SQL_INSERIR_ALERTA, alertas)
+            consulta.linhas = len(alertas)
+
+
+# Comando de uma gravação: (nome da medição, SQL, linhas do executemany, batcherrors)
+Etapa = Tuple[str, str, List[Dict[str, Any]], bool]
+# Resultado de uma gravação: (linhas aceitas com a posição no lote, erros do batcherrors, alertas registrados)
+ResultadoGravacao = Tuple[List[Tuple[int, Dict[str, Any]]], List[Any], List[Dict[str, Any]]]
+
+
+def etapas_gravacao(cursor: Any, linhas: List[Dict[str, Any]], nome: str,
+                    batcherrors: bool = False) -> Generator[Etapa, None, ResultadoGravacao]:
+    """Sequência de comandos de uma gravação de colheitas (parâmetros de `parametros_insert`).
+
+    INSERT com RETURNING ID, MERGE do resumo e INSERT dos alertas, na mesma transação: só as linhas
+    aceitas entram no resumo e nos alertas. Linhas do MERGE que falharem são repetidas uma vez (veja
+    abaixo); se falharem de novo, o erro é propagado. O gerador produz cada comando para o chamador executar
+    (`_gravar_colheitas` ou sua versão assíncrona em oracle_async.py), para que os dois caminhos
+    não divirjam; o commit fica com o chamador.
+    """
+    ids = cursor.var(int, arraysize=len(linhas))
+    cursor.setinputsizes(id_novo=ids)
+    yield nome, SQL_INSERIR_COLHEITA_ID, linhas, batcherrors
+    erros = cursor.getbatcherrors() if batcherrors else []
+    recusadas = {erro.offset for erro in erros}
+    aceitas = [(posicao, linha) for posicao, linha in enumerate(linhas) if posicao not in recusadas]
+    if aceitas:
+        grupos = agregar_resumo(linha for _, linha in aceitas)
+        yield "atualizar_resumo", SQL_ATUALIZAR_RESUMO, grupos, True
+        falhas = cursor.getbatcherrors()
+        if falhas:
+            # Outra sessão criou a mesma linha do resumo (tipo, talhão, mês) durante o MERGE: ORA-00001
+            # em PK_RESUMO_COLHEITA. Repetido, o MERGE encontra a linha e cai no UPDATE; outro erro se
+            # repete e é lançado pelo executemany (sem batcherrors), desfazendo a transação como antes.
+            logging.warning("MERGE do resumo repetido para %d grupo(s): %s", len(falhas), falhas[0].message)
+            yield "atualizar_resumo", SQL_ATUALIZAR_RESUMO, [grupos[falha.offset] for falha in falhas], False
+    alertas = alertas_disparados((ids.getvalue(posicao)[0], linha) for posicao, linha in aceitas)
+    if alertas:
+        yield "registrar_alertas", SQL_INSERIR_ALERTA, alertas, False
+    return aceitas, erros, alertas
+
+
+def _gravar_colheitas(cursor: oracledb.Cursor, linhas: List[Dict[str, Any]], nome: str,
+                      batcherrors: bool = False) -> ResultadoGravacao:
+    """Executa `etapas_gravacao` no cursor síncrono, medindo cada comando em `sql.<nome>`."""
+    etapas = etapas_gravacao(cursor, linhas, nome, batcherrors)
+    try:
+        etapa = next(etapas)
+        while True:
+            nome_etapa, sql, parametros, com_erros = etapa
+            with medir_sql(nome_etapa, sql) as consulta:
+                cursor.executemany(sql, parametros, batcherrors=com_erros)
+                consulta.linhas = len(parametros)
+            etapa = etapas.send(None)
+    except StopIteration as fim:
+        return fim.value
+
+
 def salvar_colheita_oracle(colheita: Dict[str, Any]) -> None:
     """Salva um registro de colheita no banco de dados Oracle."""
     conexao = None # Inicializa como None
@@ -87,25 +837,16 @@ def salvar_colheita_oracle(colheita: Dict[str, Any]) -> None:
             # Não imprime novamente para evitar duplicidade
             return # Sai da função se não conectar
 
-        # --- CORREÇÃO APLICADA AQUI ---
-        # Ajustado para usar a coluna AREA e remover PRECO_TONELADA
-        sql = """
-            INSERT INTO COLHEITA_CANA (
-                TALHAO, AREA, TIPO_COLHEITA, PRODUCAO, PERDA,
-                PRODUTIVIDADE, PREJUIZO, DATA_COLETA
-            ) VALUES (
-                :talhao, :area_plantada, :tipo_colheita, :producao, :perda,
-                :produtividade, :prejuizo, SYSDATE
-            )
-        """
-        # --- FIM DA CORREÇÃO ---
-
         cursor = conexao.cursor()
-        # Passa o dicionário 'colheita' diretamente, o driver mapeia as chaves
-        cursor.execute(sql, colheita)
-        conexao.commit() # Confirma a transação
+        # Monta os parâmetros a partir do dicionário 'colheita', o driver mapeia as chaves
+        # Resumo e alertas atualizados na mesma transação do INSERT
+        _, _, alertas = _gravar_colheitas(cursor, [parametros_insert(colheita)], "inserir_colheita")
+        confirmar_transacao(conexao) # Confirma a transação e invalida o cache de consultas
         print("✅ Colheita salva com sucesso no Oracle.")
-        logging.info("Registro de colheita para talhão %s salvo no Oracle.", colheita.get('talhao'))
+        for alerta in alertas:
+            print(f"🚨 Alerta registrado pela regra '{alerta['regra']}': produtividade {alerta['produtividade']:.2f} t/ha, "
+                  f"prejuízo R$ {alerta['prejuizo']:.2f}.")
+        logging.info("Registro de colheita para talhão %s salvo no Oracle (%d alertas).", colheita.get('talhao'), len(alertas))
 
     except oracledb.DatabaseError as erro_db:
         # Erros específicos do banco (constraint violation, tipo de dado, etc.)
@@ -135,4 +876,311 @@ def salvar_colheita_oracle(colheita: Dict[str, Any]) -> None:
             cursor.close()
         if conexao:
             conexao.close()
-            logging.info("Conexão com Oracle fechada após tentativa de salvar.")
+            logging.info("Conexão devolvida ao pool após tentativa de salvar.")
+
+
+def salvar_colheitas_lote_oracle(colheitas: Iterable[Dict[str, Any]], tamanho_lote: int = 1000,
+                                 silencioso: bool = False) -> Dict[str, Any]:
+    """Insere colheitas em lotes com `executemany`, confirmando (commit) cada lote.
+
+    Registros recusados pelo banco são reportados via `batcherrors` sem abortar o restante do lote.
+    Retorna um resumo com o total inserido, a quantidade de lotes, a lista de erros
+    no formato (posição no iterável, colheita, mensagem Oracle), os alertas registrados,
+    `concluido`, falso se a carga foi interrompida (sem conexão ou erro de banco), e `falha`,
+    o motivo da interrupção. Com `silencioso=True`, as falhas vão só para o log.
+    """
+    resumo: Dict[str, Any] = {"inseridos": 0, "lotes": 0, "erros": [], "alertas": 0, "concluido": False, "falha": None}
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection(silencioso)
+        if not conexao:
+            resumo["falha"] = "Sem conexão com o Oracle (ver log)."
+            return resumo
+
+        cursor = conexao.cursor()
+        lote: List[Dict[str, Any]] = []
+        inicio_lote = 0
+        for posicao, colheita in enumerate(colheitas):
+            if not lote:
+                inicio_lote = posicao
+            lote.append(parametros_insert(colheita))
+            if len(lote) >= tamanho_lote:
+                _inserir_lote(conexao, cursor, lote, inicio_lote, resumo)
+                lote = []
+        if lote:
+            _inserir_lote(conexao, cursor, lote, inicio_lote, resumo)
+        resumo["concluido"] = True
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro de banco de dados na carga em lote: %s", erro_db, exc_info=True)
+        resumo["falha"] = str(erro_db)
+        if not silencioso:
+            print(f"❌ Erro ao inserir lote no Oracle: {erro_db}")
+        try:
+            conexao.rollback() # Desfaz apenas o lote em andamento; os anteriores já foram confirmados
+        except Exception as rollback_error:
+            logging.error("Erro ao tentar reverter transação: %s", rollback_error)
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+    return resumo
+
+
+def _inserir_lote(conexao: oracledb.Connection, cursor: oracledb.Cursor, lote: List[Dict[str, Any]],
+                  inicio_lote: int, resumo: Dict[str, Any]) -> None:
+    """Executa um lote de INSERTs com batcherrors e confirma a transação."""
+    aceitas, erros, alertas = _gravar_colheitas(cursor, lote, "inserir_lote", batcherrors=True)
+    confirmar_transacao(conexao)
+    for erro in erros:
+        resumo["erros"].append((inicio_lote + erro.offset, lote[erro.offset], erro.message))
+    resumo["inseridos"] += len(aceitas)
+    resumo["alertas"] += len(alertas)
+    resumo["lotes"] += 1
+    logging.info("Lote %d inserido no Oracle: %d registros, %d recusados, %d alertas.",
+                 resumo["lotes"], len(aceitas), len(erros), len(alertas))
+
+
+def estatisticas_resumo_oracle(agrupar_por: str = "tipo_colheita") -> Optional[Dict[str, Dict[str, float]]]:
+    """Estatísticas por grupo lidas de RESUMO_COLHEITA (sem percorrer o histórico de colheitas).
+
+    Traz registros, média, mínimo e máximo de produtividade e os totais; mediana e percentis
+    exigem a consulta completa (`estatisticas_colheitas_oracle`). Retorna None se não for possível consultar.
+    """
+    return _cache.obter(("resumo", agrupar_por), lambda: _estatisticas_resumo_oracle(agrupar_por))
+
+
+def _estatisticas_resumo_oracle(agrupar_por: str) -> Optional[Dict[str, Dict[str, float]]]:
+    """Executa a leitura agregada do resumo (ver `estatisticas_resumo_oracle`)."""
+    coluna = {"tipo_colheita": "TIPO_COLHEITA", "talhao": "TALHAO", "mes": "MES"}[agrupar_por]
+    sql = f"""
+        SELECT {coluna},
+               SUM(QTD_PRODUTIVIDADE),
+               SUM(SOMA_PRODUTIVIDADE) / NULLIF(SUM(QTD_PRODUTIVIDADE), 0),
+               MIN(MIN_PRODUTIVIDADE),
+               MAX(MAX_PRODUTIVIDADE),
+               SUM(SOMA_PRODUCAO),
+               SUM(SOMA_PERDA),
+               SUM(SOMA_PREJUIZO)
+          FROM RESUMO_COLHEITA
+         GROUP BY {coluna}
+         ORDER BY 1
+    """
+    campos = ("registros", "media_produtividade", "min_produtividade", "max_produtividade",
+              "total_producao", "total_perda", "total_prejuizo")
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        resultado: Dict[str, Dict[str, float]] = {}
+        with medir_sql(f"resumo_{agrupar_por}", sql) as consulta:
+            cursor.execute(sql)
+            for grupo, registros, *valores in cursor:
+                resultado[grupo] = dict(zip(campos, [int(registros or 0)] + [round(v or 0.0, 2) for v in valores]))
+            consulta.linhas = len(resultado)
+        logging.info("Estatísticas por %s lidas do resumo (%d grupos).", agrupar_por, len(resultado))
+        return resultado
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao ler o resumo de colheitas no Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao ler o resumo de colheitas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+def reconciliar_resumo_oracle() -> Optional[int]:
+    """Reconstrói RESUMO_COLHEITA a partir de COLHEITA_CANA; retorna a quantidade de linhas do resumo.
+
+    COLHEITA_CANA fica bloqueada para escrita (LOCK SHARE) até o commit, para que nenhum INSERT
+    concorrente fique fora do resumo reconstruído.
+    """
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        cursor.execute("LOCK TABLE COLHEITA_CANA IN SHARE MODE")
+        cursor.execute("DELETE FROM RESUMO_COLHEITA")
+        with medir_sql("reconstruir_resumo", SQL_RECONSTRUIR_RESUMO) as consulta:
+            cursor.execute(SQL_RECONSTRUIR_RESUMO)
+            linhas = consulta.linhas = cursor.rowcount
+        confirmar_transacao(conexao)
+        logging.info("Resumo de colheitas reconstruído: %d linhas.", linhas)
+        return linhas
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao reconstruir o resumo de colheitas: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao reconstruir o resumo de colheitas: {erro_db}")
+        try:
+            conexao.rollback()
+        except Exception as rollback_error:
+            logging.error("Erro ao tentar reverter transação: %s", rollback_error)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+# Alertas abertos, do mais recente para o mais antigo (índice IDX_ALERTA_SITUACAO_DATA)
+SQL_ALERTAS_ABERTOS = """
+    SELECT ID, ID_COLHEITA, REGRA, TALHAO, TIPO_COLHEITA, PRODUTIVIDADE, PREJUIZO,
+           LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO, DATA_ALERTA
+      FROM ALERTA_COLHEITA
+     WHERE SITUACAO = 'ABERTO'
+     ORDER BY DATA_ALERTA DESC, ID DESC
+"""
+CAMPOS_ALERTA = ("id", "id_colheita", "regra", "talhao", "tipo_colheita", "produtividade", "prejuizo",
+                 "limite_produtividade", "limite_prejuizo", "data_alerta")
+
+
+def listar_alertas_abertos_oracle() -> Optional[List[Dict[str, Any]]]:
+    """Lê os alertas abertos de ALERTA_COLHEITA, registrados a cada INSERT pelas regras de alerta.
+
+    Não percorre COLHEITA_CANA. Retorna None se não for possível consultar o banco. Sem cache: os alertas
+    também mudam por `cli.py reavaliar-alertas` e por resoluções em outros processos, que a versão de
+    COLHEITA_CANA usada para revalidar o cache não enxerga; a leitura pelo índice já é barata.
+    """
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        with medir_sql("alertas_abertos", SQL_ALERTAS_ABERTOS) as consulta:
+            cursor.execute(SQL_ALERTAS_ABERTOS)
+            alertas = [dict(zip(CAMPOS_ALERTA, linha)) for linha in cursor]
+            consulta.linhas = len(alertas)
+        logging.info("Consulta de alertas abertos retornou %d registros.", len(alertas))
+        return alertas
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar alertas no Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar alertas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+def resolver_alertas_oracle(ids: Optional[Iterable[int]] = None) -> Optional[int]:
+    """Marca como resolvidos os alertas abertos com os IDs informados (todos, sem `ids`); retorna quantos mudaram."""
+    conexao = None
+    cursor = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        sql = "UPDATE ALERTA_COLHEITA SET SITUACAO = 'RESOLVIDO', DATA_RESOLUCAO = SYSDATE WHERE SITUACAO = 'ABERTO'"
+        with medir_sql("resolver_alertas", sql) as consulta:
+            if ids is None:
+                cursor.execute(sql)
+                resolvidos = cursor.rowcount
+            else:
+                parametros = [{"id": id_alerta} for id_alerta in ids]
+                cursor.executemany(sql + " AND ID = :id", parametros)
+                resolvidos = cursor.rowcount if parametros else 0
+            consulta.linhas = resolvidos
+        confirmar_transacao(conexao)
+        logging.info("%d alertas marcados como resolvidos.", resolvidos)
+        return resolvidos
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao resolver alertas no Oracle: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao resolver alertas no Oracle: {erro_db}")
+        try:
+            conexao.rollback()
+        except Exception as rollback_error:
+            logging.error("Erro ao tentar reverter transação: %s", rollback_error)
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
+
+
+def reavaliar_alertas_oracle(tamanho_bloco: int = 5000) -> Optional[Dict[str, int]]:
+    """Refaz os alertas abertos de todo o histórico com as regras atuais (após mudar regras_alerta.json).
+
+    Alertas já resolvidos são mantidos e a colheita correspondente não volta a alertar. Só as colheitas
+    dentro da faixa das regras (`RegrasAlerta.faixa_alerta`) são lidas, pelo índice IDX_COLHEITA_PROD_PREJ.
+    Retorna {"removidos": ..., "registrados": ...}, ou None se a operação falhar.
+    """
+    limite_produtividade, limite_prejuizo = obter_regras().faixa_alerta()
+    condicoes = ["NOT EXISTS (SELECT 1 FROM ALERTA_COLHEITA a WHERE a.ID_COLHEITA = c.ID AND a.SITUACAO = 'RESOLVIDO')"]
+    parametros: Dict[str, Any] = {}
+    if limite_produtividade != float("inf"):
+        condicoes.append("c.PRODUTIVIDADE < :limite_produtividade")
+        parametros["limite_produtividade"] = limite_produtividade
+    if limite_prejuizo != float("-inf"):
+        condicoes.append("c.PREJUIZO > :limite_prejuizo")
+        parametros["limite_prejuizo"] = limite_prejuizo
+    sql = (f"SELECT c.ID, c.TALHAO, c.AREA, c.TIPO_COLHEITA, c.PRODUCAO, c.PERDA, c.PRODUTIVIDADE, c.PREJUIZO, "
+           f"c.DATA_COLETA FROM COLHEITA_CANA c WHERE {' AND '.join(condicoes)}")
+    resumo = {"removidos": 0, "registrados": 0}
+    conexao = None
+    cursor = None
+    leitura = None
+    try:
+        conexao = get_connection()
+        if not conexao:
+            return None
+
+        cursor = conexao.cursor()
+        cursor.execute("LOCK TABLE COLHEITA_CANA IN SHARE MODE") # Nenhum INSERT fica sem avaliação
+        cursor.execute("DELETE FROM ALERTA_COLHEITA WHERE SITUACAO = 'ABERTO'")
+        resumo["removidos"] = cursor.rowcount
+        if limite_produtividade != float("-inf") and limite_prejuizo != float("inf"): # Alguma regra ativa
+            leitura = conexao.cursor()
+            leitura.arraysize = tamanho_bloco
+            with medir_sql("reavaliar_alertas", sql) as consulta:
+                leitura.execute(sql, parametros)
+                leitura.rowfactory = Colheita
+                while True:
+                    colheitas = leitura.fetchmany(tamanho_bloco)
+                    if not colheitas:
+                        break
+                    alertas = alertas_disparados((c.id, c) for c in colheitas)
+                    _registrar_alertas(cursor, alertas)
+                    resumo["registrados"] += len(alertas)
+                    consulta.linhas += len(colheitas)
+        confirmar_transacao(conexao)
+        logging.info("Alertas reavaliados: %d abertos removidos, %d registrados.", resumo["removidos"], resumo["registrados"])
+        return resumo
+
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao reavaliar os alertas: %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao reavaliar os alertas: {erro_db}")
+        try:
+            conexao.rollback()
+        except Exception as rollback_error:
+            logging.error("Erro ao tentar reverter transação: %s", rollback_error)
+        return None
+    finally:
+        if leitura:
+            leitura.close()
+        if cursor:
+            cursor.close()
+        if conexao:
+            conexao.close() # Devolve a sessão ao pool
@@ -0,0 +1,201 @@
+# Arquivo: oracle_async.py
+# Acesso assíncrono (asyncio) ao Oracle com o pool assíncrono do python-oracledb
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import oracledb
+
+from oracle import (
+    DB_USER, DB_PASSWORD, DSN,
+    POOL_MIN, POOL_MAX, POOL_INCREMENT, POOL_PING_INTERVAL, POOL_WAIT_TIMEOUT,
+    SQL_LISTAR_COLHEITAS, SQL_ALERTAS_ABERTOS, CAMPOS_ALERTA, ResultadoGravacao,
+    sql_estatisticas, montar_estatisticas, parametros_insert, etapas_gravacao, invalidar_cache,
+    mostrar_falha_conexao,
+)
+from metricas import medir, medir_sql
+from registro import Colheita
+
+# Pool assíncrono do processo (criado na primeira utilização, dentro do loop de eventos)
+_pool_async: Optional[oracledb.AsyncConnectionPool] = None
+
+
+def get_pool_async() -> Optional[oracledb.AsyncConnectionPool]:
+    """Retorna o pool assíncrono do processo, criando-o na primeira chamada (mesmas configurações do .env)."""
+    global _pool_async
+    if _pool_async is not None:
+        return _pool_async
+    if not DSN:
+        logging.error("Credenciais do banco de dados não configuradas corretamente no .env (HOST, PORT ou SID faltando).")
+        print("❌ Credenciais do banco de dados não configuradas corretamente no .env")
+        return None
+    _pool_async = oracledb.create_pool_async(
+        user=DB_USER, password=DB_PASSWORD, dsn=DSN,
+        min=POOL_MIN, max=POOL_MAX, increment=POOL_INCREMENT,
+        ping_interval=POOL_PING_INTERVAL,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=POOL_WAIT_TIMEOUT
+    )
+    logging.info("Pool assíncrono de conexões Oracle criado (min=%d, max=%d).", POOL_MIN, POOL_MAX)
+    return _pool_async
+
+
+async def get_connection_async() -> Optional[oracledb.AsyncConnection]:
+    """Empresta uma conexão do pool assíncrono (devolvida com `await conexao.close()`)."""
+    try:
+        pool = get_pool_async()
+        if not pool:
+            return None
+        with medir("oracle_async.get_connection"):
+            return await pool.acquire()
+    except oracledb.Error as erro:
+        mostrar_falha_conexao(erro)
+        return None
+
+
+async def _consultar(nome: str, sql: str, parametros: Optional[Dict[str, Any]] = None) -> Optional[List[Colheita]]:
+    """Executa uma consulta de colheitas (medida em `sql.<nome>`) e retorna registros `Colheita`; None se falhar."""
+    conexao = await get_connection_async()
+    if not conexao:
+        return None
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        with medir_sql(nome, sql) as consulta:
+            await cursor.execute(sql, parametros or {})
+            cursor.rowfactory = Colheita # Colunas na ordem de registro.CAMPOS_COLHEITA
+            resultados = await cursor.fetchall()
+            consulta.linhas = len(resultados)
+        return resultados
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar Oracle (assíncrono): %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar dados no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        await conexao.close() # Devolve a sessão ao pool
+
+
+async def listar_colheitas_oracle_async() -> List[Colheita]:
+    """Versão assíncrona de `oracle.listar_colheitas_oracle` (sem cache)."""
+    resultados = await _consultar("listar_colheitas_async", SQL_LISTAR_COLHEITAS)
+    if resultados is not None:
+        logging.info("Consulta assíncrona ao Oracle retornou %d registros.", len(resultados))
+    return resultados or []
+
+
+async def estatisticas_colheitas_oracle_async(agrupar_por: str = "tipo_colheita") -> Optional[Dict[str, Dict[str, float]]]:
+    """Versão assíncrona de `oracle.estatisticas_colheitas_oracle` (agregação feita no Oracle)."""
+    conexao = await get_connection_async()
+    if not conexao:
+        return None
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        sql = sql_estatisticas(agrupar_por)
+        with medir_sql(f"estatisticas_{agrupar_por}_async", sql) as consulta:
+            await cursor.execute(sql)
+            resultado = montar_estatisticas(await cursor.fetchall())
+            consulta.linhas = len(resultado)
+        return resultado
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao calcular estatísticas no Oracle (assíncrono): %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao calcular estatísticas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        await conexao.close()
+
+
+async def listar_alertas_abertos_oracle_async() -> Optional[List[Dict[str, Any]]]:
+    """Versão assíncrona de `oracle.listar_alertas_abertos_oracle`: alertas abertos gravados pelas regras de alerta."""
+    conexao = await get_connection_async()
+    if not conexao:
+        return None
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        with medir_sql("alertas_abertos_async", SQL_ALERTAS_ABERTOS) as consulta:
+            await cursor.execute(SQL_ALERTAS_ABERTOS)
+            alertas = [dict(zip(CAMPOS_ALERTA, linha)) for linha in await cursor.fetchall()]
+            consulta.linhas = len(alertas)
+        return alertas
+    except oracledb.Error as erro_db:
+        logging.error("Erro ao consultar alertas no Oracle (assíncrono): %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao consultar alertas no Oracle: {erro_db}")
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        await conexao.close()
+
+
+async def _gravar_colheitas_async(cursor: oracledb.AsyncCursor, linhas: List[Dict[str, Any]], nome: str,
+                                  batcherrors: bool = False) -> ResultadoGravacao:
+    """Versão assíncrona de `oracle._gravar_colheitas`: executa os mesmos comandos de `oracle.etapas_gravacao`."""
+    etapas = etapas_gravacao(cursor, linhas, nome, batcherrors)
+    try:
+        etapa = next(etapas)
+        while True:
+            nome_etapa, sql, parametros, com_erros = etapa
+            with medir_sql(nome_etapa, sql) as consulta:
+                await cursor.executemany(sql, parametros, batcherrors=com_erros)
+                consulta.linhas = len(parametros)
+            etapa = etapas.send(None)
+    except StopIteration as fim:
+        return fim.value
+
+
+async def salvar_colheita_oracle_async(colheita: Dict[str, Any]) -> bool:
+    """Versão assíncrona de `oracle.salvar_colheita_oracle`; retorna True se a colheita foi gravada."""
+    conexao = await get_connection_async()
+    if not conexao:
+        return False
+    cursor = None
+    try:
+        cursor = conexao.cursor()
+        # Resumo e alertas na mesma transação do INSERT
+        _, _, alertas = await _gravar_colheitas_async(cursor, [parametros_insert(colheita)], "inserir_colheita")
+        with medir("oracle_async.commit"):
+            await conexao.commit()
+        invalidar_cache() # Leituras síncronas em cache não podem ignorar a nova colheita
+        logging.info("Registro de colheita para talhão %s salvo no Oracle (assíncrono, %d alertas).",
+                     colheita.get('talhao'), len(alertas))
+        return True
+    except oracledb.DatabaseError as erro_db:
+        logging.error("Erro de banco de dados ao salvar no Oracle (assíncrono): %s", erro_db, exc_info=True)
+        print(f"❌ Erro ao salvar no Oracle: {erro_db}")
+        try:
+            await conexao.rollback()
+        except Exception as rollback_error:
+            logging.error("Erro ao tentar reverter transação: %s", rollback_error)
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        await conexao.close()
+
+
+async def buscar_painel_async(agrupar_por: str = "tipo_colheita") -> Dict[str, Any]:
+    """Busca em paralelo (cada consulta em uma sessão do pool) a listagem, as estatísticas e os alertas abertos."""
+    colheitas, estatisticas, alertas = await asyncio.gather(
+        listar_colheitas_oracle_async(),
+        estatisticas_colheitas_oracle_async(agrupar_por),
+        listar_alertas_abertos_oracle_async(),
+    )
+    return {"colheitas": colheitas, "estatisticas": estatisticas, "alertas": alertas}
+
+
+async def fechar_pool_async() -> None:
+    """Fecha o pool assíncrono do processo."""
+    global _pool_async
+    pool, _pool_async = _pool_async, None
+    if pool is None:
+        return
+    try:
+        await pool.close(force=True)
+        logging.info("Pool assíncrono de conexões Oracle fechado.")
+    except oracledb.Error as erro:
+        logging.error("Erro ao fechar o pool assíncrono: %s", erro, exc_info=True)
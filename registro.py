@@ -0,0 +1,67 @@
+# Arquivo: registro.py
+# Registro compacto de uma colheita lida do Oracle, compatível com o uso como dicionário
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Ordem das colunas nos SELECTs de COLHEITA_CANA (ID, TALHAO, ..., DATA_COLETA)
+CAMPOS_COLHEITA = ("id", "talhao", "area", "tipo_colheita", "producao", "perda", "produtividade", "prejuizo",
+                   "data_coleta")
+_CAMPOS = frozenset(CAMPOS_COLHEITA)
+
+
+class Colheita(Mapping):
+    """Linha de COLHEITA_CANA com `__slots__`: ocupa menos memória que um dicionário de nove chaves.
+
+    É montada direto pelo cursor (`cursor.rowfactory = Colheita`) e lida por atributo (`c.produtividade`).
+    Para quem já trata as linhas como dicionário, aceita `c["talhao"]`, `c.get(...)`, `keys()`, `items()`,
+    `dict(c)` e comparação com dicionários; não aceita alteração por chave.
+    """
+
+    __slots__ = CAMPOS_COLHEITA
+
+    def __init__(self, id: Optional[int] = None, talhao: Optional[str] = None, area: Optional[float] = None,
+                 tipo_colheita: Optional[str] = None, producao: Optional[float] = None, perda: Optional[float] = None,
+                 produtividade: Optional[float] = None, prejuizo: Optional[float] = None,
+                 data_coleta: Optional[datetime] = None):
+        self.id = id
+        self.talhao = talhao
+        self.area = area
+        self.tipo_colheita = tipo_colheita
+        self.producao = producao
+        self.perda = perda
+        self.produtividade = produtividade
+        self.prejuizo = prejuizo
+        self.data_coleta = data_coleta
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave in _CAMPOS:
+            return getattr(self, chave)
+        raise KeyError(chave)
+
+    def get(self, chave: str, padrao: Any = None) -> Any:
+        return getattr(self, chave) if chave in _CAMPOS else padrao
+
+    def __contains__(self, chave: object) -> bool:
+        return chave in _CAMPOS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CAMPOS_COLHEITA)
+
+    def __len__(self) -> int:
+        return len(CAMPOS_COLHEITA)
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, campo) for campo in CAMPOS_COLHEITA)
+
+    def __setstate__(self, estado: tuple) -> None:
+        for campo, valor in zip(CAMPOS_COLHEITA, estado):
+            setattr(self, campo, valor)
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Cópia em dicionário (mesmas chaves e ordem das linhas montadas com `dict(zip(colunas, row))`)."""
+        return {campo: getattr(self, campo) for campo in CAMPOS_COLHEITA}
+
+    def __repr__(self) -> str:
+        return f"Colheita({', '.join(f'{campo}={getattr(self, campo)!r}' for campo in CAMPOS_COLHEITA)})"
@@ -0,0 +1,138 @@
+# Arquivo: regras.py
+# Regras de alerta por tipo de colheita e por talhão, lidas de um arquivo JSON e avaliadas a cada INSERT
+
+import json
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import configuracao # Carrega o .env antes dos os.getenv abaixo
+
+from funcoes import LIMITE_PRODUTIVIDADE, LIMITE_PREJUIZO, TIPOS_COLHEITA
+
+# Arquivo de regras; sem ele, vale só a regra padrão (LIM_PROD / LIM_PREJU do .env)
+ARQUIVO_REGRAS = os.getenv("ALERTA_REGRAS", "regras_alerta.json")
+
+_CAMPOS_REGRA = {"produtividade_min", "prejuizo_max", "ativo"}
+
+# Regra compilada: (nome, limite de produtividade, limite de prejuízo). Limite ausente vira infinito
+# (condição sempre satisfeita); regra inativa vira limites impossíveis (nunca dispara).
+Limites = Tuple[str, float, float]
+
+
+class RegrasAlerta:
+    """Regras de alerta compiladas: uma busca em dicionário e duas comparações por colheita.
+
+    Dispara quando PRODUTIVIDADE < produtividade_min E PREJUIZO > prejuizo_max. A regra do talhão
+    prevalece sobre a do tipo de colheita, que prevalece sobre a padrão (campo a campo). Colheitas
+    sem produtividade ou sem prejuízo não disparam alerta.
+    """
+
+    def __init__(self, padrao: Mapping[str, Any], por_tipo: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                 por_talhao: Optional[Mapping[str, Mapping[str, Any]]] = None):
+        por_tipo = {str(tipo).strip().lower(): _validar(f"tipo_colheita.{tipo}", regra)
+                    for tipo, regra in (por_tipo or {}).items()}
+        por_talhao = {str(talhao).strip().upper(): _validar(f"talhao.{talhao}", regra)
+                      for talhao, regra in (por_talhao or {}).items()}
+        for tipo in por_tipo:
+            if tipo not in TIPOS_COLHEITA:
+                raise ValueError(f"Tipo de colheita desconhecido nas regras: '{tipo}'.")
+        padrao = _validar("padrao", padrao)
+
+        self._padrao = _compilar("padrao", padrao)
+        self._por_tipo = {tipo: _compilar(f"tipo:{tipo}", {**padrao, **regra}) for tipo, regra in por_tipo.items()}
+        # Talhão x tipo já combinados aqui, para a avaliação não precisar mesclar nada
+        self._por_talhao = {(talhao, tipo): _compilar(f"talhao:{talhao}", {**padrao, **por_tipo.get(tipo, {}), **regra})
+                            for talhao, regra in por_talhao.items() for tipo in TIPOS_COLHEITA + (None,)}
+
+    @classmethod
+    def de_arquivo(cls, caminho: str = ARQUIVO_REGRAS) -> "RegrasAlerta":
+        """Lê as regras de um arquivo JSON (`padrao`, `tipo_colheita` e `talhao`; veja regras_alerta.json)."""
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        desconhecidas = set(dados) - {"padrao", "tipo_colheita", "talhao"}
+        if desconhecidas:
+            raise ValueError(f"Seções desconhecidas em {caminho}: {', '.join(sorted(desconhecidas))}.")
+        padrao = {"produtividade_min": LIMITE_PRODUTIVIDADE, "prejuizo_max": LIMITE_PREJUIZO}
+        padrao.update(dados.get("padrao") or {})
+        return cls(padrao, dados.get("tipo_colheita"), dados.get("talhao"))
+
+    def limites(self, talhao: Optional[str], tipo_colheita: Optional[str]) -> Limites:
+        """Regra que vale para a combinação de talhão e tipo: (nome, limite de produtividade, limite de prejuízo)."""
+        return self._por_talhao.get((talhao, tipo_colheita)) or self._por_tipo.get(tipo_colheita) or self._padrao
+
+    def faixa_alerta(self) -> Tuple[float, float]:
+        """Maior limite de produtividade e menor limite de prejuízo entre as regras: fora dessa faixa nada dispara."""
+        regras = [self._padrao, *self._por_tipo.values(), *self._por_talhao.values()]
+        return max(r[1] for r in regras), min(r[2] for r in regras)
+
+    def avaliar(self, colheita: Mapping[str, Any]) -> Optional[Limites]:
+        """Retorna a regra disparada pela colheita (dicionário ou `Colheita`), ou None."""
+        produtividade, prejuizo = colheita.get("produtividade"), colheita.get("prejuizo")
+        if produtividade is None or prejuizo is None:
+            return None
+        regra = self.limites(colheita.get("talhao"), colheita.get("tipo_colheita"))
+        return regra if produtividade < regra[1] and prejuizo > regra[2] else None
+
+
+def _validar(origem: str, regra: Any) -> Dict[str, Any]:
+    if not isinstance(regra, dict):
+        raise ValueError(f"Regra '{origem}' deve ser um objeto JSON.")
+    desconhecidos = set(regra) - _CAMPOS_REGRA
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos na regra '{origem}': {', '.join(sorted(desconhecidos))}.")
+    for campo in ("produtividade_min", "prejuizo_max"):
+        if regra.get(campo) is not None and (isinstance(regra[campo], bool) or not isinstance(regra[campo], (int, float))):
+            raise ValueError(f"'{campo}' da regra '{origem}' deve ser numérico ou null.")
+    return regra
+
+
+def _compilar(nome: str, regra: Mapping[str, Any]) -> Limites:
+    if not regra.get("ativo", True):
+        return nome, -math.inf, math.inf
+    produtividade_min, prejuizo_max = regra.get("produtividade_min"), regra.get("prejuizo_max")
+    if produtividade_min is None and prejuizo_max is None:
+        return nome, -math.inf, math.inf # Sem nenhuma condição, a regra não dispara
+    return (nome, math.inf if produtividade_min is None else float(produtividade_min),
+            -math.inf if prejuizo_max is None else float(prejuizo_max))
+
+
+def limite_gravavel(valor: float) -> Optional[float]:
+    """Limite como gravado em ALERTA_COLHEITA (condição ignorada vira NULL)."""
+    return None if math.isinf(valor) else valor
+
+
+_regras: Optional[RegrasAlerta] = None
+_versao_arquivo: Optional[Tuple[str, float]] = None
+_lock = threading.Lock()
+
+
+def obter_regras(caminho: str = ARQUIVO_REGRAS) -> RegrasAlerta:
+    """Regras em uso no processo, recompiladas só quando o arquivo muda (data de modificação).
+
+    Sem arquivo, vale a regra padrão do .env. Um arquivo inválido é informado e mantém as regras anteriores.
+    """
+    global _regras, _versao_arquivo
+    try:
+        versao = (caminho, os.stat(caminho).st_mtime)
+    except OSError:
+        versao = (caminho, 0.0)
+    if _regras is not None and versao == _versao_arquivo:
+        return _regras
+    with _lock:
+        if _regras is None or versao != _versao_arquivo:
+            try:
+                if versao[1]:
+                    _regras = RegrasAlerta.de_arquivo(caminho)
+                    logging.info("Regras de alerta carregadas de %s.", caminho)
+                else:
+                    _regras = RegrasAlerta({"produtividade_min": LIMITE_PRODUTIVIDADE, "prejuizo_max": LIMITE_PREJUIZO})
+            except (OSError, ValueError) as e: # json.JSONDecodeError é um ValueError
+                logging.error("Regras de alerta inválidas em '%s': %s", caminho, e)
+                print(f"⚠️ Regras de alerta inválidas em {caminho}: {e}")
+                if _regras is None:
+                    _regras = RegrasAlerta({"produtividade_min": LIMITE_PRODUTIVIDADE, "prejuizo_max": LIMITE_PREJUIZO})
+            _versao_arquivo = versao
+    return _regras
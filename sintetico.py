@@ -0,0 +1,62 @@
+# Arquivo: sintetico.py
+# Gerador reprodutível de colheitas sintéticas para testes de carga e benchmarks
+
+import argparse
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+from funcoes import montar_colheita, salvar_json
+
+# Parte das colheitas feita por máquina (o restante é manual)
+FRACAO_MECANICA = 0.7
+# Produtividade média e desvio padrão (t/ha) por tipo de colheita
+PRODUTIVIDADE_TIPO = {"manual": (82.0, 12.0), "mecanica": (90.0, 14.0)}
+# Faixa de perda (fração da produção) por tipo: a colheita mecânica perde mais
+PERDA_TIPO = {"manual": (0.01, 0.05), "mecanica": (0.05, 0.15)}
+
+
+def gerar_colheitas(quantidade: int, semente: int = 42, talhoes: int = 500, assimetria: float = 1.1,
+                    inicio: datetime = datetime(2024, 1, 1), dias: int = 730) -> Iterator[Dict[str, Any]]:
+    """Gera `quantidade` colheitas válidas (mesmas regras de `montar_colheita`) com `data_coleta`.
+
+    Os talhões seguem uma distribuição de Zipf (`assimetria`): poucos talhões concentram a maior
+    parte dos registros, como em uma usina real. Mesma `semente`, mesmos dados.
+    """
+    aleatorio = random.Random(semente)
+    nomes = [f"T{posicao:04d}" for posicao in range(1, talhoes + 1)]
+    # Pesos acumulados: `choices` com cum_weights evita somar os pesos a cada sorteio
+    pesos = list(itertools.accumulate(1 / posicao ** assimetria for posicao in range(1, talhoes + 1)))
+    areas = {talhao: round(aleatorio.uniform(5.0, 120.0), 2) for talhao in nomes} # Área fixa por talhão
+    segundos = dias * 86400
+    for _ in range(quantidade):
+        talhao = aleatorio.choices(nomes, cum_weights=pesos)[0]
+        tipo = "mecanica" if aleatorio.random() < FRACAO_MECANICA else "manual"
+        media, desvio = PRODUTIVIDADE_TIPO[tipo]
+        producao = round(areas[talhao] * max(aleatorio.gauss(media, desvio), 5.0), 2)
+        perda = round(producao * aleatorio.uniform(*PERDA_TIPO[tipo]), 2)
+        colheita = montar_colheita(talhao, areas[talhao], tipo, producao, perda,
+                                   preco_tonelada=round(aleatorio.uniform(90.0, 160.0), 2))
+        colheita["data_coleta"] = inicio + timedelta(seconds=aleatorio.randrange(segundos))
+        yield colheita
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera um arquivo de colheitas sintéticas (.json ou .jsonl).")
+    parser.add_argument("quantidade", type=int, help="Quantidade de colheitas (ex.: 10000 a 10000000)")
+    parser.add_argument("--saida", default="colheitas_sinteticas.jsonl", help="Arquivo de saída (.json ou .jsonl)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador (padrão: 42)")
+    parser.add_argument("--talhoes", type=int, default=500, help="Quantidade de talhões distintos (padrão: 500)")
+    args = parser.parse_args()
+
+    formato = "jsonl" if args.saida.endswith((".jsonl", ".ndjson")) else "json"
+    colheitas = gerar_colheitas(args.quantidade, semente=args.semente, talhoes=args.talhoes)
+    if salvar_json(colheitas, args.saida, formato=formato):
+        print(f"✅ {args.quantidade} colheitas sintéticas salvas em {args.saida}.")
+    else:
+        print("❌ Não foi possível gerar o arquivo de colheitas sintéticas.")
+
+
+if __name__ == "__main__":
+    main()
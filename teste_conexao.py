@@ -1,9 +1,7 @@
-from dotenv import load_dotenv
 import oracledb
 import os
-
-# Carregar variáveis do .env
-load_dotenv()
+import configuracao # Carregar variáveis do .env
+from oracle import plano_execucao_alertas, INDICE_ALERTAS
 
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -22,7 +20,14 @@ try:
         dsn=dsn
     )
     print("✅ Conexão bem-sucedida com o banco Oracle!")
+
+    # Confere se a consulta de alertas usa o índice criado no script SQL
+    plano = plano_execucao_alertas(conn)
     conn.close()
+    print("\n".join(plano))
+    assert any(INDICE_ALERTAS in linha for linha in plano), \
+        f"Consulta de alertas NÃO usa o índice {INDICE_ALERTAS} (verifique se o script SQL foi executado)."
+    print(f"✅ Consulta de alertas usa o índice {INDICE_ALERTAS}.")
 except oracledb.Error as e:
     print("❌ Erro ao conectar ao Oracle:")
     print(e)
\ No newline at end of file